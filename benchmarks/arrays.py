@@ -0,0 +1,53 @@
+"""
+Times programs that build and update large arrays with the built-in functions.
+Run from the repository root with python benchmarks/arrays.py [engine] [size...].
+"""
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import shell
+
+# pushes size elements, replaces each of them and pops them all
+PROGRAM = '''[Chorus]
+Never gonna let arr down
+Never gonna let i down
+Never gonna give arr ARRAY
+Never gonna give i 0
+Inside we both know i < {size}
+  (Ooh give you arr) Never gonna run _push and desert arr, i
+  Never gonna give i i + 1
+We know the game and we're gonna play it
+Never gonna give i 0
+Inside we both know i < {size}
+  (Ooh give you arr) Never gonna run _replace and desert arr, i, i * 2
+  Never gonna give i i + 1
+We know the game and we're gonna play it
+Inside we both know i > 0
+  Never gonna give i i - 1
+  (Ooh give you arr) Never gonna run _pop and desert arr, i
+We know the game and we're gonna play it
+Never gonna say arr
+'''
+
+def main():
+    engine = shell.ENGINES[sys.argv[1] if len(sys.argv) > 1 else 'tree']
+    sizes = [int(size) for size in sys.argv[2:]] or [1000, 10000, 50000]
+    print('%-10s %10s' % ('size', 'seconds'))
+    for size in sizes:
+        interpreter = engine('benchmark', PROGRAM.format(size=size).split('\n'))
+        interpreter.parse()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            error = interpreter.run()
+        if error is not None:
+            print(error.as_string())
+            return
+        print('%-10d %10.3f' % (size, time.perf_counter() - start))
+
+if __name__ == '__main__':
+    main()
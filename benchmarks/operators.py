@@ -0,0 +1,52 @@
+"""
+Times every operator of the expression language.
+Run from the repository root with python benchmarks/operators.py [repeat].
+Checking out another version of the interpreter and running it again compares the two.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from basic import *
+from compiler import *
+from interpreter import *
+
+# operator -> expressions to time it with, one for each interesting operand type
+EXPRESSIONS = [
+    ('ADD', ['12 + 34', '1.5 + 2', '1.5 + 2.5']),
+    ('SUBTRACT', ['12 - 34', '1.5 - 2']),
+    ('MULTIPLY', ['12 * 34', '1.5 * 2.5']),
+    ('DIVIDE', ['34 / 12', '3.5 / 2']),
+    ('MODULO', ['34 % 12', '3.5 % 2']),
+    ('UNARY_MINUS', ['-12', '-(1.5)']),
+    ('AND', ['TRUE && FALSE']),
+    ('OR', ['FALSE || TRUE']),
+    ('NOT', ['!TRUE']),
+    ('GREATER', ['12 > 34', '1.5 > 2']),
+    ('LESS', ['12 < 34']),
+    ('GREATER_EQUALS', ['12 >= 34']),
+    ('LESS_EQUALS', ['12 <= 34']),
+    ('EQUALS', ['12 == 34', '\'a\' == \'a\'']),
+    ('ARRAY_ACCESS', ['arr : 1']),
+    ('UNSUPPORTED', ['TRUE + 1'])
+]
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    number = 100000
+    context = Context(None)
+    # arrays are made the way programs make them so that older versions can be timed too
+    array, error = Interpreter('benchmark', []).call_builtin(FUNCTION_ARRAYOF, [Token(TT_INT, 1), Token(TT_INT, 2)])
+    context.add_var('arr', array)
+    print('%-16s %-16s %10s' % ('operator', 'expression', 'ns/eval'))
+    for operator, expressions in EXPRESSIONS:
+        for expression in expressions:
+            tree = Compiler.make_tree(expression)
+            # the best run is the least disturbed by the rest of the system
+            best = min(timeit.repeat(lambda: tree.eval(context), number=number, repeat=repeat))
+            print('%-16s %-16s %10.1f' % (operator, expression, best / number * 1e9))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Times the sort and search built-ins against the same algorithms written in Rickroll.
+Run from the repository root with python benchmarks/sorting.py [engine] [size...].
+"""
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import shell
+
+# makes an array of size pseudo-random INTs and a value to search for
+SETUP = '''[Chorus]
+Never gonna let arr down
+Never gonna let i down
+Never gonna let x down
+Never gonna let found down
+Never gonna give arr ARRAY
+Never gonna give i 0
+Never gonna give x 7
+Inside we both know i < {size}
+  Never gonna give x (x * 1103 + 12345) % 65536
+  (Ooh give you arr) Never gonna run _push and desert arr, x
+  Never gonna give i i + 1
+We know the game and we're gonna play it
+'''
+
+# insertion sort and binary search written in Rickroll, placed before the chorus calling them
+LIBRARY = '''
+[Verse sort]
+(Ooh give you arr)
+Never gonna let i down
+Never gonna let j down
+Never gonna let key down
+Never gonna let n down
+Never gonna let moving down
+(Ooh give you n) Never gonna run _getlength and desert arr
+Never gonna give i 1
+Inside we both know i < n
+  Never gonna give key arr : i
+  Never gonna give j i
+  Never gonna give moving TRUE
+  Inside we both know moving
+    Never gonna give moving FALSE
+    Inside we both know j > 0
+      Inside we both know arr : (j - 1) > key
+        (Ooh give you arr) Never gonna run _replace and desert arr, j, arr : (j - 1)
+        Never gonna give j j - 1
+        Never gonna give moving TRUE
+      Your heart's been aching but you're too shy to say it
+    Your heart's been aching but you're too shy to say it
+  We know the game and we're gonna play it
+  (Ooh give you arr) Never gonna run _replace and desert arr, j, key
+  Never gonna give i i + 1
+We know the game and we're gonna play it
+(Ooh) Never gonna give, never gonna give (give you arr)
+
+[Verse bsearch]
+(Ooh give you arr value)
+Never gonna let low down
+Never gonna let high down
+Never gonna let mid down
+Never gonna give low 0
+(Ooh give you high) Never gonna run _getlength and desert arr
+Inside we both know low < high
+  Never gonna give mid (low + high) / 2
+  Inside we both know arr : mid < value
+    Never gonna give low mid + 1
+  Your heart's been aching but you're too shy to say it
+  Inside we both know arr : mid >= value
+    Never gonna give high mid
+  Your heart's been aching but you're too shy to say it
+We know the game and we're gonna play it
+(Ooh) Never gonna give, never gonna give (give you low)
+'''
+
+NATIVE = '''(Ooh give you arr) Never gonna run _sort and desert arr
+(Ooh give you found) Never gonna run _bsearch and desert arr, x
+Never gonna say found
+'''
+
+LIBRARY_CALLS = '''(Ooh give you arr) Never gonna run sort and desert arr
+(Ooh give you found) Never gonna run bsearch and desert arr, x
+Never gonna say found
+'''
+
+def run(engine, text):
+    """Returns the seconds taken to run a program and what it printed"""
+    interpreter = engine('benchmark', text.split('\n'))
+    error = interpreter.parse()
+    start = time.perf_counter()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        error = error or interpreter.run()
+    if error is not None:
+        raise ValueError(error.as_string())
+    return time.perf_counter() - start, output.getvalue().strip()
+
+def main():
+    engine = shell.ENGINES[sys.argv[1] if len(sys.argv) > 1 else 'tree']
+    sizes = [int(size) for size in sys.argv[2:]] or [100, 500, 2000]
+    print('%-10s %12s %12s %12s' % ('size', 'setup', 'library', 'built-in'))
+    for size in sizes:
+        setup_time, output = run(engine, SETUP.format(size=size))
+        library_time, library_output = run(engine, LIBRARY + SETUP.format(size=size) + LIBRARY_CALLS)
+        native_time, native_output = run(engine, SETUP.format(size=size) + NATIVE)
+        # both versions must find the value at the same index
+        if library_output != native_output:
+            raise ValueError('results differ: ' + library_output + ' ' + native_output)
+        print('%-10d %12.3f %12.3f %12.3f' % (size, setup_time, library_time - setup_time, native_time - setup_time))
+
+if __name__ == '__main__':
+    main()
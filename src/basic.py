@@ -1,41 +1,83 @@
 import re
 
-# Constants
-
-TT_INT = 'INT'
-TT_FLOAT = 'FLOAT'
-
-TT_BOOL = 'BOOL'
-
-TT_ARRAY = 'ARRAY'
-
-TT_CHAR = 'CHAR'
-
-TT_UNDEFINED = 'UNDEFINED'
-
-TT_ARRAY_ACCESS = 'ARRAY_ACCESS'
-
-TT_ADD = 'ADD'
-TT_SUBTRACT = 'SUBTRACT'
-TT_MULTIPLY = 'MULTIPLY'
-TT_DIVIDE = 'DIVIDE'
-TT_MODULO = 'MODULO'
+from hashmap import EMPTY_MAP, HashMap, make_map
+from vector import EMPTY_VECTOR, TYPED_STORAGES, Storage, Vector, array_leaf, build_vector, make_vector, storage_for
 
-TT_UNARY_MINUS = 'UNARY_MINUS'
-
-TT_AND = 'AND'
-TT_OR = 'OR'
-TT_NOT = 'NOT'
-
-TT_GREATER = 'GREATER'
-TT_LESS = 'LESS'
-TT_GREATER_EQUALS = 'GREATER_EQUALS'
-TT_LESS_EQUALS = 'LESS_EQUALS'
-TT_EQUALS = 'EQUALS'
-TT_NOT_EQUALS = 'NOT_EQUALS'
+# Constants
+# token types are small ints so that tokens are cheap to compare and store
+# their names are in TYPE_NAMES
+
+TT_INT = 0
+TT_FLOAT = 1
+
+TT_BOOL = 2
+
+TT_ARRAY = 3
+
+TT_CHAR = 4
+
+TT_UNDEFINED = 5
+
+TT_ARRAY_ACCESS = 6
+
+TT_VARIABLE = 7
+
+TT_ADD = 8
+TT_SUBTRACT = 9
+TT_MULTIPLY = 10
+TT_DIVIDE = 11
+TT_MODULO = 12
+
+TT_UNARY_MINUS = 13
+
+TT_AND = 14
+TT_OR = 15
+TT_NOT = 16
+
+TT_GREATER = 17
+TT_LESS = 18
+TT_GREATER_EQUALS = 19
+TT_LESS_EQUALS = 20
+TT_EQUALS = 21
+TT_NOT_EQUALS = 22
+
+TT_LPAREN = 23
+TT_RPAREN = 24
+
+TT_MAP = 25
+
+TYPE_NAMES = {
+    TT_INT: 'INT',
+    TT_FLOAT: 'FLOAT',
+    TT_BOOL: 'BOOL',
+    TT_ARRAY: 'ARRAY',
+    TT_CHAR: 'CHAR',
+    TT_UNDEFINED: 'UNDEFINED',
+    TT_ARRAY_ACCESS: 'ARRAY_ACCESS',
+    TT_VARIABLE: 'VARIABLE',
+    TT_ADD: 'ADD',
+    TT_SUBTRACT: 'SUBTRACT',
+    TT_MULTIPLY: 'MULTIPLY',
+    TT_DIVIDE: 'DIVIDE',
+    TT_MODULO: 'MODULO',
+    TT_UNARY_MINUS: 'UNARY_MINUS',
+    TT_AND: 'AND',
+    TT_OR: 'OR',
+    TT_NOT: 'NOT',
+    TT_GREATER: 'GREATER',
+    TT_LESS: 'LESS',
+    TT_GREATER_EQUALS: 'GREATER_EQUALS',
+    TT_LESS_EQUALS: 'LESS_EQUALS',
+    TT_EQUALS: 'EQUALS',
+    TT_NOT_EQUALS: 'NOT_EQUALS',
+    TT_LPAREN: 'LPAREN',
+    TT_RPAREN: 'RPAREN',
+    TT_MAP: 'MAP'
+}
 
-TT_LPAREN = 'LPAREN'
-TT_RPAREN = 'RPAREN'
+def type_name(token_type):
+    """Returns the name of a token type"""
+    return TYPE_NAMES.get(token_type, str(token_type))
 
 # Function Constants
 
@@ -47,6 +89,38 @@ FUNCTION_PUTCHAR = '_putchar'
 FUNCTION_ARRAYOF = '_arrayof'
 FUNCTION_GETLENGTH = '_getlength'
 FUNCTION_INPUT = '_input'
+FUNCTION_RANGE = '_range'
+FUNCTION_FILL = '_fill'
+FUNCTION_SUM = '_sum'
+FUNCTION_MIN = '_min'
+FUNCTION_MAX = '_max'
+FUNCTION_VADD = '_vadd'
+FUNCTION_VSUB = '_vsub'
+FUNCTION_VMUL = '_vmul'
+FUNCTION_VDIV = '_vdiv'
+FUNCTION_VMOD = '_vmod'
+FUNCTION_CONCAT = '_concat'
+FUNCTION_INDEXOF = '_indexof'
+FUNCTION_SPLIT = '_split'
+FUNCTION_JOIN = '_join'
+FUNCTION_TOINT = '_toint'
+FUNCTION_TOFLOAT = '_tofloat'
+FUNCTION_TOSTRING = '_tostring'
+FUNCTION_PRINT = '_print'
+FUNCTION_SORT = '_sort'
+FUNCTION_BSEARCH = '_bsearch'
+FUNCTION_REVERSE = '_reverse'
+FUNCTION_UNIQUE = '_unique'
+FUNCTION_MAPOF = '_mapof'
+FUNCTION_GET = '_get'
+FUNCTION_PUT = '_put'
+FUNCTION_REMOVE = '_remove'
+FUNCTION_HASKEY = '_haskey'
+FUNCTION_KEYS = '_keys'
+FUNCTION_SPAWN = '_spawn'
+FUNCTION_AWAIT = '_await'
+FUNCTION_PARMAP = '_parmap'
+FUNCTION_PARREDUCE = '_parreduce'
 
 # blocks
 VERSE = re.compile("^\\[Verse \\w+\\]$")
@@ -76,6 +150,21 @@ RETURN = re.compile("^\\(Ooh\\) Never gonna give, never gonna give \\(give you .
 CALL = re.compile("Never gonna run .+ and desert .+")
 CALL_VALUE = re.compile("\\(Ooh give you \\w+\\) Never gonna run \\w+ and desert .+")
 
+# opcodes
+OP_IMPORT = 'IMPORT'
+OP_SAY = 'SAY'
+OP_EXIT = 'EXIT'
+OP_DECLARE = 'DECLARE'
+OP_ASSIGN = 'ASSIGN'
+OP_CHECK_TRUE = 'CHECK_TRUE'
+OP_IF_END = 'IF_END'
+OP_WHILE_END = 'WHILE_END'
+OP_RETURN = 'RETURN'
+OP_CALL = 'CALL'
+OP_CALL_VALUE = 'CALL_VALUE'
+OP_CAST = 'CAST'
+OP_ERROR = 'ERROR'
+
 # Error
 
 class Error:
@@ -88,13 +177,21 @@ class Error:
 
     def as_string(self):
         """Returns a string containing the error details"""
-        res = ''
-        if self.child is not None:
-            res += self.child.as_string()
-            if self.line == self.child.line:
-                return res
-            res += '\n'
-        res += str(self.name)
+        # the chain of errors is as long as the call stack, so it is walked in a loop
+        chain = []
+        error = self
+        while error is not None:
+            chain.append(error)
+            error = error.child
+        lines = []
+        for error in reversed(chain):
+            if error.child is None or error.line != error.child.line:
+                lines.append(error.describe())
+        return '\n'.join(lines)
+
+    def describe(self):
+        """Returns the line of this error without its child"""
+        res = str(self.name)
         # line could be 0 so can't cast to boolean
         if self.line is not None:
             res += ' on line ' + str(self.line)
@@ -128,6 +225,10 @@ class IndexOutOfBoundsError(Error):
     def __init__(self, details, line=None, file=None):
         super().__init__('Index Out of Bounds', details, line, None, file)
 
+class MissingKeyError(Error):
+    def __init__(self, details, line=None, file=None):
+        super().__init__('Key Error', details, line, None, file)
+
 class FileError(Error):
     def __init__(self, details, line=None, file=None):
         super().__init__('File Error', details, line, None, file)
@@ -139,202 +240,252 @@ class Traceback(Error):
 # Token
 
 class Token:
+    # tokens are the values of every variable and array element
+    # so they have no __dict__ to keep them small
+    __slots__ = ('type', 'value')
     def __init__(self, token_type, value=None):
         self.type = token_type
         self.value = value
     def __repr__(self):
+        # booleans are stored as Python booleans but printed as constants
+        if self.type == TT_BOOL:
+            return 'TRUE' if self.value else 'FALSE'
         # if token has a value, return it
         # otherwise return type
-        return str(self.value if self.value is not None else self.type)
+        return str(self.value if self.value is not None else type_name(self.type))
+    def __reduce__(self):
+        # cached programs share the interned constants once loaded
+        if self.type == TT_BOOL:
+            return (make_bool, (self.value,))
+        if self.type == TT_INT:
+            return (make_int, (self.value,))
+        return (Token, (self.type, self.value))
+    def __eq__(self, other):
+        # values are equal if they have the same type and equal values
+        # so arrays and maps are compared element by element
+        if not isinstance(other, Token):
+            return NotImplemented
+        return self.type == other.type and self.value == other.value
+    def __hash__(self):
+        # str hashes change in every process, so chars are hashed by their code points
+        # to keep the order of map keys the same between runs
+        if self.type == TT_CHAR:
+            return hash((TT_CHAR, tuple(map(ord, self.value))))
+        return hash((self.type, self.value))
+
+# Instruction
+# a statement decoded by the compiler
+# args holds the parsed operands of the statement
+# jump holds the position of the matching statement of a block
+class Instruction:
+    def __init__(self, opcode, args, line):
+        self.opcode = opcode
+        self.args = args
+        self.line = line
+        self.jump = None
+        self.tail = False # true for a call whose value is returned by the next statement
+    # for debugging
+    def __repr__(self):
+        return str(self.opcode) + ' ' + str(self.args)
+
+# the function called by a call statement and its parsed arguments
+# the function is bound to the call site the first time it is found in the global context
+# and is looked up again once a function is added to any context
+class CallSite:
+    __slots__ = ('name', 'args', 'builtin', 'function', 'generation')
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args # expression trees of the arguments
+        self.builtin = name in FUNCTION_CONSTANTS
+        self.function = None # bound function, which takes as many arguments as given
+        self.generation = -1 # value of Context.generation when the function was bound
+    # for debugging
+    def __repr__(self):
+        return self.name + ' ' + str(len(self.args))
+    def __reduce__(self):
+        # bound functions belong to the program being executed
+        return (CallSite, (self.name, self.args))
 
-# Operation
+# Operations
+# operators are applied by looking up a function for the operator and operand types
+# every function takes the operand tokens and returns a (value, error) tuple
 
-class Operation:
-    def __init__(self, operator, args):
-        self.operator = operator
-        self.args = args
-    def eval(self):
-        """Evaluates and returns the value of the expression"""
-        # if operation is add
-        if self.operator.type == TT_ADD:
-            # if operation is binary
-            if len(self.args) == 2:
-                # if arguments are numbers
-                if self.all_satisfies(self.is_number):
-                    # if any of the arguments are floats, return a float
-                    # otherwise return an int
-                    if self.any_of(TT_FLOAT):
-                        return Token(TT_FLOAT, self.args[0].value + self.args[1].value), None
-                    else:
-                        return Token(TT_INT, self.args[0].value + self.args[1].value), None
-        elif self.operator.type == TT_SUBTRACT:
-            # subtract operation
-            # unary minus handled in lexer
-            # if operation is binary
-            if len(self.args) == 2:
-                # if arguments are numbers
-                if self.all_satisfies(self.is_number):
-                    # if any of the arguments are floats, return a float
-                    # otherwise return an int
-                    if self.any_of(TT_FLOAT):
-                        return Token(TT_FLOAT, self.args[0].value - self.args[1].value), None
-                    else:
-                        return Token(TT_INT, self.args[0].value - self.args[1].value), None
-        elif self.operator.type == TT_MULTIPLY:
-            # if operation is binary
-            if len(self.args) == 2:
-                # if arguments are numbers
-                if self.all_satisfies(self.is_number):
-                    # handle float and integer separately
-                    if self.any_of(TT_FLOAT):
-                        return Token(TT_FLOAT, self.args[0].value * self.args[1].value), None
-                    else:
-                        return Token(TT_INT, self.args[0].value * self.args[1].value), None
-        elif self.operator.type == TT_DIVIDE:
-            # if operation is binary
-            if len(self.args) == 2:
-                # if arguments are numbers
-                if self.all_satisfies(self.is_number):
-                    # if any are float, do floating point division
-                    # else do integer division
-                    if self.any_of(TT_FLOAT):
-                        return Token(TT_FLOAT, self.args[0].value / self.args[1].value), None
-                    else:
-                        return Token(TT_INT, self.args[0].value // self.args[1].value), None
-        elif self.operator.type == TT_MODULO:
-            # if operation is binary
-            if len(self.args) == 2:
-                # if arguments are numbers
-                if self.all_satisfies(self.is_number):
-                    # if any are float, do floating point division
-                    # else do integer division
-                    if self.any_of(TT_FLOAT):
-                        return Token(TT_FLOAT, self.args[0].value % self.args[1].value), None
-                    else:
-                        return Token(TT_INT, self.args[0].value % self.args[1].value), None
-        elif self.operator.type == TT_AND:
-            # if operator is binary
-            if len(self.args) == 2:
-                # if arguments are booleans
-                if self.all_of(TT_BOOL):
-                    if self.args[0].value == 'TRUE' and self.args[1].value == 'TRUE':
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_OR:
-            # if operator is binary
-            if len(self.args) == 2:
-                # if arguments are booleans
-                if self.all_of(TT_BOOL):
-                    if self.args[0].value == 'TRUE' or self.args[1].value == 'TRUE':
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_NOT:
-            # if operator is unary
-            if len(self.args) == 1:
-                if self.all_of(TT_BOOL):
-                    if self.args[0].value == 'TRUE':
-                        return Token(TT_BOOL, 'FALSE'), None
-                    else:
-                        return Token(TT_BOOL, 'TRUE'), None
-        elif self.operator.type == TT_GREATER:
-            # if operator is binary
-            if len(self.args) == 2:
-                if self.all_satisfies(self.is_number):
-                    if self.args[0].value > self.args[1].value:
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_LESS:
-            # if operator is binary
-            if len(self.args) == 2:
-                if self.all_satisfies(self.is_number):
-                    if self.args[0].value < self.args[1].value:
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_GREATER_EQUALS:
-            # if operator is binary
-            if len(self.args) == 2:
-                if self.all_satisfies(self.is_number):
-                    if self.args[0].value >= self.args[1].value:
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_LESS_EQUALS:
-            # if operator is binary
-            if len(self.args) == 2:
-                if self.all_satisfies(self.is_number):
-                    if self.args[0].value <= self.args[1].value:
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_EQUALS:
-            # if operator is binary
-            if len(self.args) == 2:
-                if self.args[0].type == self.args[1].type:
-                    if self.args[0].value == self.args[1].value:
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_NOT_EQUALS:
-            # if operator is binary
-            if len(self.args) == 2:
-                if self.args[0].type == self.args[1].type:
-                    if self.args[0].value != self.args[1].value:
-                        return Token(TT_BOOL, 'TRUE'), None
-                    else:
-                        return Token(TT_BOOL, 'FALSE'), None
-        elif self.operator.type == TT_ARRAY_ACCESS:
-            # if operator is binary
-            if len(self.args) == 2:
-                # if arguments are array and int
-                if self.args[0].type == TT_ARRAY and self.args[1].type == TT_INT:
-                    array = self.args[0].value
-                    index = self.args[1].value
-                    # if index is not in range
-                    if len(array) <= index or index < 0:
-                        return None, RuntimeError('Array index ' + str(index) + ' out of bounds')
-                    else:
-                        # return value at index
-                        return array[index], None
-        elif self.operator.type == TT_UNARY_MINUS:
-            # if operator is unary
-            if len(self.args) == 1:
-                if self.all_satisfies(self.is_number):
-                    return Token(self.args[0].type, -self.args[0].value), None
-        return None, RuntimeError('No such operator ' + str(self.operator.type))
-    def is_number(self, token):
-        """Returns true if the token is a number (INT or FLOAT)"""
-        return token.type == TT_INT or token.type == TT_FLOAT
-    def all_of(self, token_type):
-        """Returns true if all arguments are of given type"""
-        return all([operand.type == token_type for operand in self.args])
-    def all_satisfies(self, function):
-        """Returns true if all arguments return true when called with function"""
-        return all([function(operand) for operand in self.args])
-    def any_of(self, token_type):
-        """Returns true if any arguments are of given type"""
-        return any([operand.type == token_type for operand in self.args])
-    def any_satisfies(self, function):
-        """Returns true if any arguments return true when called with function"""
-        return any([function(operand) for operand in self.args])
+def add_numbers(left, right):
+    return Token(TT_FLOAT, left.value + right.value), None
+
+def subtract_numbers(left, right):
+    return Token(TT_FLOAT, left.value - right.value), None
+
+def multiply_numbers(left, right):
+    return Token(TT_FLOAT, left.value * right.value), None
+
+def divide_numbers(left, right):
+    return Token(TT_FLOAT, left.value / right.value), None
+
+def modulo_numbers(left, right):
+    return Token(TT_FLOAT, left.value % right.value), None
+
+def add_ints(left, right):
+    return make_int(left.value + right.value), None
+
+def subtract_ints(left, right):
+    return make_int(left.value - right.value), None
+
+def multiply_ints(left, right):
+    return make_int(left.value * right.value), None
+
+def divide_ints(left, right):
+    return make_int(left.value // right.value), None
+
+def modulo_ints(left, right):
+    return make_int(left.value % right.value), None
+
+def and_bools(left, right):
+    return make_bool(left.value and right.value), None
+
+def or_bools(left, right):
+    return make_bool(left.value or right.value), None
+
+def compare_greater(left, right):
+    return make_bool(left.value > right.value), None
+
+def compare_less(left, right):
+    return make_bool(left.value < right.value), None
+
+def compare_greater_equals(left, right):
+    return make_bool(left.value >= right.value), None
+
+def compare_less_equals(left, right):
+    return make_bool(left.value <= right.value), None
+
+def compare_equals(left, right):
+    return make_bool(left.value == right.value), None
+
+def compare_not_equals(left, right):
+    return make_bool(left.value != right.value), None
+
+def access_array(array, index):
+    # if index is not in range
+    if len(array.value) <= index.value or index.value < 0:
+        return None, RuntimeError('Array index ' + str(index.value) + ' out of bounds')
+    return array.value[index.value], None
+
+def access_map(map_token, key):
+    # same errors as the _get built-in
+    if not is_key(key):
+        return None, IllegalArgumentError('Unsupported key type ' + type_name(key.type))
+    value = map_token.value.get(key)
+    if value is None:
+        return None, MissingKeyError('Key ' + str(key) + ' not in map')
+    return value, None
+
+def negate_int(operand):
+    return make_int(-operand.value), None
+
+def negate_float(operand):
+    return Token(TT_FLOAT, -operand.value), None
+
+def not_bool(operand):
+    return make_bool(not operand.value), None
+
+# (operator, operand type) -> function
+UNARY_OPERATIONS = {
+    (TT_UNARY_MINUS, TT_INT): negate_int,
+    (TT_UNARY_MINUS, TT_FLOAT): negate_float,
+    (TT_NOT, TT_BOOL): not_bool
+}
+
+# (operator, left type, right type) -> function
+BINARY_OPERATIONS = {
+    (TT_ADD, TT_INT, TT_INT): add_ints,
+    (TT_SUBTRACT, TT_INT, TT_INT): subtract_ints,
+    (TT_MULTIPLY, TT_INT, TT_INT): multiply_ints,
+    (TT_DIVIDE, TT_INT, TT_INT): divide_ints,
+    (TT_MODULO, TT_INT, TT_INT): modulo_ints,
+    (TT_AND, TT_BOOL, TT_BOOL): and_bools,
+    (TT_OR, TT_BOOL, TT_BOOL): or_bools,
+    (TT_ARRAY_ACCESS, TT_ARRAY, TT_INT): access_array
+}
+
+# arithmetic on a FLOAT and any number returns a FLOAT
+for left_type, right_type in ((TT_INT, TT_FLOAT), (TT_FLOAT, TT_INT), (TT_FLOAT, TT_FLOAT)):
+    BINARY_OPERATIONS[(TT_ADD, left_type, right_type)] = add_numbers
+    BINARY_OPERATIONS[(TT_SUBTRACT, left_type, right_type)] = subtract_numbers
+    BINARY_OPERATIONS[(TT_MULTIPLY, left_type, right_type)] = multiply_numbers
+    BINARY_OPERATIONS[(TT_DIVIDE, left_type, right_type)] = divide_numbers
+    BINARY_OPERATIONS[(TT_MODULO, left_type, right_type)] = modulo_numbers
+
+# numbers of any type can be compared
+for left_type in (TT_INT, TT_FLOAT):
+    for right_type in (TT_INT, TT_FLOAT):
+        BINARY_OPERATIONS[(TT_GREATER, left_type, right_type)] = compare_greater
+        BINARY_OPERATIONS[(TT_LESS, left_type, right_type)] = compare_less
+        BINARY_OPERATIONS[(TT_GREATER_EQUALS, left_type, right_type)] = compare_greater_equals
+        BINARY_OPERATIONS[(TT_LESS_EQUALS, left_type, right_type)] = compare_less_equals
+
+# values of the same type can be checked for equality
+for data_type in (TT_INT, TT_FLOAT, TT_BOOL, TT_ARRAY, TT_CHAR, TT_UNDEFINED, TT_MAP):
+    BINARY_OPERATIONS[(TT_EQUALS, data_type, data_type)] = compare_equals
+    BINARY_OPERATIONS[(TT_NOT_EQUALS, data_type, data_type)] = compare_not_equals
+
+# types of map keys, arrays of them can be keys too
+KEY_TYPES = (TT_INT, TT_FLOAT, TT_BOOL, TT_CHAR)
+
+# maps are accessed with their keys
+for key_type in KEY_TYPES + (TT_ARRAY,):
+    BINARY_OPERATIONS[(TT_ARRAY_ACCESS, TT_MAP, key_type)] = access_map
+
+def is_key(token):
+    """Returns true if token can be a key of a map"""
+    if token.type in KEY_TYPES:
+        return True
+    if token.type != TT_ARRAY:
+        return False
+    # raw values of typed arrays are always INTs, FLOATs or CHARs
+    if token.value.storage.element_type is not None:
+        return True
+    return all([is_key(element) for element in token.value])
+
+def unary_operation(operator, operand):
+    """Applies a unary operator (token type) to a token"""
+    function = UNARY_OPERATIONS.get((operator, operand.type))
+    if function is None:
+        return None, RuntimeError('No such operator ' + type_name(operator))
+    return function(operand)
+
+def binary_operation(operator, left, right):
+    """Applies a binary operator (token type) to two tokens"""
+    function = BINARY_OPERATIONS.get((operator, left.type, right.type))
+    if function is None:
+        return None, RuntimeError('No such operator ' + type_name(operator))
+    return function(left, right)
 
 # Context
 # stores information about the scope of a block
 # like the current variable cache and the parent blocks
 class Context:
+    allocations = 0 # number of contexts made, for profiling
+    generation = 0 # number of functions added to contexts, call sites bound before it changed are unbound
     def __init__(self, parent):
+        Context.allocations += 1
         self.parent = parent
         self.variable_cache = dict()
         self.function_cache = dict() # name -> Function
+        self.modules = set() # absolute paths of the files imported into this context
     # for debugging
     def __repr__(self):
         return str([str(self.variable_cache), str(self.function_cache)])
     def unsafe_set_var(self, name, value):
         """Sets the value of a variable without checking if it exists"""
         self.variable_cache[name] = value
+    def has_var(self, name):
+        """Returns true if a variable exists in this context or a parent context"""
+        cur_context = self
+        while cur_context is not None:
+            if name in cur_context.variable_cache:
+                return True
+            cur_context = cur_context.parent
+        return False
     def add_var(self, name, value):
         """
         Adds a variable (key -> value pair) to the variable cache.
@@ -380,6 +531,7 @@ class Context:
         # if not throw an error
         return None, RuntimeError('Variable ' + name + ' doesn\'t exist')
     def unsafe_set_function(self, func):
+        Context.generation += 1
         self.function_cache[func.name] = func
     def add_function(self, func):
         """
@@ -393,6 +545,7 @@ class Context:
                 return RuntimeError('Function ' + func.name + ' already exists')
             cur_context = cur_context.parent
         # add tuple of function info (string array, string array)
+        Context.generation += 1
         self.function_cache[func.name] = func
     # get arguments and source code of function with name
     # returns (string array, string array) = (arguments, code lines)
@@ -410,25 +563,82 @@ class Context:
         return None, RuntimeError('Function ' + name + ' doesn\'t exist')
 
 class Function:
-    def __init__(self, name, args, src, line, file):
+    def __init__(self, name, args, line, file):
         self.name = name
         self.args = args
-        self.src = src
+        self.code = None # instructions made by the compiler
         self.line = line
         self.file = file
 
     def __repr__(self):
         return self.name
+    def __getstate__(self):
+        # bytecode and Python functions belong to the interpreter that made them
+        return {'name': self.name, 'args': self.args, 'code': self.code, 'line': self.line, 'file': self.file}
+
+# functions can call each other this many times before the program stops with an error
+MAX_CALL_DEPTH = 200000
+
+def call_depth_error(max_depth):
+    """Returns the error of a call past the maximum depth"""
+    return RuntimeError('Maximum call depth of ' + str(max_depth) + ' exceeded')
 
 # Variable Constants
+# these are shared by every expression that makes them
+# so their values are never changed
 
 CONSTANTS = {
-    'TRUE': Token(TT_BOOL, 'TRUE'),
-    'FALSE': Token(TT_BOOL, 'FALSE'),
+    'TRUE': Token(TT_BOOL, True),
+    'FALSE': Token(TT_BOOL, False),
     'UNDEFINED': Token(TT_UNDEFINED, 'UNDEFINED'),
-    'ARRAY': Token(TT_ARRAY, [])
+    'ARRAY': Token(TT_ARRAY, EMPTY_VECTOR),
+    'MAP': Token(TT_MAP, EMPTY_MAP)
 }
 
+# ints in this range are made once and shared
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 256
+SMALL_INTS = [Token(TT_INT, value) for value in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+
+def make_int(value):
+    """Returns an INT token, shared if the value is small"""
+    if SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return SMALL_INTS[value - SMALL_INT_MIN]
+    return Token(TT_INT, value)
+
+def make_bool(value):
+    """Returns the shared BOOL token of a Python boolean"""
+    return CONSTANTS['TRUE'] if value else CONSTANTS['FALSE']
+
+def make_float(value):
+    """Returns a FLOAT token"""
+    return Token(TT_FLOAT, value)
+
+def make_char(value):
+    """Returns a CHAR token"""
+    return Token(TT_CHAR, value)
+
+# Typed arrays
+# arrays whose elements all have one of these types store their raw values
+# in machine-sized arrays and strings instead of tokens
+
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+TYPED_STORAGES[TT_INT] = Storage(
+    TT_INT, array_leaf('q'), make_int,
+    lambda element: element.type == TT_INT and INT_MIN <= element.value <= INT_MAX, str
+)
+TYPED_STORAGES[TT_FLOAT] = Storage(
+    TT_FLOAT, array_leaf('d'), make_float,
+    lambda element: element.type == TT_FLOAT, str
+)
+# chars are always a single character except for the empty char ''
+TYPED_STORAGES[TT_CHAR] = Storage(
+    TT_CHAR, ''.join, make_char,
+    lambda element: element.type == TT_CHAR and len(element.value) == 1, str
+)
+
 OPERATORS = [
     TT_ADD,
     TT_SUBTRACT,
@@ -454,9 +664,13 @@ DATA_TYPES = [
     TT_BOOL,
     TT_ARRAY,
     TT_CHAR,
-    TT_UNDEFINED
+    TT_UNDEFINED,
+    TT_MAP
 ]
 
+# data types by the name used in casts
+DATA_TYPE_TAGS = {TYPE_NAMES[data_type]: data_type for data_type in DATA_TYPES}
+
 # stores names of built-in functions
 # used in interpreter to execute functions
 FUNCTION_CONSTANTS = [
@@ -467,5 +681,39 @@ FUNCTION_CONSTANTS = [
     FUNCTION_PUTCHAR,
     FUNCTION_ARRAYOF,
     FUNCTION_GETLENGTH,
-    FUNCTION_INPUT
+    FUNCTION_INPUT,
+    FUNCTION_RANGE,
+    FUNCTION_FILL,
+    FUNCTION_SUM,
+    FUNCTION_MIN,
+    FUNCTION_MAX,
+    FUNCTION_VADD,
+    FUNCTION_VSUB,
+    FUNCTION_VMUL,
+    FUNCTION_VDIV,
+    FUNCTION_VMOD,
+    FUNCTION_CONCAT,
+    FUNCTION_INDEXOF,
+    FUNCTION_SPLIT,
+    FUNCTION_JOIN,
+    FUNCTION_TOINT,
+    FUNCTION_TOFLOAT,
+    FUNCTION_TOSTRING,
+    FUNCTION_PRINT,
+    FUNCTION_SORT,
+    FUNCTION_BSEARCH,
+    FUNCTION_REVERSE,
+    FUNCTION_UNIQUE,
+    FUNCTION_MAPOF,
+    FUNCTION_GET,
+    FUNCTION_PUT,
+    FUNCTION_REMOVE,
+    FUNCTION_HASKEY,
+    FUNCTION_KEYS,
+    FUNCTION_SPAWN,
+    FUNCTION_AWAIT,
+    FUNCTION_PARMAP,
+    FUNCTION_PARREDUCE
 ]
+# built-in functions whose first argument is the name of a function
+FUNCTION_NAME_BUILTINS = (FUNCTION_SPAWN, FUNCTION_PARMAP, FUNCTION_PARREDUCE)
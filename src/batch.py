@@ -0,0 +1,146 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import interpreter
+import loader
+import tasks
+from shell import ENGINES, make_memo
+
+# Batch runner
+# runs many programs in a pool of processes and compares their output with the expected output
+# the output of a program is compared with the file next to it with the EXPECTED_EXTENSION
+# and the file with the INPUT_EXTENSION, if there is one, is read as its input
+EXPECTED_EXTENSION = '.expected'
+INPUT_EXTENSION = '.input'
+
+# statuses of a program
+STATUS_PASSED = 'passed' # output is the expected output
+STATUS_FAILED = 'failed' # output is not the expected output
+STATUS_DONE = 'done' # program has no expected output
+STATUS_ERROR = 'error' # an internal exception stopped the program
+
+# raised by the exit hook of programs saying goodbye
+class ProgramExit(Exception):
+    pass
+
+def end_program():
+    """Stops a program that says goodbye without ending the worker"""
+    raise ProgramExit()
+
+# options of the programs run by a worker
+worker_options = None
+# absolute path -> (modification time, interpreter) of the files imported by programs of a worker
+# shared so that every file is only parsed once by each worker
+worker_modules = dict()
+
+def init_worker(options):
+    """Stores the options of a new worker"""
+    global worker_options
+    worker_options = options
+
+def find_programs(patterns):
+    """Returns the paths of the programs in directories or matching glob patterns, in order"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(glob.glob(os.path.join(pattern, '*.txt'))))
+        else:
+            paths.extend(sorted(glob.glob(pattern)))
+    return paths
+
+def read_file(path):
+    """Returns the text of a file, or None if it does not exist"""
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r') as f:
+        return f.read()
+
+def execute_program(path, options):
+    """Executes a program and returns its output, including the error stopping it"""
+    output = io.StringIO()
+    # programs without an input file find the end of the input
+    text = read_file(os.path.splitext(path)[0] + INPUT_EXTENSION)
+    with contextlib.redirect_stdout(output), open(path, 'r') as f:
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(text)
+        try:
+            inter = ENGINES[options.engine](os.path.basename(path), loader.read_lines(f), path)
+            inter.max_depth = options.max_depth
+            inter.parallel_threshold = options.parallel_threshold
+            inter.memo = make_memo(options.memo)
+            inter.exit_hook = end_program
+            inter.modules = worker_modules
+            error = inter.parse()
+            if error is None:
+                error = inter.run()
+            if error is not None:
+                print(error.as_string())
+        except ProgramExit:
+            pass
+        finally:
+            sys.stdin = stdin
+    return output.getvalue()
+
+def run_program(path):
+    """Runs a program in a worker and returns its result"""
+    result = {'file': path}
+    start = time.perf_counter()
+    try:
+        output = execute_program(path, worker_options)
+    except Exception:
+        result['status'] = STATUS_ERROR
+        result['error'] = traceback.format_exc()
+    else:
+        expected = read_file(os.path.splitext(path)[0] + EXPECTED_EXTENSION)
+        if expected is None:
+            result['status'] = STATUS_DONE
+        else:
+            result['status'] = STATUS_PASSED if output == expected else STATUS_FAILED
+    result['time'] = time.perf_counter() - start
+    return result
+
+def run_batch(paths, options):
+    """Runs programs in a pool of workers and returns the summary of their results"""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(options.workers, initializer=init_worker, initargs=(options,)) as executor:
+        results = list(executor.map(run_program, paths))
+    summary = {
+        'engine': options.engine,
+        'workers': options.workers,
+        'wall_time': time.perf_counter() - start,
+        'programs': results
+    }
+    for status in (STATUS_PASSED, STATUS_FAILED, STATUS_DONE, STATUS_ERROR):
+        summary[status] = len([result for result in results if result['status'] == status])
+    return summary
+
+# only execute if batch.py was executed
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Rickroll batch runner')
+    arg_parser.add_argument('programs', nargs='+', help='directories of programs or glob patterns of program files')
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of processes running programs')
+    arg_parser.add_argument('--engine', choices=ENGINES, default='vm', help='engine used to execute programs')
+    arg_parser.add_argument('--max-depth', type=int, default=interpreter.MAX_CALL_DEPTH, help='maximum depth of function calls')
+    arg_parser.add_argument('--memo', type=int, default=0, metavar='SIZE', help='reuse the values of up to SIZE calls of pure functions')
+    arg_parser.add_argument('--parallel-threshold', type=int, default=tasks.PARALLEL_THRESHOLD, metavar='SIZE',
+                            help='map and reduce arrays of at least SIZE elements in parallel')
+    arg_parser.add_argument('--summary', help='file the JSON summary is written to instead of the standard output')
+    options = arg_parser.parse_args()
+    summary = run_batch(find_programs(options.programs), options)
+    if options.summary is None:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        with open(options.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+    # fail if a program did not give its expected output
+    if summary[STATUS_FAILED] or summary[STATUS_ERROR]:
+        sys.exit(1)
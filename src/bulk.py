@@ -0,0 +1,393 @@
+from array import array
+from itertools import islice, repeat
+
+from basic import *
+
+# NumPy is optional, whole-array operations on large arrays of numbers use it when installed
+# and give the same results as the pure Python code otherwise
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# arrays shorter than this are faster without converting them to NumPy arrays
+NUMPY_THRESHOLD = 1024
+
+NUMBER_TYPES = (TT_INT, TT_FLOAT)
+
+BULK_FUNCTIONS = [
+    FUNCTION_RANGE,
+    FUNCTION_FILL,
+    FUNCTION_SUM,
+    FUNCTION_MIN,
+    FUNCTION_MAX,
+    FUNCTION_VADD,
+    FUNCTION_VSUB,
+    FUNCTION_VMUL,
+    FUNCTION_VDIV,
+    FUNCTION_VMOD,
+    FUNCTION_SORT,
+    FUNCTION_BSEARCH,
+    FUNCTION_REVERSE,
+    FUNCTION_UNIQUE
+]
+
+# built-in function -> operator applied to every element
+ELEMENTWISE_OPERATORS = {
+    FUNCTION_VADD: TT_ADD,
+    FUNCTION_VSUB: TT_SUBTRACT,
+    FUNCTION_VMUL: TT_MULTIPLY,
+    FUNCTION_VDIV: TT_DIVIDE,
+    FUNCTION_VMOD: TT_MODULO
+}
+
+# operator -> (function for INT results, function for FLOAT results)
+# matching the operators of basic
+RAW_OPERATIONS = {
+    TT_ADD: (lambda left, right: left + right, lambda left, right: left + right),
+    TT_SUBTRACT: (lambda left, right: left - right, lambda left, right: left - right),
+    TT_MULTIPLY: (lambda left, right: left * right, lambda left, right: left * right),
+    TT_DIVIDE: (lambda left, right: left // right, lambda left, right: left / right),
+    TT_MODULO: (lambda left, right: left % right, lambda left, right: left % right)
+}
+
+if numpy is not None:
+    NUMPY_OPERATIONS = {
+        TT_ADD: (numpy.add, numpy.add),
+        TT_SUBTRACT: (numpy.subtract, numpy.subtract),
+        TT_MULTIPLY: (numpy.multiply, numpy.multiply),
+        TT_DIVIDE: (numpy.floor_divide, numpy.true_divide),
+        TT_MODULO: (numpy.remainder, numpy.remainder)
+    }
+
+def call_bulk(function, args):
+    """Calls a built-in function working on whole arrays"""
+    if function == FUNCTION_RANGE:
+        return make_range(args)
+    if function == FUNCTION_FILL:
+        return fill(args)
+    if function == FUNCTION_SUM:
+        return total(args)
+    if function == FUNCTION_MIN:
+        return extreme(args, min)
+    if function == FUNCTION_MAX:
+        return extreme(args, max)
+    if function == FUNCTION_SORT:
+        return sort_array(args)
+    if function == FUNCTION_BSEARCH:
+        return binary_search(args)
+    if function == FUNCTION_REVERSE:
+        return reverse_array(args)
+    if function == FUNCTION_UNIQUE:
+        return unique(args)
+    return elementwise(ELEMENTWISE_OPERATORS[function], args)
+
+def make_range(args):
+    """Returns the array of INTs from start up to but not including end, counting by step"""
+    # takes parameters [start, end] or [start, end, step]
+    if len(args) not in (2, 3):
+        return None, SyntaxError('Too many or too little arguments')
+    if not all([arg.type == TT_INT for arg in args]):
+        return None, IllegalArgumentError('Unsupported argument types')
+    step = args[2].value if len(args) == 3 else 1
+    if step == 0:
+        return None, IllegalArgumentError('Step cannot be 0')
+    values = range(args[0].value, args[1].value, step)
+    if len(values) == 0:
+        return CONSTANTS['ARRAY'], None
+    return Token(TT_ARRAY, number_vector(values, TT_INT)), None
+
+def fill(args):
+    """Returns an array of a given length with every element set to a value"""
+    # takes parameters [length, any]
+    if len(args) != 2:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_INT:
+        return None, IllegalArgumentError('Unsupported argument types')
+    if args[0].value < 0:
+        return None, IllegalArgumentError('Length cannot be negative')
+    if args[0].value == 0:
+        return CONSTANTS['ARRAY'], None
+    # every element is the same immutable token, so it is only stored once for generic arrays
+    storage = storage_for([args[1]])
+    value = args[1] if storage.element_type is None else args[1].value
+    return Token(TT_ARRAY, build_vector([value] * args[0].value, storage)), None
+
+def total(args):
+    """Returns the sum of an array of numbers"""
+    # takes parameter [array]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_ARRAY:
+        return None, IllegalArgumentError('Unsupported argument types')
+    element_type, values = number_values(args[0].value)
+    if element_type is None:
+        return None, IllegalArgumentError('Unsupported argument types')
+    if element_type == TT_INT:
+        return make_int(sum(values)), None
+    # floats are always added in order so that rounding matches a loop adding them
+    res = 0
+    for value in values:
+        res += value
+    return Token(TT_FLOAT, float(res)), None
+
+def extreme(args, function):
+    """Returns the smallest or largest element of an array of numbers"""
+    # takes parameter [array]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_ARRAY:
+        return None, IllegalArgumentError('Unsupported argument types')
+    vector = args[0].value
+    if len(vector) == 0:
+        return None, IllegalArgumentError('Array is empty')
+    element_type, values = number_values(vector)
+    if element_type is None:
+        return None, IllegalArgumentError('Unsupported argument types')
+    if vector.storage.element_type is not None:
+        # every element has the same type
+        return vector.storage.box(function(values)), None
+    # keep the type of the element that was found
+    return function(vector, key=lambda element: element.value), None
+
+def elementwise(operator, args):
+    """
+    Applies an operator to the elements of two arrays of the same length
+    or to the elements of an array and another value.
+    """
+    # takes parameters [array, array], [array, any] or [any, array]
+    if len(args) != 2:
+        return None, SyntaxError('Too many or too little arguments')
+    left, right = args
+    if left.type != TT_ARRAY and right.type != TT_ARRAY:
+        return None, IllegalArgumentError('Unsupported argument types')
+    if left.type == TT_ARRAY and right.type == TT_ARRAY and len(left.value) != len(right.value):
+        return None, IllegalArgumentError('Array lengths differ')
+    length = len(left.value) if left.type == TT_ARRAY else len(right.value)
+    if operator in (TT_DIVIDE, TT_MODULO) and has_zero(right):
+        return None, RuntimeError('Division by zero')
+    left_type = operand_type(left)
+    right_type = operand_type(right)
+    if left_type in NUMBER_TYPES and right_type in NUMBER_TYPES:
+        # both operands hold raw numbers, so no tokens are made
+        result_type = TT_INT if left_type == TT_INT and right_type == TT_INT else TT_FLOAT
+        if numpy is not None and length >= NUMPY_THRESHOLD:
+            res = numpy_elementwise(operator, left, right, result_type)
+            if res is not None:
+                return Token(TT_ARRAY, res), None
+        function = RAW_OPERATIONS[operator][result_type == TT_FLOAT]
+        values = [function(x, y) for x, y in zip(raw_values(left, length), raw_values(right, length))]
+        return Token(TT_ARRAY, number_vector(values, result_type)), None
+    # otherwise apply the operator to every pair of elements
+    results = []
+    for x, y in zip(elements(left, length), elements(right, length)):
+        res, error = binary_operation(operator, x, y)
+        if error is not None:
+            return None, error
+        results.append(res)
+    return Token(TT_ARRAY, make_vector(results)), None
+
+def sort_array(args):
+    """Returns a stable sorted copy of an array of numbers or CHARs"""
+    # takes parameters [array] or [array, descending]
+    if len(args) not in (1, 2):
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_ARRAY or (len(args) == 2 and args[1].type != TT_BOOL):
+        return None, IllegalArgumentError('Unsupported argument types')
+    vector = args[0].value
+    descending = len(args) == 2 and args[1].value
+    error = check_sortable(vector)
+    if error is not None:
+        return None, error
+    if vector.storage.element_type is not None:
+        # sort the raw values, which keeps the array packed
+        return Token(TT_ARRAY, build_vector(sorted(vector.values(), reverse=descending), vector.storage)), None
+    elements = sorted(vector, key=lambda element: element.value, reverse=descending)
+    return Token(TT_ARRAY, make_vector(elements)), None
+
+def check_sortable(vector):
+    """Returns an error if the elements of an array cannot be compared with each other"""
+    element_type = vector.storage.element_type
+    if element_type is None:
+        types = set([element.type for element in vector])
+        # INTs and FLOATs can be compared like with the comparison operators
+        if types <= set(NUMBER_TYPES):
+            return None
+        if len(types) > 1:
+            names = sorted([type_name(token_type) for token_type in types])
+            return IllegalArgumentError('Cannot sort an array of mixed types ' + ', '.join(names))
+        element_type = types.pop()
+    if element_type not in (TT_INT, TT_FLOAT, TT_CHAR):
+        return IllegalArgumentError('Cannot sort an array of ' + type_name(element_type))
+    return None
+
+def binary_search(args):
+    """Returns the index of the first element equal to a value in a sorted array, or -1 if there is none"""
+    # takes parameters [array, any]
+    if len(args) != 2:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_ARRAY:
+        return None, IllegalArgumentError('Unsupported argument types')
+    vector, value = args
+    vector = vector.value
+    if len(vector) == 0:
+        return make_int(-1), None
+    error = check_sortable(vector)
+    if error is not None:
+        return None, error
+    # the value must be comparable with the elements
+    comparable = NUMBER_TYPES if value.type in NUMBER_TYPES else (TT_CHAR,)
+    if value.type not in (TT_INT, TT_FLOAT, TT_CHAR) or vector[0].type not in comparable:
+        return None, IllegalArgumentError('Unsupported argument types')
+    # bisect_left only takes a key from Python 3.10, so the bisection is written out
+    low, high = 0, len(vector)
+    while low < high:
+        middle = (low + high) // 2
+        if vector[middle].value < value.value:
+            low = middle + 1
+        else:
+            high = middle
+    if low < len(vector) and vector[low].value == value.value:
+        return make_int(low), None
+    return make_int(-1), None
+
+def reverse_array(args):
+    """Returns an array with the elements in reverse order"""
+    # takes parameter [array]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_ARRAY:
+        return None, IllegalArgumentError('Unsupported argument types')
+    vector = args[0].value
+    values = list(vector.values())
+    values.reverse()
+    return Token(TT_ARRAY, build_vector(values, vector.storage)), None
+
+def unique(args):
+    """Returns an array without the elements equal to an earlier element"""
+    # takes parameter [array]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_ARRAY:
+        return None, IllegalArgumentError('Unsupported argument types')
+    vector = args[0].value
+    if vector.storage.element_type is not None:
+        # raw values of one type are equal when the elements are
+        return Token(TT_ARRAY, build_vector(list(dict.fromkeys(vector.values())), vector.storage)), None
+    seen = set()
+    others = [] # values that cannot be map keys cannot be hashed, so they are compared one at a time
+    elements = []
+    for element in vector:
+        if is_key(element):
+            if element in seen:
+                continue
+            seen.add(element)
+        else:
+            if element in others:
+                continue
+            others.append(element)
+        elements.append(element)
+    return Token(TT_ARRAY, make_vector(elements)), None
+
+def find_element(vector, value, start):
+    """Returns the index of the first element from start equal to value, or -1 if there is none"""
+    if vector.storage.element_type is not None:
+        if value.type != vector.storage.element_type:
+            return -1
+        for index, element in enumerate(islice(vector.values(), start, None), start):
+            if element == value.value:
+                return index
+        return -1
+    for index in range(start, len(vector)):
+        element = vector[index]
+        if element.type == value.type and element.value == value.value:
+            return index
+    return -1
+
+def numpy_elementwise(operator, left, right, result_type):
+    """Applies an operator with NumPy, returns None if the result could differ from Python"""
+    left_values = numpy_values(left)
+    right_values = numpy_values(right)
+    if result_type == TT_INT:
+        # Python ints never overflow but NumPy ints wrap around
+        left_bound = magnitude(left_values)
+        right_bound = magnitude(right_values)
+        if operator in (TT_ADD, TT_SUBTRACT):
+            bound = left_bound + right_bound
+        elif operator == TT_MULTIPLY:
+            bound = left_bound * right_bound
+        else:
+            bound = max(left_bound, right_bound) + 1
+        if bound > INT_MAX:
+            return None
+    # Python floats overflow to inf without a warning
+    with numpy.errstate(all='ignore'):
+        res = NUMPY_OPERATIONS[operator][result_type == TT_FLOAT](left_values, right_values)
+    typecode = 'q' if result_type == TT_INT else 'd'
+    values = array(typecode)
+    values.frombytes(res.astype(numpy.int64 if result_type == TT_INT else numpy.float64).tobytes())
+    return build_vector(values, TYPED_STORAGES[result_type])
+
+def numpy_values(operand):
+    """Returns a NumPy array of the raw values of an array, or the raw value of a number"""
+    if operand.type != TT_ARRAY:
+        return operand.value
+    dtype = numpy.int64 if operand.value.storage.element_type == TT_INT else numpy.float64
+    return numpy.concatenate([numpy.frombuffer(leaf, dtype) for leaf in operand.value.leaves()])
+
+def magnitude(values):
+    """Returns the largest absolute value of a NumPy array or number"""
+    if isinstance(values, numpy.ndarray):
+        return max(int(values.max()), -int(values.min()))
+    return abs(values)
+
+def number_values(vector):
+    """
+    Returns the type of the sum of an array of numbers and an iterable of their raw values.
+    Returns None as the type if the array has other elements.
+    """
+    element_type = vector.storage.element_type
+    if element_type in NUMBER_TYPES:
+        return element_type, vector.values()
+    if not all([element.type in NUMBER_TYPES for element in vector]):
+        return None, None
+    # arrays mixing INTs and FLOATs have FLOAT results
+    if any([element.type == TT_FLOAT for element in vector]):
+        element_type = TT_FLOAT
+    else:
+        element_type = TT_INT
+    return element_type, [element.value for element in vector]
+
+def number_vector(values, element_type):
+    """Returns a vector of raw numbers of one type, storing them as tokens if they do not fit"""
+    if len(values) == 0:
+        return EMPTY_VECTOR
+    if element_type == TT_INT and (min(values) < INT_MIN or max(values) > INT_MAX):
+        return make_vector([make_int(value) for value in values])
+    return build_vector(values, TYPED_STORAGES[element_type])
+
+def operand_type(operand):
+    """Returns the type of the raw values of an operand, or None if they are tokens"""
+    if operand.type == TT_ARRAY:
+        return operand.value.storage.element_type
+    return operand.type
+
+def raw_values(operand, length):
+    """Iterates over the raw values of an array or repeats the raw value of a number"""
+    if operand.type == TT_ARRAY:
+        return operand.value.values()
+    return repeat(operand.value, length)
+
+def elements(operand, length):
+    """Iterates over the elements of an array or repeats a value"""
+    if operand.type == TT_ARRAY:
+        return iter(operand.value)
+    return repeat(operand, length)
+
+def has_zero(operand):
+    """Returns true if an operand is a number equal to zero or an array containing one"""
+    if operand.type == TT_ARRAY:
+        if operand.value.storage.element_type in NUMBER_TYPES:
+            return 0 in operand.value.values()
+        return any([element.type in NUMBER_TYPES and element.value == 0 for element in operand.value])
+    return operand.type in NUMBER_TYPES and operand.value == 0
@@ -0,0 +1,70 @@
+import gc
+import hashlib
+import os
+import pickle
+import zlib
+
+# compiled programs are stored in this directory next to their source file
+CACHE_DIRECTORY = '__rrcache__'
+# changes whenever the compiled form of a program changes
+# so that files cached by an older interpreter are ignored
+CACHE_VERSION = 9
+
+def cache_path(path):
+    """Returns the path of the cache file of a source file"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIRECTORY, name + '.rrc')
+
+def source_key(file, path):
+    """
+    Returns the key of a source file, which changes when its name or code changes.
+    The file is hashed in chunks so that large files are never fully in memory.
+    """
+    digest = hashlib.sha256()
+    digest.update(str(CACHE_VERSION).encode())
+    digest.update(b'\0')
+    digest.update(file.encode())
+    digest.update(b'\0')
+    try:
+        with open(path, 'rb') as source_file:
+            for chunk in iter(lambda: source_file.read(1 << 16), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def load(path, key):
+    """
+    Loads the compiled program of a source file.
+    Returns None if it is not cached or was cached with a different key.
+    """
+    # programs are made of many small objects that the garbage collector
+    # would otherwise scan repeatedly while they are loaded
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(cache_path(path), 'rb') as cache_file:
+            cached_key, program = pickle.loads(zlib.decompress(cache_file.read()))
+    except Exception:
+        # missing, unreadable or corrupt cache files are recompiled
+        return None
+    finally:
+        if enabled:
+            gc.enable()
+    if cached_key != key:
+        return None
+    return program
+
+def save(path, key, program):
+    """Stores the compiled program of a source file, ignoring failures"""
+    target = cache_path(path)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        data = zlib.compress(pickle.dumps((key, program), pickle.HIGHEST_PROTOCOL))
+        # write to a temporary file first so other runs never read a partial file
+        tmp_path = target + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp_path, 'wb') as cache_file:
+            cache_file.write(data)
+        os.replace(tmp_path, target)
+    except (OSError, pickle.PicklingError, RecursionError):
+        pass
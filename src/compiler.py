@@ -0,0 +1,150 @@
+from basic import *
+from expression_parser import *
+from lexer import *
+
+# lines of a block are decoded one at a time as they are read
+# so that only the decoded instructions are kept
+class Compiler:
+    def __init__(self, line_index, file):
+        self.line_index = line_index
+        self.file = file
+        self.line_count = 0
+        self.instructions = []
+    def add_line(self, line):
+        """Decodes the next line of the block into an instruction"""
+        self.line_count += 1
+        line = line.strip()
+        # empty lines do not make instructions
+        if line:
+            self.instructions.append(self.make_instruction(line, self.line_index + self.line_count))
+    def make_instructions(self):
+        """Returns the decoded instructions once the block has ended"""
+        error = self.make_jumps(self.instructions)
+        if error is not None:
+            return None, error
+        self.mark_tail_calls(self.instructions)
+        return self.instructions, None
+    def make_jumps(self, instructions):
+        """
+        Links every CHECK_TRUE statement with the IF_END or WHILE_END
+        statement that closes it, in both directions.
+        Unbalanced blocks return an error.
+        """
+        check_stack = [] # positions of unclosed CHECK_TRUE statements
+        for pos in range(len(instructions)):
+            instruction = instructions[pos]
+            if instruction.opcode == OP_CHECK_TRUE:
+                check_stack.append(pos)
+            elif instruction.opcode == OP_IF_END or instruction.opcode == OP_WHILE_END:
+                if not check_stack:
+                    return RuntimeError('Unexpected statement end', instruction.line, self.file)
+                start = check_stack.pop()
+                instructions[start].jump = pos
+                instruction.jump = start
+        if check_stack:
+            return RuntimeError('Unexpected end of block', instructions[check_stack[-1]].line, self.file)
+    def mark_tail_calls(self, instructions):
+        """
+        Marks every call whose value is stored in a variable that is returned by the next statement.
+        Functions making such a call can be replaced by the function they call.
+        """
+        for pos in range(len(instructions) - 1):
+            instruction = instructions[pos]
+            if instruction.opcode != OP_CALL_VALUE or instruction.args[1].builtin:
+                continue
+            following = instructions[pos + 1]
+            if following.opcode == OP_RETURN and isinstance(following.args[0], VariableNode):
+                instruction.tail = following.args[0].name == instruction.args[0]
+    def make_instruction(self, line, line_num):
+        """
+        Decodes a single line into an instruction.
+        Lines that are not statements are decoded into an error
+        instruction so that the error is only raised if it is executed.
+        """
+        if IMPORT.match(line):
+            path = line[22 : ].strip()
+            return Instruction(OP_IMPORT, (path,), line_num)
+        if SAY.match(line):
+            expr = line[16 : ] # get expression
+            # special command goodbye exits the program
+            if expr == 'goodbye':
+                return Instruction(OP_EXIT, (), line_num)
+            return Instruction(OP_SAY, (Compiler.make_tree(expr),), line_num)
+        if DECLARE.match(line):
+            name = line[16 : -5] # variable name
+            return Instruction(OP_DECLARE, (name,), line_num)
+        if ASSIGN.match(line):
+            value = line[17 : ] # get arguments as raw text
+            index = value.find(' ') # variable names cannot have spaces
+            # if no space found
+            if index == -1:
+                return Instruction(OP_ERROR, (IllegalArgumentError(value, line_num, self.file),), line_num)
+            name = value[ : index] # everything before space is name
+            expr = value[index : ] # everything after is expression
+            return Instruction(OP_ASSIGN, (name, Compiler.make_tree(expr)), line_num)
+        if CHECK_TRUE.match(line):
+            expr = line[20 : ] # get boolean expression
+            return Instruction(OP_CHECK_TRUE, (Compiler.make_tree(expr),), line_num)
+        if IF_END.match(line):
+            return Instruction(OP_IF_END, (), line_num)
+        if WHILE_END.match(line):
+            return Instruction(OP_WHILE_END, (), line_num)
+        if RETURN.match(line):
+            expr = line[51 : -1] # get return value
+            return Instruction(OP_RETURN, (Compiler.make_tree(expr),), line_num)
+        if CALL.match(line):
+            value = line[16 : ]
+            index = value.find(' ')
+            name = value[ : index].strip() # get function name
+            index = value.find('desert') # get first index of 'desert' as reference
+            # get arguments trimmed and delimited by ','
+            # also prune arguments for empty spaces
+            args = [arg.strip() for arg in value[index + 7 : ].split(',') if arg.strip()]
+            return Instruction(OP_CALL, (Compiler.make_call_site(name, args),), line_num)
+        if CALL_VALUE.match(line):
+            value = line[14 : ]
+            index = value.find(' ')
+            return_var = value[ : index - 1] # get return variable
+            value = value[index + 17 : ]
+            index = value.find(' ')
+            name = value[ : index].strip() # get function name
+            index = value.find('desert') # get first index of 'desert' as reference
+            # get arguments trimmed and delimited by ', '
+            # also prune arguments for empty spaces
+            args = [arg.strip() for arg in value[index + 7 : ].split(', ') if arg.strip()]
+            return Instruction(OP_CALL_VALUE, (return_var, Compiler.make_call_site(name, args)), line_num)
+        if CAST.match(line):
+            value = line[17 : ]
+            index = value.find(' ')
+            name = value[ : index]
+            to_type = value[index + 1 : ]
+            # names that are not data types are kept to be reported when the cast runs
+            to_type = DATA_TYPE_TAGS.get(to_type, to_type)
+            return Instruction(OP_CAST, (name, to_type), line_num)
+        return Instruction(OP_ERROR, (SyntaxError('Not a statement', line_num, self.file),), line_num)
+    @staticmethod
+    def make_call_site(name, args):
+        """Parses the arguments of a call into a call site"""
+        # 'you' is a constant that means no arguments
+        if args and args[0] == 'you':
+            args = []
+        trees = [Compiler.make_tree(arg) for arg in args]
+        # the first argument of _spawn, _parmap and _parreduce is the name of a function, which is passed as a string
+        if name in FUNCTION_NAME_BUILTINS and args:
+            trees[0] = ValueNode(Token(TT_ARRAY, build_vector(args[0], TYPED_STORAGES[TT_CHAR])))
+        return CallSite(name, trees)
+    @staticmethod
+    def make_tree(text):
+        """
+        Lexes and parses an expression into an expression tree.
+        Errors are stored in the tree and raised when it is evaluated.
+        """
+        lexer = Lexer(text)
+        tokens, error = lexer.make_tokens()
+        if error is not None:
+            return ErrorNode(error)
+        parser = Parser(tokens)
+        tree, error = parser.parse()
+        if error is not None:
+            return ErrorNode(error)
+        return tree
@@ -2,37 +2,109 @@ from enum import Enum
 
 from basic import *
 
-TT_HEAD = 'HEAD'
-TT_TAIL = 'TAIL'
-
 class UnaryConstants(Enum):
     """Constants for how to handle chained unary operators"""
     CANCEL_OUT = 'CANCEL_OUT'
     ERROR = 'ERROR'
 
-# expression is stored as a linkedlist since
-# all traversals start from the head and
-# elements are removed in O(1)
-class TokenNode:
-    def __init__(self, token_type, value=None):
-        self.token = Token(token_type, value)
-        self.type = token_type
-        self.value = value
-        self.left = None
-        self.right = None
-        self.exists = True
-    # for debugging
-    def __repr__(self):
-        left = str(self.left.get_token())
-        this = str(self.get_token())
-        right = str(self.right.get_token())
-        return 'Node: ' + left + ' --> ' + this + ' --> ' + right
-    def get_token(self):
-        """Gets the token inside of the node"""
-        return self.token
-    def pop(self):
-        """Marks current node as no longer existing"""
-        self.exists = False
+# expression trees are made by the parser and evaluated
+# every time the expression runs, so a parsed expression can be reused
+class ValueNode:
+    def __init__(self, token):
+        self.token = token
+    def eval(self, context):
+        """Returns the stored value"""
+        return self.token, None
+
+class VariableNode:
+    def __init__(self, name):
+        self.name = name
+    def eval(self, context):
+        """Looks up the value of the variable in context"""
+        cur_context = context
+        while cur_context is not None:
+            # if variable exists in this context, return it
+            if self.name in cur_context.variable_cache:
+                return cur_context.variable_cache[self.name], None
+            cur_context = cur_context.parent
+        # otherwise variable was not found
+        return None, RuntimeError('Variable ' + self.name + ' not found')
+
+class UnaryNode:
+    def __init__(self, operator, operand):
+        self.operator = operator
+        self.operand = operand
+    def eval(self, context):
+        """Evaluates the operand and applies the operator to it"""
+        return evaluate_tree(self, context)
+
+class BinaryNode:
+    def __init__(self, left, operator, right):
+        self.left = left
+        self.operator = operator
+        self.right = right
+    def eval(self, context):
+        """Evaluates both operands and applies the operator to them"""
+        return evaluate_tree(self, context)
+
+# operands written next to each other without an operator
+# are all evaluated but only the value of the last one is kept
+class SequenceNode:
+    def __init__(self, nodes):
+        self.nodes = nodes
+    def eval(self, context):
+        """Evaluates every node and returns the value of the last one"""
+        return evaluate_tree(self, context)
+
+# expressions that failed to lex or parse store their error
+# so that it is only raised when the expression is evaluated
+class ErrorNode:
+    def __init__(self, error):
+        self.error = error
+    def eval(self, context):
+        """Returns the stored error"""
+        return None, self.error
+
+def evaluate_tree(node, context):
+    """Evaluates an expression tree in context"""
+    # nodes are evaluated from a stack of work instead of recursively
+    # so that expressions nested thousands of levels deep fit in the Python stack
+    # work is a node to evaluate or an operator applied to the values evaluated before it
+    work = [node]
+    values = []
+    while work:
+        node = work.pop()
+        if isinstance(node, UnaryNode):
+            work.append(node.operator)
+            work.append(node.operand)
+        elif isinstance(node, BinaryNode):
+            work.append(node.operator)
+            work.append(node.right)
+            work.append(node.left)
+        elif isinstance(node, SequenceNode):
+            # only the value of the last node is kept
+            for index in reversed(range(len(node.nodes))):
+                work.append(node.nodes[index])
+                if index > 0:
+                    work.append(None)
+        elif node is None:
+            # the value of a node in a sequence is replaced by the next one
+            values.pop()
+        elif isinstance(node, Token):
+            if node.type in BINARY_OPERATORS:
+                right = values.pop()
+                res, error = binary_operation(node.type, values.pop(), right)
+            else:
+                res, error = unary_operation(node.type, values.pop())
+            if error is not None:
+                return None, error
+            values.append(res)
+        else:
+            res, error = node.eval(context)
+            if error is not None:
+                return None, error
+            values.append(res)
+    return values[0], None
 
 OPERATOR_PRECEDENCE = [
     (1, [TT_UNARY_MINUS], UnaryConstants.CANCEL_OUT),
@@ -45,294 +117,129 @@ OPERATOR_PRECEDENCE = [
     (2, [TT_OR], None)
 ]
 
-class Expression:
+# binding powers derived from OPERATOR_PRECEDENCE
+# operators earlier in the list bind tighter
+UNARY_OPERATORS = dict() # operator -> (binding power, chain type)
+BINARY_OPERATORS = dict() # operator -> binding power
+for index, (arg_count, operators, chain_type) in enumerate(OPERATOR_PRECEDENCE):
+    for operator in operators:
+        if arg_count == 1:
+            UNARY_OPERATORS[operator] = (len(OPERATOR_PRECEDENCE) - index, chain_type)
+        else:
+            BINARY_OPERATORS[operator] = len(OPERATOR_PRECEDENCE) - index
+
+# operator precedence parser that makes an expression tree in a single pass over the tokens
+# pending operators and parentheses are kept on explicit stacks instead of the Python stack
+# so that expressions nested thousands of levels deep can be parsed
+class Parser:
     def __init__(self, tokens):
-        self.head = TokenNode(TT_HEAD) # make head
-        self.head.left = self.head # head loops into itself
-        cur_node = self.head
-        for token in tokens:
-            node = Expression.make_node(token) # make node from token
-            # assign right node of node to the left
-            # and left node to this node
-            cur_node.right = node
-            node.left = cur_node
-            cur_node = node
-        self.tail = TokenNode(TT_TAIL) # make tail
-        # tail attached to last node
-        self.tail.left = cur_node
-        cur_node.right = self.tail
-        self.tail.right = self.tail # tail loops into itself
-        # set initial position to head
-        self.pos = self.head
-    # for debugging
-    def __repr__(self):
-        cur_node = self.head.right
-        res = ''
-        while cur_node != self.tail:
-            res += ' --> ' + str(cur_node.get_token())
-            cur_node = cur_node.right
-        return res
-    def traverse_from_head(self):
-        """Sets pointer to head"""
-        self.pos = self.head
-    def traverse_from_tail(self):
-        """Sets pointer to tail"""
-        self.pos = self.head
-    def traverse_from(self, node):
+        self.tokens = tokens
+        self.pos = -1
+        self.cur_token = None
+        self.advance()
+    def advance(self):
+        """Advances the pointer one step"""
+        self.pos += 1
+        # if position is valid
+        self.cur_token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+    def peek(self):
+        """Returns the token after the current token"""
+        return self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
+    def at_end(self):
+        """Returns whether there are no more tokens in the current parenthesis"""
+        return self.cur_token is None or self.cur_token.type == TT_RPAREN
+    def parse(self):
         """
-        Sets pointer to given node.
-        Does not check whether node is in expression.
+        Parses the stored tokens into an expression tree.
+        Expressions next to each other without an operator are all
+        evaluated but only the value of the last one is kept.
         """
-        self.pos = node
-    def get_cur_token(self):
-        """Gets the token being pointed to"""
-        return self.pos.get_token()
-    def traverse_left(self):
-        """Traverses left by one"""
-        self.pos = self.pos.left
-    def traverse_right(self):
-        """Traverses right by one"""
-        self.pos = self.pos.right
-    def pop_current_node(self):
-        """Pops current node and shifts pointer to node to the right"""
-        # program should never pop the
-        # head or tail of the expression
-        if self.pos.type == TT_HEAD or self.pos.type == TT_TAIL:
-            raise IndexError('Bad pop on head or tail')
-        self.pos.left.right = self.pos.right # change left node's right node
-        self.pos.pop() # set current node to popped
-        self.pos = self.pos.right # change node to right node
-        self.pos.left = self.pos.left.left # change left node to left node's left node
-    def insert_at_current(self, token):
+        # parenthesis balance is already checked by the lexer
+        if self.at_end():
+            return None, RuntimeError('Unexpected end of statement')
+        operators = [] # (binding power, operator token) of operators waiting for their right operand
+        operands = [] # nodes waiting for an operator
+        sequences = [[]] # expressions of every open parenthesis, innermost last
+        # index in operators and operands where the innermost parenthesis starts
+        bases = [(0, 0)]
+        while True:
+            node, error = self.parse_operand(operators)
+            if error is not None:
+                return None, error
+            if node is None:
+                # a parenthesis was opened
+                self.advance()
+                if self.at_end():
+                    return None, RuntimeError('Unexpected end of statement')
+                sequences.append([])
+                bases.append((len(operators), len(operands)))
+                continue
+            operands.append(node)
+            while True:
+                # binary operators are left associative
+                if self.cur_token is not None and self.cur_token.type in BINARY_OPERATORS:
+                    operator = self.cur_token
+                    binding_power = BINARY_OPERATORS[operator.type]
+                    self.reduce(operators, operands, bases[-1][0], binding_power)
+                    self.advance()
+                    if self.at_end():
+                        return None, IllegalArgumentError('Expected argument for operator ' + str(operator))
+                    operators.append((binding_power, operator))
+                    break
+                # the expression has ended
+                self.reduce(operators, operands, bases[-1][0], 0)
+                sequences[-1].append(operands.pop())
+                if not self.at_end():
+                    # the next expression of the sequence
+                    break
+                nodes = sequences.pop()
+                node = nodes[0] if len(nodes) == 1 else SequenceNode(nodes)
+                if not sequences:
+                    return node, None
+                bases.pop()
+                self.advance() # skip right parenthesis
+                operands.append(node)
+    def reduce(self, operators, operands, base, binding_power):
+        """Applies the operators above base binding at least as tightly as binding_power"""
+        while len(operators) > base and operators[-1][0] >= binding_power:
+            operator = operators.pop()[1]
+            if operator.type in BINARY_OPERATORS:
+                right = operands.pop()
+                operands.append(BinaryNode(operands.pop(), operator, right))
+            else:
+                operands.append(UnaryNode(operator, operands.pop()))
+    def parse_operand(self, operators):
         """
-        Inserts node at current position and shifts pointer to inserted node.
-        Shifts all nodes including current node to the right by one.
+        Parses a value, pushing the unary operators before it onto operators.
+        Returns None as the node if the value is a parenthesized expression.
         """
-        token_node = Expression.make_node(token)
-        if self.pos.type == TT_HEAD:
-            # interpreter should never try to insert on head
-            # raising internal error since user should never have access to this
-            raise IndexError('Bad insert on head')
-        self.pos.left.right = token_node # change left node's right node to node to insert
-        token_node.left = self.pos.left # change node to insert's left node
-        self.pos.left = token_node # change current node to insert
-        token_node.right = self.pos # change insert's right node to current node
-        self.pos = token_node # change position to insert
-    @staticmethod
-    def make_node(token):
-        """Makes a TokenNode from a Token"""
-        return TokenNode(token.type, token.value)
-
-class Parser:
-    def __init__(self, tokens):
-        self.expression = Expression(tokens) # make expression
-        self.expression.traverse_right() # get first character (starts at head)
-        self.cur_token = self.expression.get_cur_token() # cur_token stores Token
-        self.cur_node = self.expression.pos # cur_node stores TokenNode
-        self.start_stack = [] # stack of recursive indexes
-    def update(self):
-        """Updates cur_token and cur_node"""
-        self.cur_token = self.expression.get_cur_token()
-        self.cur_node = self.expression.pos
-    def pop(self):
-        """Pops current position and updates values"""
-        # if popping current start position, move start position to the right
-        if self.cur_node == self.start_stack[-1]:
-            self.start_stack[-1] = self.start_stack[-1].right
-        # pop and update
-        self.expression.pop_current_node()
-        self.update()
-    def insert(self, token):
-        """Inserts token at current position and updates values"""
-        is_start = self.cur_node == self.start_stack[-1] # whether current node is start
-        # insert and update
-        self.expression.insert_at_current(token)
-        self.update()
-        # if node was inserted before start, update start to be node
-        if is_start:
-            self.start_stack[-1] = self.start_stack[-1].left
-    def advance(self):
-        """Traverses right by one"""
-        # traverse and update
-        self.expression.traverse_right()
-        self.update()
-    def reset(self):
-        """Reset to starting position"""
-        self.expression.traverse_from(self.start_stack[-1])
-        self.update()
-    def recurse(self):
-        """Evaluates an expression or a part of an expression"""
-        self.start_stack.append(self.cur_node) # stores starting point
-        # do all parenthesis operations first
-        while self.cur_node != self.expression.tail:
-            if self.cur_token.type == TT_LPAREN:
+        while True:
+            # a pair of the same chained unary operators cancel eachother out
+            while self.cur_token.type in UNARY_OPERATORS:
+                next_token = self.peek()
+                if next_token is None or next_token.type != self.cur_token.type:
+                    break
+                if UNARY_OPERATORS[self.cur_token.type][1] == UnaryConstants.ERROR:
+                    return None, RuntimeError(type_name(self.cur_token.type) + ' cannot be chained')
+                self.advance()
                 self.advance()
-                val, error = self.recurse()
-                if error is not None:
-                    self.start_stack.pop()
-                    return None, error
-                self.pop()
-                self.insert(val)
-                self.expression.traverse_left()
-                self.update()
-            elif self.cur_token.type == TT_RPAREN:
-                # in case current expression is in parenthesis
+                # nothing left after the cancelled operators
+                if self.at_end():
+                    return None, RuntimeError('Unexpected end of statement')
+            token = self.cur_token
+            if token.type not in UNARY_OPERATORS:
                 break
             self.advance()
-        # for argument count, operators to evaluate, chain type if unary
-        for arg_count, operators, chain_type in OPERATOR_PRECEDENCE:
-            self.reset() # reset
-            # evaluate differently depending on arg count
-            if arg_count == 1:
-                error = self.evaluate_for_unary(operators, chain_type)
-                if error is not None:
-                    self.start_stack.pop()
-                    return None, error
-            elif arg_count == 2:
-                error = self.evaluate_for_binary(operators)
-                if error is not None:
-                    self.start_stack.pop()
-                    return None, error
-        # check for right parenthesis
-        self.reset()
-        last = None
-        while self.cur_node != self.expression.tail:
-            if self.is_data_type(self.cur_token):
-                last = self.cur_token # store value in case of closing parenthesis
-            elif self.cur_token.type == TT_RPAREN:
-                # if current expression inside parenthesis
-                # pop every item of current expression and leave pointer at
-                # left parenthesis (start - 1)
-                while self.cur_node != self.start_stack[-1]:
-                    self.pop()
-                    self.expression.traverse_left()
-                    self.update()
-                self.pop()
-                self.expression.traverse_left()
-                self.update()
-                self.start_stack.pop()
-                return last, None
+            if self.at_end():
+                return None, IllegalArgumentError('Expected argument for operator ' + str(token))
+            operators.append((UNARY_OPERATORS[token.type][0], token))
+        if token.type == TT_LPAREN:
+            return None, None
+        if token.type == TT_VARIABLE:
             self.advance()
-        # is there is an unevaluated operator
-        if last is None:
-            self.start_stack.pop()
-            return None, RuntimeError('Unexpected end of statement')
-        # if type of answer is not a data type
-        # probably impossible
-        if not self.is_data_type(last):
-            self.start_stack.pop()
-            return None, RuntimeError('Not a statement')
-        self.start_stack.pop()
-        return last, None
-    def evaluate_for_binary(self, operators):
-        """Evaluates a group of binary operators from left to right"""
-        last = None
-        last_op = None
-        while self.cur_node != self.expression.tail:
-            # if is current char is an operator
-            if self.is_operator(self.cur_token):
-                last_op = self.cur_token
-            elif self.is_data_type(self.cur_token):
-                # if there is no operator
-                if last_op is None:
-                    last = self.cur_token
-                elif last_op.type in operators:
-                    # if operator is add or subtract
-                    last, error = self.eval_binary(last, last_op, self.cur_token)
-                    if error is not None:
-                        return error
-                    # pop two operands and one operator
-                    # [operand, operator, operand] -> []
-                    for _ in range(3):
-                        self.pop()
-                        self.expression.traverse_left()
-                        self.update()
-                    # self.pos now one below insert position because of last "self.pos - 1"
-                    self.expression.traverse_right()
-                    self.update()
-                    self.insert(last)
-                    self.expression.traverse_left()
-                    self.update()
-                else:
-                    last = self.cur_token
-                last_op = None
-            elif self.cur_token.type == TT_RPAREN:
-                break
-            else:
-                return IllegalArgumentError(str(self.cur_token) + ' not a token')
-            self.advance()
-        if last_op is not None:
-            return IllegalArgumentError('Expected argument for operator ' + str(last_op))
-    # assumes two operations in a row cancel eachother out
-    # and left to right associativity
-    def evaluate_for_unary(self, operators, stack_mode=UnaryConstants.CANCEL_OUT):
-        """Evaluates a group of unary operators from left to right."""
-        last = None
-        last_op = None
-        while self.cur_node != self.expression.tail:
-            if self.is_operator(self.cur_token):
-                is_valid_operator = self.cur_token.type in operators
-                last_valid_operator = (last_op is not None and last_op.type in operators)
-                # if there is a previous NOT, remove both since NOT cancels itself
-                if is_valid_operator and last_valid_operator:
-                    if stack_mode == UnaryConstants.CANCEL_OUT:
-                        # [operator, operand] -> []
-                        for _ in range(2):
-                            self.pop()
-                            self.expression.traverse_left()
-                            self.update()
-                        last_op = None
-                    elif stack_mode == UnaryConstants.ERROR:
-                        return RuntimeError(str(self.cur_token.type) + ' cannot be chained')
-                else:
-                    last_op = self.cur_token
-            elif self.is_data_type(self.cur_token):
-                # if current character is first
-                if last_op is None:
-                    last = self.cur_token
-                elif last_op.type in operators:
-                    # if last operator was unary NOT
-                    last, error = self.eval_unary(last_op, self.cur_token)
-                    if error:
-                        return error
-                    # pop two operands and one operator
-                    # [operator, operand] -> []
-                    for _ in range(2):
-                        self.pop()
-                        self.expression.traverse_left()
-                        self.update()
-                    # self.pos now one below insert position because of last "self.pos - 1"
-                    self.expression.traverse_right()
-                    self.update()
-                    self.insert(last)
-                    self.expression.traverse_left()
-                    self.update()
-                    # don't need to increment self.pos since while loop will increment it
-                else:
-                    # if operation was addition or subtraction
-                    # takes this number as the new starting candidate
-                    last = self.cur_token
-                # reset operator
-                last_op = None
-            elif self.cur_token.type == TT_RPAREN:
-                # if current expression is inside parenthesis
-                break
-            else:
-                return IllegalArgumentError(str(self.cur_token) + ' not a token')
+            return VariableNode(token.value), None
+        if token.type in DATA_TYPES:
             self.advance()
-        if last_op is not None:
-            return IllegalArgumentError('Expected argument for operator ' + str(last_op))
-    def is_operator(self, token):
-        """Returns true if token is operator"""
-        return token.type in OPERATORS
-    def is_data_type(self, token):
-        """Returns true if token is data type"""
-        return token.type in DATA_TYPES
-    def eval_binary(self, left, operation, right):
-        """Performs and returns result of binary operation"""
-        res, error = Operation(operation, [left, right]).eval()
-        return (None, error) if error else (res, None)
-    def eval_unary(self, operation, operand):
-        """Performs and returns result of unary operation"""
-        res, error = Operation(operation, [operand]).eval()
-        return (None, error) if error else (res, None)
+            return ValueNode(token), None
+        # binary operator without a left argument
+        return None, IllegalArgumentError('Expected argument for operator ' + str(token))
@@ -0,0 +1,199 @@
+# Persistent hash map
+# the value of every map
+# updating a map returns a new map sharing most of its nodes with the old one
+# so maps keep their value semantics without copying every entry
+
+BITS = 5
+WIDTH = 1 << BITS # slots of every node
+MASK = WIDTH - 1
+HASH_BITS = 64 # bits of the hash used before keys are kept in a collision node
+HASH_MASK = (1 << HASH_BITS) - 1
+
+# a slot of a node is either an entry tuple (hash, key, value) or a child node
+
+class Node:
+    """A node of the trie, bitmap has a bit set for every part of the hash that has a slot"""
+    __slots__ = ('bitmap', 'slots')
+    def __init__(self, bitmap, slots):
+        self.bitmap = bitmap
+        self.slots = slots # tuple of entries and nodes ordered by their bit
+
+class Collision:
+    """A node holding the entries of keys with the same hash"""
+    __slots__ = ('hash', 'entries')
+    def __init__(self, key_hash, entries):
+        self.hash = key_hash
+        self.entries = entries # tuple of entries
+
+def bit_index(bitmap, bit):
+    """Returns the position in the slots of the slot for bit"""
+    return bin(bitmap & (bit - 1)).count('1')
+
+class HashMap:
+    """
+    A hash array mapped trie.
+    Every level uses the next BITS bits of the hash of a key to pick a slot,
+    so getting, adding and removing a key take O(log32 n) time.
+    """
+    __slots__ = ('count', 'root')
+    def __init__(self, count, root):
+        self.count = count # number of entries
+        self.root = root # Node at the top of the trie
+    # for debugging and printing
+    def __repr__(self):
+        return '{' + ', '.join([repr(key) + ': ' + repr(value) for key, value in self.items()]) + '}'
+    def __reduce__(self):
+        return (make_map, (list(self.items()),))
+    def __len__(self):
+        return self.count
+    def __eq__(self, other):
+        """Returns true if both maps hold equal values for the same keys"""
+        if not isinstance(other, HashMap):
+            return NotImplemented
+        if self.count != other.count:
+            return False
+        return all([other.get(key) == value for key, value in self.items()])
+    __hash__ = None
+    def __iter__(self):
+        return self.keys()
+    def keys(self):
+        """Iterates over the keys in the order of their hashes"""
+        for entry in entries_of(self.root):
+            yield entry[1]
+    def items(self):
+        """Iterates over the (key, value) pairs in the order of their hashes"""
+        for entry in entries_of(self.root):
+            yield entry[1], entry[2]
+    def get(self, key):
+        """Returns the value of key, or None if the map does not hold it"""
+        key_hash = hash(key) & HASH_MASK
+        node = self.root
+        shift = 0
+        while True:
+            if isinstance(node, Collision):
+                for entry in node.entries:
+                    if entry[1] == key:
+                        return entry[2]
+                return None
+            bit = 1 << ((key_hash >> shift) & MASK)
+            if not node.bitmap & bit:
+                return None
+            slot = node.slots[bit_index(node.bitmap, bit)]
+            if isinstance(slot, tuple):
+                if slot[0] == key_hash and slot[1] == key:
+                    return slot[2]
+                return None
+            node = slot
+            shift += BITS
+    def set(self, key, value):
+        """Returns a new map with key set to value"""
+        root, added = set_in(self.root, 0, (hash(key) & HASH_MASK, key, value))
+        return HashMap(self.count + 1 if added else self.count, root)
+    def remove(self, key):
+        """Returns a new map without key, or the same map if it does not hold key"""
+        root = remove_from(self.root, 0, hash(key) & HASH_MASK, key)
+        if root is self.root:
+            return self
+        if self.count == 1:
+            return EMPTY_MAP
+        return HashMap(self.count - 1, root)
+
+def entries_of(node):
+    """Iterates over the entries below node"""
+    if isinstance(node, Collision):
+        yield from node.entries
+        return
+    for slot in node.slots:
+        if isinstance(slot, tuple):
+            yield slot
+        else:
+            yield from entries_of(slot)
+
+def set_in(node, shift, entry):
+    """Returns a copy of node with entry added or replaced and whether a key was added"""
+    key_hash = entry[0]
+    if isinstance(node, Collision):
+        if key_hash == node.hash:
+            entries = node.entries
+            for index in range(len(entries)):
+                if entries[index][1] == entry[1]:
+                    return Collision(key_hash, entries[ : index] + (entry,) + entries[index + 1 : ]), False
+            return Collision(key_hash, entries + (entry,)), True
+        # the collision node moves one level down below a new node
+        node = Node(1 << ((node.hash >> shift) & MASK), (node,))
+    bit = 1 << ((key_hash >> shift) & MASK)
+    index = bit_index(node.bitmap, bit)
+    slots = node.slots
+    # if the slot is free
+    if not node.bitmap & bit:
+        return Node(node.bitmap | bit, slots[ : index] + (entry,) + slots[index : ]), True
+    slot = slots[index]
+    if isinstance(slot, tuple):
+        if slot[0] == key_hash and slot[1] == entry[1]:
+            child, added = entry, False
+        else:
+            # both entries move to a new node below
+            child, added = merge(shift + BITS, slot, entry), True
+    else:
+        child, added = set_in(slot, shift + BITS, entry)
+    return Node(node.bitmap, slots[ : index] + (child,) + slots[index + 1 : ]), added
+
+def merge(shift, first, second):
+    """Returns a node holding two entries with different keys"""
+    if first[0] == second[0] or shift >= HASH_BITS:
+        return Collision(first[0], (first, second))
+    first_bit = 1 << ((first[0] >> shift) & MASK)
+    second_bit = 1 << ((second[0] >> shift) & MASK)
+    if first_bit == second_bit:
+        return Node(first_bit, (merge(shift + BITS, first, second),))
+    if first_bit < second_bit:
+        return Node(first_bit | second_bit, (first, second))
+    return Node(first_bit | second_bit, (second, first))
+
+def remove_from(node, shift, key_hash, key):
+    """
+    Returns what replaces node once key is removed:
+    the same node if key is missing, None if node becomes empty,
+    or its only entry if a node below the root is left with one entry.
+    """
+    if isinstance(node, Collision):
+        entries = tuple([entry for entry in node.entries if entry[1] != key])
+        if len(entries) == len(node.entries):
+            return node
+        if len(entries) == 1:
+            return entries[0]
+        return Collision(node.hash, entries)
+    bit = 1 << ((key_hash >> shift) & MASK)
+    if not node.bitmap & bit:
+        return node
+    index = bit_index(node.bitmap, bit)
+    slots = node.slots
+    slot = slots[index]
+    if isinstance(slot, tuple):
+        if slot[0] != key_hash or slot[1] != key:
+            return node
+        child = None
+    else:
+        child = remove_from(slot, shift + BITS, key_hash, key)
+        if child is slot:
+            return node
+    if child is not None:
+        # a single entry left below moves up into this node
+        if shift > 0 and len(slots) == 1 and isinstance(child, tuple):
+            return child
+        return Node(node.bitmap, slots[ : index] + (child,) + slots[index + 1 : ])
+    if len(slots) == 1:
+        return None if shift > 0 else EMPTY_NODE
+    if shift > 0 and len(slots) == 2 and isinstance(slots[1 - index], tuple):
+        return slots[1 - index]
+    return Node(node.bitmap ^ bit, slots[ : index] + slots[index + 1 : ])
+
+def make_map(items):
+    """Returns a map of a sequence of (key, value) pairs, later pairs replace earlier ones"""
+    result = EMPTY_MAP
+    for key, value in items:
+        result = result.set(key, value)
+    return result
+
+EMPTY_NODE = Node(0, ())
+EMPTY_MAP = HashMap(0, EMPTY_NODE)
@@ -2,37 +2,110 @@ import os
 import re
 import sys
 
+import bulk
+import cache
+import maps
+import strings
+import tasks
 from basic import *
+from compiler import *
 from expression_parser import *
 from lexer import *
+from loader import *
+
+# kinds of frames
+FRAME_BLOCK = 'BLOCK' # [Intro] or [Chorus]
+FRAME_FUNCTION = 'FUNCTION'
+FRAME_IMPORT = 'IMPORT' # [Intro] of an imported file
+
+# CallFrame
+# stores the state of a block of instructions being executed
+class CallFrame:
+    def __init__(self, code, context, file, kind, function=None):
+        self.code = code
+        self.pos = 0 # instruction to continue from once the next frame returns
+        self.context = context # base context of the block
+        self.cur_context = context
+        self.file = file
+        self.kind = kind
+        self.function = function
+        self.line = None # line of the statement that made the next frame
+        self.return_var = None # variable assigned the value returned by the next frame
+        self.scopes = [] # contexts of nested blocks, reused by every block at the same depth
+        self.depth = 0
+        self.memo_keys = None # calls whose value is the value returned by the frame
 
 class Interpreter:
-    def __init__(self, file, text=None):
+    def __init__(self, file, text=None, path=None):
         self.file = file
         if text is None:
             text = []
         self.text = text
+        self.path = path # path of the source file, programs without one are not cached
         self.global_context = Context(None)
         self.cur_context = self.global_context
+        self.modules = dict() # absolute path -> (modification time, interpreter) of imported files
+        self.max_depth = MAX_CALL_DEPTH # calls deeper than this stop the program with an error
+        self.memo = None # Memo storing the values of calls of pure functions, if enabled
+        self.exit_hook = None # called when the program says goodbye instead of ending the process
+        self.tasks = None # TaskPool running the functions spawned by the program, made by the first task
+        self.parallel_threshold = tasks.PARALLEL_THRESHOLD # arrays mapped and reduced in parallel have at least this many elements
     def parse(self):
-        """Parses the stored code"""
+        """
+        Parses and compiles the stored code.
+        Programs read from a file are loaded from the cache if their code has not changed.
+        """
+        key = None
+        if self.path is not None:
+            key = cache.source_key(self.file, self.path)
+        if key is None:
+            return self.parse_source()
+        program = cache.load(self.path, key)
+        if program is not None:
+            self.text = None
+            self.intro_code, self.chorus_code, global_functions, chorus_functions = program
+            self.global_context.function_cache.update(global_functions)
+            # functions declared after the chorus are stored in its context
+            if chorus_functions is not None:
+                self.cur_context = Context(self.global_context)
+                self.cur_context.function_cache.update(chorus_functions)
+            return None
+        error = self.parse_source()
+        if error is None:
+            chorus_functions = None
+            if self.cur_context is not self.global_context:
+                chorus_functions = self.cur_context.function_cache
+            program = (self.intro_code, self.chorus_code, self.global_context.function_cache, chorus_functions)
+            cache.save(self.path, key, program)
+        return error
+    def parse_source(self):
+        """
+        Parses the stored code.
+        Lines are read one at a time and every block is compiled as soon as it ends,
+        so only the compiled code is kept.
+        """
         no_intro = False
         no_chorus = False
         cur_block = None
         cur_function = None
-        self.intro_info = None
-        self.chorus_info = None
+        compiler = None # compiler of the current block
+        compile_errors = dict() # block type -> first error found when compiling a block of that type
+        self.intro_code = None
+        self.chorus_code = None
         loop_balance = 0
         pos = 0
-        while pos < len(self.text):
-            line = self.text[pos].strip()
+        lines = iter(self.text)
+        self.text = None # release the source once it is read
+        text = next(lines, None)
+        while text is not None:
+            line = text.strip()
             if not line:
                 pass
             elif INTRO.match(line):
                 if no_intro:
                     return SyntaxError('[Intro] block must be the first block', pos + 1, self.file)
                 no_intro = True
-                self.intro_info = ([], pos + 1)
+                compiler = Compiler(pos + 1, self.file)
                 # line is starting point of intro block
                 cur_block = TT_INTRO
             elif VERSE.match(line):
@@ -44,27 +117,29 @@ class Interpreter:
                         return RuntimeError('Unexpected function end', pos + 1, self.file)
                     error = self.cur_context.add_function(cur_function)
                     if error is not None:
-                        return None, error
+                        return error
+                self.end_block(cur_block, cur_function, compiler, compile_errors)
                 loop_balance = 0
                 cur_block = TT_VERSE
                 name = line[7 : -1] # name of function
                 pos += 1 # arguments are on next line
+                text = next(lines, None)
                 # if arguments are missing
-                if pos == len(self.text) or not re.match(ARGUMENT_NAMES, self.text[pos].strip()):
+                if text is None or not re.match(ARGUMENT_NAMES, text.strip()):
                     return SyntaxError('Unexpected EOF (no parameters provided)', pos + 1, self.file)
                 else:
                     # get arguments delimited by space
-                    arg_list = self.text[pos].strip()[14 : -1].split()
+                    arg_list = text.strip()[14 : -1].split()
                     args = [arg.strip() for arg in arg_list if arg.strip()]
                     # up is a constant for no args
                     if len(args) == 1 and args[0] == 'up':
                         args = []
-                    cur_function = Function(name, args, [], pos + 1, self.file)
+                    cur_function = Function(name, args, pos + 1, self.file)
+                    compiler = Compiler(pos + 1, self.file)
             elif CHORUS.match(line):
                 if no_chorus:
                     return SyntaxError('[Chorus] block already found', pos + 1, self.file)
                 no_chorus = True
-                self.chorus_info = ([], pos + 1)
                 no_intro = True
                 # line is starting point of chorus block
                 # if there was a previous verse, store it
@@ -73,7 +148,9 @@ class Interpreter:
                         return RuntimeError('Unexpected function end', pos + 1, self.file)
                     error = self.cur_context.add_function(cur_function)
                     if error is not None:
-                        return None, error
+                        return error
+                self.end_block(cur_block, cur_function, compiler, compile_errors)
+                compiler = Compiler(pos + 1, self.file)
                 loop_balance = 0
                 cur_block = TT_CHORUS
                 self.cur_context = Context(self.cur_context) # new local context
@@ -84,256 +161,371 @@ class Interpreter:
                     loop_balance -= 1
                 if loop_balance < 0:
                     return RuntimeError('Unexpected function end', pos + 1, self.file)
-                cur_function.src.append(line) # do not execute immediately since part of block
-            elif cur_block == TT_INTRO:
-                self.intro_info[0].append(line)
-            elif cur_block == TT_CHORUS:
-                self.chorus_info[0].append(line)
+                compiler.add_line(line) # do not execute immediately since part of block
+            elif cur_block == TT_INTRO or cur_block == TT_CHORUS:
+                compiler.add_line(line)
             else:
                 return SyntaxError('Not a statement', pos + 1, self.file)
             pos += 1
+            text = next(lines, None)
         # if loop stack has not been closed
         if loop_balance != 0:
             return RuntimeError('Unexpected EOF', pos + 1, self.file)
         if cur_block == TT_VERSE:
-            self.cur_context.add_function(cur_function)
-    def run(self):
-        """Runs the stored code"""
-        if self.intro_info is not None:
-            res, error = self.execute(self.intro_info[0], self.global_context, self.intro_info[1], self.file)
-            if error is not None:
-                return error
-        if self.chorus_info:
-            res, error = self.execute(self.chorus_info[0], Context(self.global_context), self.chorus_info[1], self.file)
+            error = self.cur_context.add_function(cur_function)
             if error is not None:
                 return error
-    def execute(self, code, context, line_index, file):
-        """Executes some code in context where code is stored as an array of lines"""
-        loop_stack = []
+        self.end_block(cur_block, cur_function, compiler, compile_errors)
+        # errors in blocks are only returned if the whole file could be parsed
+        for block in (TT_INTRO, TT_CHORUS, TT_VERSE):
+            if block in compile_errors:
+                return compile_errors[block]
+    def end_block(self, block, function, compiler, compile_errors):
+        """Stores the compiled code of a block that has ended"""
+        if block is None:
+            return
+        code, error = compiler.make_instructions()
+        if error is not None:
+            compile_errors.setdefault(block, error)
+        elif block == TT_INTRO:
+            self.intro_code = code
+        elif block == TT_CHORUS:
+            self.chorus_code = code
+        else:
+            function.code = code
+    def run(self):
+        """Runs the stored code"""
+        try:
+            if self.intro_code is not None:
+                res, error = self.execute(self.intro_code, self.global_context, self.file)
+                if error is not None:
+                    return error
+            if self.chorus_code is not None:
+                res, error = self.execute(self.chorus_code, Context(self.global_context), self.file)
+                if error is not None:
+                    return error
+        finally:
+            self.close_tasks()
+    def close_tasks(self):
+        """Waits for the tasks spawned by the program and stops the processes running them"""
+        if self.tasks is not None:
+            self.tasks.close()
+            self.tasks = None
+    def call_function(self, function, args):
+        """Calls a function with a list of values outside of a program and returns its value"""
+        context = Context(self.global_context)
+        for (value, param) in zip(args, function.args):
+            context.unsafe_set_var(param, value)
+        return self.execute(function.code, context, function.file, function)
+    def execute(self, code, context, file, function=None):
+        """
+        Executes some code in context where code is stored as a list of instructions.
+        Functions called by the code run in the same loop on a stack of frames,
+        so the depth of calls is not limited by the Python stack.
+        The code of a function is executed as a call of the function.
+        """
+        frame = CallFrame(code, context, file, FRAME_BLOCK if function is None else FRAME_FUNCTION, function)
+        frames = [frame]
         cur_context = context
+        # contexts of nested blocks, reused by every block at the same depth
+        # since a block at depth n always runs inside the block at depth n - 1
+        scopes = frame.scopes
+        depth = 0
         pos = 0
-        while pos < len(code):
-            line = code[pos].strip()
-            if not line:
-                pass
-            elif IMPORT.match(line):
-                path = line[22 : ].strip()
-                if os.path.isfile(path):
-                    try:
-                        with open(path, 'r') as import_file:
-                            tmp_inter = Interpreter(os.path.basename(path), import_file.read().split('\n'))
-                            error = tmp_inter.parse()
-                            if error is not None:
-                                trace = Traceback(line + 1, error, os.path.basename(path))
-                                return None, Traceback(line_index + pos + 1, trace, file)
-                            # hijack the function and intro info
-                            tmp_intro = tmp_inter.intro_info
-                            functions = tmp_inter.cur_context.function_cache
-                            for name in functions:
-                                error = context.add_function(functions[name])
-                                func_file = functions[name].file
-                                if error is not None:
-                                    trace = Traceback(line + 1, error, func_file)
-                                    return None, Traceback(line_index + pos + 1, trace, file)
-                            if tmp_intro is not None:
-                                res, error = self.execute(tmp_intro[0], context, tmp_intro[1], tmp_inter.file)
-                                if error is not None:
-                                    trace = Traceback(line + 1, error, func_file)
-                                    return None, Traceback(line_index + pos + 1, trace, file)
-                    except PermissionError:
-                        err_msg = 'Permission denied'
-                        return None, FileError(err_msg, line_index + pos + 1, file)
-                else:
-                    err_msg = 'File ' + path + ' does not exist or is invalid'
-                    return None, FileError(err_msg, line_index + pos + 1, file)
-            elif SAY.match(line):
-                expr = line[16 : ] # get expression
-                # special command goodbye exits the program
-                if expr == 'goodbye':
-                    os._exit(0)
+        while True:
+            if pos < len(code):
+                instruction = code[pos]
+                opcode = instruction.opcode
+                args = instruction.args
+            else:
+                # blocks without a return statement return UNDEFINED
+                instruction = None
+                opcode = OP_RETURN
+            if opcode == OP_IMPORT:
+                tmp_inter, error = self.load_import(args[0], frame.context, instruction.line, file)
+                if error is not None:
+                    return None, self.unwind(frames, error)
+                if tmp_inter is not None and tmp_inter.intro_code is not None:
+                    # run the intro block of the file in the base context
+                    frame.pos = pos + 1
+                    frame.cur_context = cur_context
+                    frame.depth = depth
+                    frame.line = instruction.line
+                    frame.return_var = None
+                    frame = CallFrame(tmp_inter.intro_code, frame.context, tmp_inter.file, FRAME_IMPORT)
+                    frames.append(frame)
+                    code = frame.code
+                    file = frame.file
+                    cur_context = frame.context
+                    scopes = frame.scopes
+                    depth = 0
+                    pos = 0
+                    continue
+            elif opcode == OP_SAY:
                 # evaluate expression and print
-                res, error = self.evaluate(expr, cur_context)
+                res, error = args[0].eval(cur_context)
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
                 print(res)
-            elif DECLARE.match(line):
-                name = line[16 : -5] # variable name
+            elif opcode == OP_EXIT:
+                self.exit()
+            elif opcode == OP_DECLARE:
                 # add variable to current context
-                error = cur_context.add_var(name, CONSTANTS['UNDEFINED'])
+                error = cur_context.add_var(args[0], CONSTANTS['UNDEFINED'])
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
-            elif ASSIGN.match(line):
-                value = line[17 : ] # get arguments as raw text
-                index = value.find(' ') # variable names cannot have spaces
-                # if no space found
-                if index == -1:
-                    return None, IllegalArgumentError(value, line_index + pos + 1, file)
-                name = value[ : index] # everything before space is name
-                expr = value[index : ] # everything after is expression
-                value, error = self.evaluate(expr, cur_context)
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
+            elif opcode == OP_ASSIGN:
+                name, expr = args
+                value, error = expr.eval(cur_context)
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
                 # set variable
                 error = cur_context.set_var(name, value)
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
-            elif CHECK_TRUE.match(line):
-                expr = line[20 : ] # get boolean expression
-                res, error = self.evaluate(expr, cur_context)
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
+            elif opcode == OP_CHECK_TRUE:
+                res, error = args[0].eval(cur_context)
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
                 if res.type != TT_BOOL:
                     res, error = self.cast(res, TT_BOOL)
                     if error is not None:
                         err_msg = 'Boolean expected, instead found ' + str(res)
-                        err_index = line_index + pos + 1
-                        error = IllegalArgumentError(err_msg, err_index, file)
-                        return None, error
+                        error = IllegalArgumentError(err_msg, instruction.line, file)
+                        return None, self.unwind(frames, error)
                 # if true, execute the inside
-                if res.value == 'TRUE':
-                    loop_stack.append(pos)
-                    cur_context = Context(cur_context) # make new context
+                if res.value:
+                    if depth == len(scopes):
+                        scopes.append(Context(cur_context)) # make new context
+                    cur_context = scopes[depth]
+                    depth += 1
                 else:
-                    # else skip to the end
-                    pos += 1
-                    loop_balance = 1 # start with current CHECK_TRUE statement
-                    # while pos is not end of program and loop is not balanced
-                    while pos < len(code) and loop_balance != 0:
-                        # new CHECK_TRUE statement
-                        if CHECK_TRUE.match(code[pos].strip()):
-                            loop_balance += 1
-                        elif IF_END.match(code[pos].strip()) or WHILE_END.match(code[pos].strip()):
-                            # new closing statement
-                            loop_balance -= 1
-                        # error, loop not balanced
-                        if loop_balance < 0:
-                            break
-                        pos += 1
-                    # if position is end of file and balance is not 0
-                    # then the loop is not balanced
-                    if loop_balance != 0 and pos == len(self.text):
-                        return None, RuntimeError('Unexpected EOF', line_index + pos + 1, file)
-                    # position was already incremented to the next
-                    # during the while loop so no need for pos += 1
+                    # else skip past the end of the block
+                    pos = instruction.jump + 1
                     continue
-            elif IF_END.match(line):
-                # if loop stack is empty
-                if not loop_stack:
-                    return None, RuntimeError('Unexpected statement end', line_index + pos + 1, file)
-                # if statement end, simply pop
-                loop_stack.pop()
-                cur_context = cur_context.parent # remove context
-            elif WHILE_END.match(line):
-                # if loop stack is empty
-                if not loop_stack:
-                    return None, RuntimeError('Unexpected statement end', line_index + pos + 1, file)
-                # reset position to the original position - 1
-                # pos gets incremented at the end of this loop
-                pos = loop_stack.pop() - 1
-                cur_context = cur_context.parent # remove context
-            elif RETURN.match(line):
+            elif opcode == OP_IF_END:
+                # remove context, forgetting its variables so that it can be reused
+                cur_context.variable_cache.clear()
+                cur_context = cur_context.parent
+                depth -= 1
+            elif opcode == OP_WHILE_END:
+                # jump back to the CHECK_TRUE statement of the loop
+                pos = instruction.jump
+                cur_context.variable_cache.clear()
+                cur_context = cur_context.parent
+                depth -= 1
+                continue
+            elif opcode == OP_RETURN:
                 # get return value
-                return_val, error = self.evaluate(line[51 : -1], cur_context)
-                if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
-                # prematurely return
-                return return_val, None
-            elif CALL.match(line):
-                value = line[16 : ]
-                index = value.find(' ')
-                name = value[ : index].strip() # get function name
-                index = value.find('desert') # get first index of 'desert' as reference
-                # get arguments trimmed and delimited by ', '
-                # also prune arguments for empty spaces
-                args = [arg.strip() for arg in value[index + 7 : ].split(',') if arg.strip()]
-                res, error = self.exec(name, args, cur_context, file)
-                if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
-            elif CALL_VALUE.match(line):
-                value = line[14 : ]
-                index = value.find(' ')
-                return_var = value[ : index - 1] # get return variable
-                value = value[index + 17 : ]
-                index = value.find(' ')
-                name = value[ : index].strip() # get function name
-                index = value.find('desert') # get first index of 'desert' as reference
-                # get arguments trimmed and delimited by ', '
-                # also prune arguments for empty spaces
-                args = [arg.strip() for arg in value[index + 7 : ].split(', ') if arg.strip()]
-                res, error = self.exec(name, args, cur_context, file)
-                if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
-                # assign value to return)var
-                error = cur_context.set_var(return_var, res)
+                if instruction is None:
+                    res = CONSTANTS['UNDEFINED']
+                else:
+                    res, error = args[0].eval(cur_context)
+                    if error is not None:
+                        return None, self.unwind(frames, Traceback(instruction.line, error, file))
+                if frame.memo_keys is not None:
+                    # the first of a chain of tail calls is stored last, so it is forgotten last
+                    for key in reversed(frame.memo_keys):
+                        self.memo.put(key, res)
+                frames.pop()
+                if not frames:
+                    return res, None
+                # continue the caller after its call statement
+                kind = frame.kind
+                frame = frames[-1]
+                code = frame.code
+                file = frame.file
+                cur_context = frame.cur_context
+                scopes = frame.scopes
+                depth = frame.depth
+                pos = frame.pos
+                # return value of imported intro blocks is discarded
+                if kind == FRAME_FUNCTION and frame.return_var is not None:
+                    # assign value to return_var
+                    error = cur_context.set_var(frame.return_var, res)
+                    if error is not None:
+                        return None, self.unwind(frames, Traceback(frame.line, error, file))
+                continue
+            elif opcode == OP_CALL or opcode == OP_CALL_VALUE:
+                site = args[-1]
+                # evaluate in self.exec_builtin if function is built-in
+                if site.builtin:
+                    res, error = self.exec_builtin(site.name, site.args, cur_context)
+                    if error is not None:
+                        return None, self.unwind(frames, Traceback(instruction.line, error, file))
+                    if opcode == OP_CALL_VALUE:
+                        # assign value to return_var
+                        error = cur_context.set_var(args[0], res)
+                        if error is not None:
+                            return None, self.unwind(frames, Traceback(instruction.line, error, file))
+                    pos += 1
+                    continue
+                call, error = self.prepare_call(site, cur_context, file)
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
-            elif CAST.match(line):
-                value = line[17 : ]
-                index = value.find(' ')
-                name = value[ : index]
-                to_type = value[index + 1 : ]
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
+                function, new_context = call
+                key = None
+                if self.memo is not None:
+                    values = [new_context.variable_cache[arg] for arg in function.args]
+                    key = self.memo.make_key(function, values, self.global_context)
+                    if key is not None:
+                        res = self.memo.get(key)
+                        # a call made before returns the same value without running again
+                        if res is not None:
+                            if opcode == OP_CALL_VALUE:
+                                error = cur_context.set_var(args[0], res)
+                                if error is not None:
+                                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
+                            pos += 1
+                            continue
+                new_frame = CallFrame(function.code, new_context, function.file, FRAME_FUNCTION, function)
+                # a function returning the value of the function it calls is replaced by it
+                if instruction.tail and frame.kind == FRAME_FUNCTION and cur_context.has_var(args[0]):
+                    # so its value is also the value of the calls it returns for
+                    new_frame.memo_keys = frame.memo_keys
+                    frames[-1] = new_frame
+                elif len(frames) > self.max_depth:
+                    error = Traceback(instruction.line, call_depth_error(self.max_depth), file)
+                    return None, self.unwind(frames, error)
+                else:
+                    # save the state of the caller and switch to the function
+                    frame.pos = pos + 1
+                    frame.cur_context = cur_context
+                    frame.depth = depth
+                    frame.line = instruction.line
+                    frame.return_var = args[0] if opcode == OP_CALL_VALUE else None
+                    frames.append(new_frame)
+                if key is not None:
+                    if new_frame.memo_keys is None:
+                        new_frame.memo_keys = []
+                    new_frame.memo_keys.append(key)
+                frame = new_frame
+                code = frame.code
+                file = frame.file
+                cur_context = new_context
+                scopes = frame.scopes
+                depth = 0
+                pos = 0
+                continue
+            elif opcode == OP_CAST:
+                name, to_type = args
                 var, error = cur_context.get_var(name)
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
                 res, error = self.cast(var, to_type)
                 if error is not None:
-                    return None, Traceback(line_index + pos + 1, error, file)
+                    return None, self.unwind(frames, Traceback(instruction.line, error, file))
                 cur_context.set_var(name, res)
-            else:
-                return None, SyntaxError('Not a statement', line_index + pos + 1, file)
+            elif opcode == OP_ERROR:
+                # statement could not be decoded
+                return None, self.unwind(frames, args[0])
             pos += 1
-        return CONSTANTS['UNDEFINED'], None
-    def evaluate(self, text, context):
-        """Evaluates an expression using parser and lexer"""
-        lexer = Lexer(text, context) # pass in current context as a parameter
-        tokens, error = lexer.make_tokens()
+    def exit(self):
+        """
+        Ends the program.
+        Ends the process unless the exit hook is set, which stops the program by raising an exception.
+        """
+        if self.exit_hook is not None:
+            self.exit_hook()
+        os._exit(0)
+    def unwind(self, frames, error):
+        """Wraps an error in a traceback for the caller of every frame"""
+        while len(frames) > 1:
+            frame = frames.pop()
+            caller = frames[-1]
+            if frame.kind == FRAME_FUNCTION:
+                error = self.function_error(frame.function, caller.file, error)
+            error = Traceback(caller.line, error, caller.file)
+        return error
+    def load_import(self, path, context, line, file):
+        """
+        Adds the functions of the file at path to context.
+        Returns the interpreter holding the parsed file so that its
+        intro block can be executed in context.
+        A file already imported into context or one of its parents
+        is not imported again and no interpreter is returned.
+        """
+        if not os.path.isfile(path):
+            err_msg = 'File ' + path + ' does not exist or is invalid'
+            return None, FileError(err_msg, line, file)
+        abs_path = os.path.abspath(path)
+        cur_context = context
+        while cur_context is not None:
+            if abs_path in cur_context.modules:
+                return None, None
+            cur_context = cur_context.parent
+        tmp_inter, error = self.get_module(abs_path, line, file)
         if error is not None:
             return None, error
-        parser = Parser(tokens)
-        res, error = parser.recurse()
+        # hijack the function and intro info
+        functions = tmp_inter.cur_context.function_cache
+        for name in functions:
+            error = context.add_function(functions[name])
+            if error is not None:
+                trace = Traceback(None, error, functions[name].file)
+                return None, Traceback(line, trace, file)
+        context.modules.add(abs_path)
+        return tmp_inter, None
+    def get_module(self, path, line, file):
+        """
+        Gets the interpreter holding the parsed file at path.
+        Each file is only read and parsed again if it was modified.
+        """
+        mtime = os.path.getmtime(path)
+        if path in self.modules and self.modules[path][0] == mtime:
+            return self.modules[path][1], None
+        try:
+            import_file = open(path, 'r')
+        except PermissionError:
+            err_msg = 'Permission denied'
+            return None, FileError(err_msg, line, file)
+        with import_file:
+            tmp_inter = type(self)(os.path.basename(path), read_lines(import_file), path)
+            error = tmp_inter.parse()
+        if error is not None:
+            return None, Traceback(line, error, file)
+        self.modules[path] = (mtime, tmp_inter)
+        return tmp_inter, None
+    def find_function(self, site, context, file):
+        """
+        Looks up the function called by a call site in context and checks its number of arguments.
+        Functions found in the global context are bound to the call site
+        so that they are not looked up again until a function is added to a context.
+        """
+        if site.generation == Context.generation:
+            return site.function, None
+        function, error = context.get_function(site.name)
         if error is not None:
             return None, error
-        return res, None
-    def exec(self, function, args, context, file):
+        if len(site.args) != len(function.args):
+            error = SyntaxError('Too many or too little arguments')
+            return None, self.function_error(function, file, error)
+        # functions of other contexts can be missing the next time the call site runs
+        if self.global_context.function_cache.get(site.name) is function:
+            site.function = function
+            site.generation = Context.generation
+        return function, None
+    def prepare_call(self, site, context, file):
         """
-        Executes the function with the given function name.
+        Looks up the function called by a call site and evaluates its arguments.
         Function must be inside context with same number of arguments.
-        Returns result of function call.
+        Returns the function and the context it runs in.
         """
-        # 'you' is a constant that means no arguments
-        if args[0] == 'you':
-            args = []
-        # evaluate in self.exec_builtin if function is built-in
-        if function in FUNCTION_CONSTANTS:
-            return self.exec_builtin(function, args, context)
-        # otherwise get arguments, source code, and line index from current context
-        function_info, error = context.get_function(function)
-        func_file = function_info.file
-        line = function_info.line
-        func_args = function_info.args
-        src = function_info.src
+        function_info, error = self.find_function(site, context, file)
         if error is not None:
-            if file != func_file:
-                return None, Traceback(line + 1, error, func_file)
             return None, error
-        if len(args) != len(func_args):
-            if file != func_file:
-                return None, Traceback(line + 1, SyntaxError('Too many or too little arguments'), func_file)
-            return None, SyntaxError('Too many or too little arguments')
         new_context = Context(self.global_context)
-        for (arg, func_arg) in zip(args, func_args):
-            res, error = self.evaluate(arg, context)
+        for (arg, func_arg) in zip(site.args, function_info.args):
+            res, error = arg.eval(context)
             if error is not None:
-                if file != func_file:
-                    return None, Traceback(line + 1, error, func_file)
-                return None, error
+                return None, self.function_error(function_info, file, error)
             new_context.unsafe_set_var(func_arg, res) # allow duplicate variables in global
-        res, error = self.execute(src, new_context, line, func_file)
-        if error is not None:
-            if file != func_file:
-                return None, Traceback(line + 1, error, func_file)
-            return None, error
-        return res, None
+        return (function_info, new_context), None
+    def function_error(self, function, file, error):
+        """Wraps an error raised by a function called from file"""
+        if file != function.file:
+            return Traceback(function.line + 1, error, function.file)
+        return error
     # executes a built-in function
     def exec_builtin(self, function, args, context):
         """
@@ -341,20 +533,24 @@ class Interpreter:
         Function must have same number of arguments.
         """
         # evaluate all arguments
-        for i in range(len(args)):
-            res, error = self.evaluate(args[i], context)
+        # the evaluated values are stored in a new list since
+        # the argument list belongs to a compiled instruction
+        values = []
+        for arg in args:
+            res, error = arg.eval(context)
             if error is not None:
                 return None, error
-            args[i] = res
+            values.append(res)
+        return self.call_builtin(function, values)
+    def call_builtin(self, function, args):
+        """Calls a built-in function with a list of evaluated arguments"""
         if function == FUNCTION_POP:
             if len(args) == 2:
                 # takes parameters [array, index]
                 if args[0].type == TT_ARRAY and args[1].type == TT_INT:
                     # if index in bounds
                     if len(args[0].value) > args[1].value and args[1].value >= 0:
-                        tmp_arr = args[0].value[:] # clone of array
-                        tmp_arr.pop(args[1].value)
-                        return Token(TT_ARRAY, tmp_arr), None
+                        return Token(TT_ARRAY, args[0].value.remove(args[1].value)), None
                     else:
                         err_str = 'Array index ' + str(args[1].value) + ' out of bounds'
                         return None, IndexOutOfBoundsError(err_str)
@@ -366,9 +562,7 @@ class Interpreter:
             if len(args) == 2:
                 # takes parameters [array]
                 if args[0].type == TT_ARRAY:
-                    tmp_arr = args[0].value[:] # clone of array
-                    tmp_arr.append(args[1])
-                    return Token(TT_ARRAY, tmp_arr), None
+                    return Token(TT_ARRAY, args[0].value.append(args[1])), None
                 else:
                     return None, IllegalArgumentError('Unsupported argument types')
             else:
@@ -379,9 +573,7 @@ class Interpreter:
                 if args[0].type == TT_ARRAY and args[1].type == TT_INT:
                     # if index in bounds
                     if len(args[0].value) > args[1].value and args[1].value >= 0:
-                        tmp_arr = args[0].value[:] # clone of array
-                        tmp_arr[args[1].value] = args[2]
-                        return Token(TT_ARRAY, tmp_arr), None
+                        return Token(TT_ARRAY, args[0].value.replace(args[1].value, args[2])), None
                     else:
                         err_str = 'Array index ' + str(args[1].value) + ' out of bounds'
                         return None, IndexOutOfBoundsError(err_str)
@@ -398,7 +590,7 @@ class Interpreter:
                     first_in_bounds = (len(args[0].value) > args[1].value and args[1].value >= 0)
                     second_in_bounds = (len(args[0].value) >= args[2].value and args[2].value >= 0)
                     if first_in_bounds and second_in_bounds and args[1].value <= args[2].value:
-                        tmp_arr = args[0].value[args[1].value : args[2].value] # subarray
+                        tmp_arr = args[0].value.subvector(args[1].value, args[2].value) # subarray
                         return Token(TT_ARRAY, tmp_arr), None
                     else:
                         err_str = 'Array index ' + str(args[1].value) + ' out of bounds'
@@ -420,13 +612,13 @@ class Interpreter:
                 return None, SyntaxError('Too many or too little arguments')
         elif function == FUNCTION_ARRAYOF:
             # make array
-            return Token(TT_ARRAY, [arg for arg in args]), None
+            return Token(TT_ARRAY, make_vector(args)), None
         elif function == FUNCTION_GETLENGTH:
             if len(args) == 1:
-                # takes parameter [array]
-                if args[0].type == TT_ARRAY:
-                    # returns an int with length of array
-                    return Token(TT_INT, len(args[0].value)), None
+                # takes parameter [array or map]
+                if args[0].type == TT_ARRAY or args[0].type == TT_MAP:
+                    # returns an int with length of array or number of keys of map
+                    return make_int(len(args[0].value)), None
                 else:
                     return None, IllegalArgumentError('Unsupported argument types')
             else:
@@ -434,10 +626,22 @@ class Interpreter:
         elif function == FUNCTION_INPUT:
             # takes no parameters
             if len(args) == 0:
-                char_arr = [Token(TT_CHAR, char) for char in list(input())]
-                return Token(TT_ARRAY, char_arr), None
+                # characters are stored in a string without making tokens for them
+                return Token(TT_ARRAY, build_vector(input(), TYPED_STORAGES[TT_CHAR])), None
             else:
                 return None, SyntaxError('Too many or too little arguments')
+        elif function in bulk.BULK_FUNCTIONS:
+            # functions working on whole arrays at once
+            return bulk.call_bulk(function, args)
+        elif function in strings.STRING_FUNCTIONS:
+            # functions working on arrays of CHARs as strings
+            return strings.call_string(function, args)
+        elif function in maps.MAP_FUNCTIONS:
+            # functions working on maps
+            return maps.call_map(function, args)
+        elif function in tasks.TASK_FUNCTIONS:
+            # functions running other functions in other processes
+            return tasks.call_task(self, function, args)
     def cast(self, token, new_type):
         """Casts a token to another type and returns the new token"""
         if token.type == new_type:
@@ -445,32 +649,35 @@ class Interpreter:
         # casting to INT
         if new_type == TT_INT:
             if token.type == TT_FLOAT:
-                return Token(TT_INT, int(token.value)), None
+                return make_int(int(token.value)), None
             if token.type == TT_BOOL:
-                return Token(TT_INT, 1 if token.value == 'TRUE' else 0), None
+                return make_int(1 if token.value else 0), None
             if token.type == TT_CHAR:
-                return Token(TT_INT, ord(token.value)), None
+                return make_int(ord(token.value)), None
         elif new_type == TT_FLOAT:
             # casting to FLOAT
             if token.type == TT_INT:
                 return Token(TT_FLOAT, float(token.value)), None
             if token.type == TT_BOOL:
-                return Token(TT_FLOAT, 1.0 if token.value == 'TRUE' else 0.0), None
+                return Token(TT_FLOAT, 1.0 if token.value else 0.0), None
             if token.type == TT_CHAR:
                 return Token(TT_FLOAT, float(ord(token.value))), None
         elif new_type == TT_BOOL:
             # casting to BOOL
             if token.type == TT_INT:
-                return CONSTANTS['FALSE'] if token.value == 0 else CONSTANTS['TRUE'], None
+                return make_bool(token.value != 0), None
             if token.type == TT_FLOAT:
-                return CONSTANTS['FALSE'] if token.value == 0.0 else CONSTANTS['TRUE'], None
-            if token.type == TT_ARRAY:
-                return CONSTANTS['FALSE'] if not token.value else CONSTANTS['TRUE'], None
+                return make_bool(token.value != 0.0), None
+            if token.type == TT_ARRAY or token.type == TT_MAP:
+                return make_bool(token.value), None
             if token.type == TT_UNDEFINED:
-                return CONSTANTS['FALSE']
+                return CONSTANTS['FALSE'], None
         elif new_type == TT_ARRAY:
             # casting to ARRAY
             pass
+        elif new_type == TT_MAP:
+            # casting to MAP
+            pass
         elif new_type == TT_CHAR:
             # casting to CHAR
             try:
@@ -484,5 +691,5 @@ class Interpreter:
             # casting to undefined
             pass
         else:
-            return None, IllegalArgumentError(new_type + ' not a data type')
-        return None, IllegalCastError('Cannot cast ' + token.type + ' to ' + new_type)
+            return None, IllegalArgumentError(str(new_type) + ' not a data type')
+        return None, IllegalCastError('Cannot cast ' + type_name(token.type) + ' to ' + type_name(new_type))
@@ -5,9 +5,8 @@ from basic import *
 SPECIAL_CHARACTERS = '&|<>=:#'
 
 class Lexer:
-    def __init__(self, text, context):
+    def __init__(self, text):
         self.text = text
-        self.context = context
         self.pos = -1
         self.cur_char = None
         self.advance()
@@ -76,8 +75,8 @@ class Lexer:
                 tokens.append(Token(TT_ADD))
             elif self.cur_char == '-':
                 # if current character is first character or last token
-                # was not int or float
-                if len(tokens) == 0 or (tokens[-1].type != TT_INT and tokens[-1].type != TT_FLOAT):
+                # was not int, float or a variable
+                if len(tokens) == 0 or tokens[-1].type not in (TT_INT, TT_FLOAT, TT_VARIABLE):
                     tokens.append(Token(TT_UNARY_MINUS))
                 else:
                     tokens.append(Token(TT_SUBTRACT))
@@ -137,11 +136,13 @@ class Lexer:
                 num += int(self.cur_char)
             self.advance()
         # assign type to token
-        return Token((TT_FLOAT if is_float else TT_INT), num), None
+        if is_float:
+            return Token(TT_FLOAT, num), None
+        return make_int(num), None
     def make_variable(self):
         """
         Parses a variable or language constant from current value pointed to.
-        Variables are taken from self.context.
+        Variables are only looked up when the expression is evaluated.
         """
         name = ''
         # while character exists and is still alphanumeric
@@ -151,16 +152,8 @@ class Lexer:
         # if name is a language constant
         if name in CONSTANTS:
             return CONSTANTS[name], None
-        # if variable exists
-        # look for it in context
-        cur_context = self.context
-        while cur_context:
-            # if variable exists in this context, return it
-            if name in cur_context.variable_cache:
-                return cur_context.variable_cache[name], None
-            cur_context = cur_context.parent
-        # otherwise variable was not found
-        return None, RuntimeError('Variable ' + name + ' not found')
+        # otherwise name refers to a variable
+        return Token(TT_VARIABLE, name), None
     def make_operator(self):
         "Parses a complex operator from the current value pointed to"
         operator = ''
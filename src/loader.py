@@ -0,0 +1,13 @@
+def read_lines(stream):
+    """
+    Yields the lines of a text stream without their line endings,
+    the same lines as str.split('\n') without reading the whole stream.
+    """
+    for line in stream:
+        if not line.endswith('\n'):
+            # last line of a stream without a trailing newline
+            yield line
+            return
+        yield line[ : -1]
+    # the stream ended with a newline, so the last line is empty
+    yield ''
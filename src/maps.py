@@ -0,0 +1,109 @@
+from basic import *
+
+# Map built-in functions
+# maps are persistent hash maps, so like arrays every update returns a new map
+
+MAP_FUNCTIONS = [
+    FUNCTION_MAPOF,
+    FUNCTION_GET,
+    FUNCTION_PUT,
+    FUNCTION_REMOVE,
+    FUNCTION_HASKEY,
+    FUNCTION_KEYS
+]
+
+def call_map(function, args):
+    """Calls a built-in function working on maps"""
+    if function == FUNCTION_MAPOF:
+        return map_of(args)
+    if function == FUNCTION_GET:
+        return get(args)
+    if function == FUNCTION_PUT:
+        return put(args)
+    if function == FUNCTION_REMOVE:
+        return remove(args)
+    if function == FUNCTION_HASKEY:
+        return has_key(args)
+    return keys(args)
+
+def check_key(token):
+    """Returns an error if token cannot be a key of a map"""
+    if not is_key(token):
+        return IllegalArgumentError('Unsupported key type ' + type_name(token.type))
+    return None
+
+def map_of(args):
+    """Returns a map of keys and values"""
+    # takes parameters [key, value...]
+    if len(args) % 2 != 0:
+        return None, SyntaxError('Too many or too little arguments')
+    for key in args[0 : : 2]:
+        error = check_key(key)
+        if error is not None:
+            return None, error
+    return Token(TT_MAP, make_map(zip(args[0 : : 2], args[1 : : 2]))), None
+
+def get(args):
+    """Returns the value of a key, or a default value if it is given and the map does not hold the key"""
+    # takes parameters [map, key] or [map, key, default]
+    if len(args) not in (2, 3):
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_MAP:
+        return None, IllegalArgumentError('Unsupported argument types')
+    error = check_key(args[1])
+    if error is not None:
+        return None, error
+    value = args[0].value.get(args[1])
+    if value is not None:
+        return value, None
+    if len(args) == 3:
+        return args[2], None
+    return None, MissingKeyError('Key ' + str(args[1]) + ' not in map')
+
+def put(args):
+    """Returns a map with a key set to a value"""
+    # takes parameters [map, key, any]
+    if len(args) != 3:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_MAP:
+        return None, IllegalArgumentError('Unsupported argument types')
+    error = check_key(args[1])
+    if error is not None:
+        return None, error
+    return Token(TT_MAP, args[0].value.set(args[1], args[2])), None
+
+def remove(args):
+    """Returns a map without a key"""
+    # takes parameters [map, key]
+    if len(args) != 2:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_MAP:
+        return None, IllegalArgumentError('Unsupported argument types')
+    error = check_key(args[1])
+    if error is not None:
+        return None, error
+    result = args[0].value.remove(args[1])
+    if result is args[0].value:
+        return None, MissingKeyError('Key ' + str(args[1]) + ' not in map')
+    return Token(TT_MAP, result), None
+
+def has_key(args):
+    """Returns TRUE if a map holds a key"""
+    # takes parameters [map, any]
+    if len(args) != 2:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_MAP:
+        return None, IllegalArgumentError('Unsupported argument types')
+    # values that cannot be keys are never in a map
+    if not is_key(args[1]):
+        return CONSTANTS['FALSE'], None
+    return make_bool(args[0].value.get(args[1]) is not None), None
+
+def keys(args):
+    """Returns an array of the keys of a map"""
+    # takes parameter [map]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_MAP:
+        return None, IllegalArgumentError('Unsupported argument types')
+    return Token(TT_ARRAY, make_vector(list(args[0].value.keys()))), None
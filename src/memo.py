@@ -0,0 +1,156 @@
+from collections import OrderedDict
+
+from basic import *
+from expression_parser import *
+
+# Memoization
+# a function is pure if it only uses its own variables, has no side effects
+# and only calls pure functions, so calling it again with the same arguments
+# returns the same value and its value can be reused
+
+# built-in functions that read input, write output or start and wait for tasks
+# functions running in workers cannot start tasks of their own
+IMPURE_BUILTINS = (FUNCTION_PUTCHAR, FUNCTION_INPUT, FUNCTION_PRINT, FUNCTION_SPAWN, FUNCTION_AWAIT, FUNCTION_PARMAP, FUNCTION_PARREDUCE)
+
+def add_names(node, names):
+    """Adds the names of the variables read by an expression tree to names"""
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, VariableNode):
+            names.append(node.name)
+        elif isinstance(node, UnaryNode):
+            nodes.append(node.operand)
+        elif isinstance(node, BinaryNode):
+            nodes.append(node.left)
+            nodes.append(node.right)
+        elif isinstance(node, SequenceNode):
+            nodes.extend(node.nodes)
+
+def scan_function(function):
+    """
+    Returns the names of the functions called by a function,
+    or None if the function has side effects or uses variables it does not declare.
+    """
+    scopes = [set(function.args)] # variables declared by the function, one set for each nested block
+    called = set()
+    for instruction in function.code:
+        opcode = instruction.opcode
+        args = instruction.args
+        names = [] # variables read or written by the instruction
+        if opcode == OP_IMPORT or opcode == OP_SAY or opcode == OP_EXIT:
+            return None
+        elif opcode == OP_DECLARE:
+            scopes[-1].add(args[0])
+        elif opcode == OP_ASSIGN:
+            names.append(args[0])
+            add_names(args[1], names)
+        elif opcode == OP_CHECK_TRUE:
+            add_names(args[0], names)
+            scopes.append(set())
+        elif opcode == OP_IF_END or opcode == OP_WHILE_END:
+            scopes.pop()
+        elif opcode == OP_RETURN:
+            add_names(args[0], names)
+        elif opcode == OP_CALL or opcode == OP_CALL_VALUE:
+            site = args[-1]
+            if site.name in IMPURE_BUILTINS:
+                return None
+            if not site.builtin:
+                called.add(site.name)
+            if opcode == OP_CALL_VALUE:
+                names.append(args[0])
+            for arg in site.args:
+                add_names(arg, names)
+        elif opcode == OP_CAST:
+            names.append(args[0])
+        # other variables are global and can be changed by other functions
+        for name in names:
+            if not any([name in scope for scope in scopes]):
+                return None
+    return called
+
+class Purity:
+    """Finds the pure functions of a program, scanning every function once"""
+    def __init__(self):
+        self.scans = dict() # function -> result of scan_function
+        self.purity = dict() # function -> true if the function is pure
+    def scan(self, function):
+        """Scans a function once"""
+        if function not in self.scans:
+            self.scans[function] = scan_function(function)
+        return self.scans[function]
+    def is_pure(self, function, context):
+        """
+        Returns true if a function and every function it can call are pure,
+        false if one of them is not, and None if one of them is not defined yet.
+        Functions called by functions are looked up in context.
+        """
+        pure = self.purity.get(function)
+        if pure is None:
+            functions, error = self.find_callees(function, context)
+            if error is not None:
+                return None
+            # functions cannot be redefined, so only results with every callee defined are final
+            pure = functions is not None
+            self.purity[function] = pure
+        return pure
+    def find_callees(self, function, context):
+        """
+        Returns a function and every function it can call, or None if one of them is not pure or not defined,
+        and the error of looking up a called function that is not defined yet, since the result can still change.
+        """
+        found = {function}
+        functions = [function]
+        while functions:
+            called = self.scan(functions.pop())
+            if called is None:
+                return None, None
+            for name in called:
+                callee, error = context.get_function(name)
+                # the callee may still be defined later, for example by an import
+                if error is not None:
+                    return None, error
+                if self.purity.get(callee) is False:
+                    return None, None
+                if callee not in found:
+                    found.add(callee)
+                    functions.append(callee)
+        return found, None
+
+class Memo:
+    """
+    Stores the values returned by calls of pure functions.
+    Holds at most size values and forgets the least recently used value first.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.values = OrderedDict() # (function, argument values) -> value, least recently used first
+        self.purity = Purity()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def make_key(self, function, args, context):
+        """Returns the key of a call of a function with a list of values, or None if its value cannot be stored"""
+        if not self.purity.is_pure(function, context):
+            return None
+        for arg in args:
+            if not is_key(arg):
+                return None
+        return (function, tuple(args))
+    def get(self, key):
+        """Returns the value stored for a call, or None if there is none"""
+        value = self.values.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.values.move_to_end(key)
+        return value
+    def put(self, key, value):
+        """Stores the value of a call, forgetting the least recently used value if the memo is full"""
+        self.values[key] = value
+        self.values.move_to_end(key)
+        if len(self.values) > self.size:
+            self.values.popitem(last=False)
+            self.evictions += 1
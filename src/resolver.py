@@ -0,0 +1,69 @@
+from basic import *
+
+def find_global_names(intro_code):
+    """
+    Returns the names of every variable the intro block can declare in the global context.
+    Returns None if they are unknown because the intro block imports files.
+    """
+    names = set()
+    if intro_code is None:
+        return names
+    for instruction in intro_code:
+        if instruction.opcode == OP_IMPORT:
+            return None
+        if instruction.opcode == OP_DECLARE:
+            names.add(instruction.args[0])
+    return names
+
+class Resolver:
+    """
+    Assigns the variables of a function or block to the slots of a fixed-size frame.
+    Blocks nested in a function share its frame, so a variable is addressed by its slot
+    for as long as the block declaring it is running.
+    Variables declared outside of the function are looked up in the context.
+    """
+    def __init__(self, instructions, dynamic=False, global_names=None):
+        # imports add variables and functions to the context at runtime
+        # so blocks that import files look up every name in their context
+        # as do blocks whose variables are used after they end
+        self.dynamic = dynamic or any([instruction.opcode == OP_IMPORT for instruction in instructions])
+        self.global_names = global_names
+        self.scopes = [dict()] # variable name -> slot, one for each nested block
+        self.slot_count = 0
+    def add_params(self, params):
+        """Returns the slots of the parameters of a function"""
+        # each argument gets its own slot in case of duplicate names
+        slots = []
+        for param in params:
+            slots.append(self.slot_count)
+            if not self.dynamic:
+                self.scopes[-1][param] = self.slot_count
+            self.slot_count += 1
+        return slots
+    def enter_block(self):
+        """Starts a nested block"""
+        self.scopes.append(dict())
+    def exit_block(self):
+        """Ends a nested block and frees the names declared in it"""
+        self.scopes.pop()
+    def resolve(self, name):
+        """Returns the slot of a variable or None if it must be looked up in the context"""
+        if self.dynamic:
+            return None
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+    def declare(self, name):
+        """
+        Returns the slot of a new variable.
+        Returns None if the variable already exists in the frame.
+        """
+        if self.resolve(name) is not None:
+            return None
+        self.scopes[-1][name] = self.slot_count
+        self.slot_count += 1
+        return self.slot_count - 1
+    def is_global(self, name):
+        """Returns true if a variable not in the frame could exist in the context"""
+        return self.global_names is None or name in self.global_names
@@ -1,3 +1,4 @@
+import argparse
 import os
 import re
 import sys
@@ -5,6 +6,11 @@ import traceback
 from enum import Enum
 
 import interpreter
+import loader
+import memo
+import tasks
+import transpiler
+import vm
 
 class ShellColors(Enum):
     COLOR_RED = '\033[91m'
@@ -27,14 +33,26 @@ INTERRUPTED = ShellColors.in_color(INTERRUPTED_MSG, ShellColors.COLOR_RED)
 FILE_NOT_EXIST = ShellColors.in_color(FILE_NOT_EXIST_MSG, ShellColors.COLOR_RED)
 CONSOLE = ShellColors.in_color(CONSOLE_MSG, ShellColors.COLOR_GREEN)
 
+# classes that can execute a program
+ENGINES = {
+    'tree': interpreter.Interpreter,
+    'vm': vm.VirtualMachine,
+    'py': transpiler.TranspiledInterpreter
+}
+
 class Shell:
-    def __init__(self):
+    def __init__(self, engine=vm.VirtualMachine, max_depth=interpreter.MAX_CALL_DEPTH, memo_size=0,
+                 parallel_threshold=tasks.PARALLEL_THRESHOLD):
         self.code = []
         self.in_editor = False
         self.line = 1
+        self.engine = engine
+        self.max_depth = max_depth
+        self.memo_size = memo_size
+        self.parallel_threshold = parallel_threshold
     def loop(self):
         """Launches the shell"""
-        os.system("cls") # windows workaround to fix color formatting bug
+        clear_screen()
         while True:
             # if currently editing code
             if self.in_editor:
@@ -56,7 +74,10 @@ class Shell:
                 self.in_editor = True
             elif text == 'run':
                 try:
-                    inter = interpreter.Interpreter('EDITOR', self.code)
+                    inter = self.engine('EDITOR', self.code)
+                    inter.max_depth = self.max_depth
+                    inter.parallel_threshold = self.parallel_threshold
+                    inter.memo = make_memo(self.memo_size)
                     error = inter.parse()
                     if error is not None:
                         err_str = error.as_string()
@@ -120,20 +141,55 @@ class Shell:
         length = len(linestr)
         return ' ' * (3 - length) + str(linestr)
 
+def clear_screen():
+    """Clears the console on Windows, where this also makes colors work"""
+    if os.name == 'nt':
+        os.system('cls') # windows workaround to fix color formatting bug
+
+def make_memo(size):
+    """Returns a memo holding the values of up to size calls, or None if size is 0"""
+    if size > 0:
+        return memo.Memo(size)
+    return None
+
+def print_stats(inter):
+    """Prints the profiling counters of the program that was executed"""
+    print('Contexts allocated: ' + str(interpreter.Context.allocations), file=sys.stderr)
+    if inter is not None and inter.memo is not None:
+        calls = inter.memo
+        print('Memo hits: ' + str(calls.hits), file=sys.stderr)
+        print('Memo misses: ' + str(calls.misses), file=sys.stderr)
+        print('Memo evictions: ' + str(calls.evictions), file=sys.stderr)
+        print('Memo size: ' + str(len(calls.values)) + ' of ' + str(calls.size), file=sys.stderr)
+
 # only execute if shell.py was executed
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        shell = Shell()
+    arg_parser = argparse.ArgumentParser(description='Rickroll interpreter')
+    arg_parser.add_argument('file', nargs='?', help='program to execute, opens the editor if omitted')
+    arg_parser.add_argument('--engine', choices=ENGINES, default='vm', help='engine used to execute programs')
+    arg_parser.add_argument('--max-depth', type=int, default=interpreter.MAX_CALL_DEPTH, help='maximum depth of function calls')
+    arg_parser.add_argument('--memo', type=int, default=0, metavar='SIZE', help='reuse the values of up to SIZE calls of pure functions')
+    arg_parser.add_argument('--parallel-threshold', type=int, default=tasks.PARALLEL_THRESHOLD, metavar='SIZE',
+                            help='map and reduce arrays of at least SIZE elements in parallel')
+    arg_parser.add_argument('--stats', action='store_true', help='print profiling counters after executing a file')
+    options = arg_parser.parse_args()
+    engine = ENGINES[options.engine]
+    if options.file is None:
+        shell = Shell(engine, options.max_depth, options.memo, options.parallel_threshold)
         shell.loop()
     else:
-        os.system("cls") # windows workaround to fix color formatting bug
+        clear_screen()
         # get file name and check if it exists
-        file_name = sys.argv[1]
+        file_name = options.file
         if os.path.isfile(file_name):
             with open(file_name, 'r') as f:
-                src = f.read().split('\n')
+                inter = None
                 try:
-                    inter = interpreter.Interpreter(os.path.basename(file_name), src)
+                    # lines are read as the program is parsed
+                    inter = engine(os.path.basename(file_name), loader.read_lines(f), file_name)
+                    inter.max_depth = options.max_depth
+                    inter.parallel_threshold = options.parallel_threshold
+                    inter.memo = make_memo(options.memo)
                     error = inter.parse()
                     if error is not None:
                         print(ShellColors.in_color(error.as_string(), ShellColors.COLOR_RED))
@@ -146,5 +202,7 @@ if __name__ == '__main__':
                 except BaseException:
                     print(INTERNAL_ERROR)
                     print(traceback.format_exc())
+                if options.stats:
+                    print_stats(inter)
         else:
             print(FILE_NOT_EXIST)
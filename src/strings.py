@@ -0,0 +1,194 @@
+import re
+import sys
+
+import bulk
+from basic import *
+
+# String built-in functions
+# strings are arrays of CHARs, which are stored in a Python string when every char is a single character
+# so these functions work on the Python string directly
+
+# numbers accepted by _toint and _tofloat, surrounding whitespace is ignored
+INT_TEXT = re.compile("^\\s*[+-]?\\d+\\s*$", re.ASCII)
+FLOAT_TEXT = re.compile("^\\s*[+-]?(\\d+(\\.\\d*)?|\\.\\d+)([eE][+-]?\\d+)?\\s*$", re.ASCII)
+
+STRING_FUNCTIONS = [
+    FUNCTION_CONCAT,
+    FUNCTION_INDEXOF,
+    FUNCTION_SPLIT,
+    FUNCTION_JOIN,
+    FUNCTION_TOINT,
+    FUNCTION_TOFLOAT,
+    FUNCTION_TOSTRING,
+    FUNCTION_PRINT
+]
+
+def call_string(function, args):
+    """Calls a built-in function working on strings"""
+    if function == FUNCTION_CONCAT:
+        return concat(args)
+    if function == FUNCTION_INDEXOF:
+        return index_of(args)
+    if function == FUNCTION_SPLIT:
+        return split(args)
+    if function == FUNCTION_JOIN:
+        return join(args)
+    if function == FUNCTION_TOINT:
+        return to_number(args, INT_TEXT, int, TT_INT)
+    if function == FUNCTION_TOFLOAT:
+        return to_number(args, FLOAT_TEXT, float, TT_FLOAT)
+    if function == FUNCTION_TOSTRING:
+        return to_string(args)
+    return print_string(args)
+
+def get_text(token):
+    """
+    Returns the Python string of a CHAR array or a CHAR, or None if token is neither.
+    The empty char '' would be lost in a Python string, so arrays holding it are not text.
+    """
+    if token.type == TT_CHAR:
+        return token.value if token.value != '' else None
+    if token.type != TT_ARRAY:
+        return None
+    vector = token.value
+    if vector.storage.element_type == TT_CHAR:
+        return ''.join(vector.leaves())
+    # arrays of CHARs containing the empty char '' are stored as tokens
+    if not all([element.type == TT_CHAR and element.value != '' for element in vector]):
+        return None
+    return ''.join([element.value for element in vector])
+
+def get_chars(token):
+    """Returns the list of the chars of a CHAR array or a CHAR, including empty chars, or None if token is neither"""
+    if token.type == TT_CHAR:
+        return [token.value]
+    if token.type != TT_ARRAY:
+        return None
+    vector = token.value
+    if vector.storage.element_type == TT_CHAR:
+        return list(''.join(vector.leaves()))
+    if not all([element.type == TT_CHAR for element in vector]):
+        return None
+    return [element.value for element in vector]
+
+def get_joined_text(token):
+    """Returns the Python string of a CHAR array or a CHAR without its empty chars, or None if token is neither"""
+    chars = get_chars(token)
+    return None if chars is None else ''.join(chars)
+
+def find_chars(chars, part, start):
+    """Returns the index of the first occurrence of a list of chars in another from start, or -1 if there is none"""
+    for index in range(start, len(chars) - len(part) + 1):
+        if chars[index : index + len(part)] == part:
+            return index
+    return -1
+
+def make_text(text):
+    """Returns a CHAR array of a Python string"""
+    if len(text) == 0:
+        return CONSTANTS['ARRAY']
+    return Token(TT_ARRAY, build_vector(text, TYPED_STORAGES[TT_CHAR]))
+
+def concat(args):
+    """Returns the elements of every array one after another"""
+    # takes parameters [array...]
+    if len(args) == 0:
+        return None, SyntaxError('Too many or too little arguments')
+    if not all([arg.type == TT_ARRAY for arg in args]):
+        return None, IllegalArgumentError('Unsupported argument types')
+    texts = [get_text(arg) for arg in args]
+    if None not in texts:
+        # joining the strings is faster than appending chars one at a time
+        return make_text(''.join(texts)), None
+    elements = []
+    for arg in args:
+        elements.extend(arg.value)
+    return Token(TT_ARRAY, make_vector(elements)), None
+
+def index_of(args):
+    """
+    Returns the index of the first occurrence of a string in another string, or -1 if there is none.
+    Other arrays are searched for the first element equal to a value.
+    """
+    # takes parameters [array, any] or [array, any, startIndex]
+    if len(args) not in (2, 3):
+        return None, SyntaxError('Too many or too little arguments')
+    if args[0].type != TT_ARRAY or (len(args) == 3 and args[2].type != TT_INT):
+        return None, IllegalArgumentError('Unsupported argument types')
+    start = args[2].value if len(args) == 3 else 0
+    if start < 0 or start > len(args[0].value):
+        return None, IndexOutOfBoundsError('Array index ' + str(start) + ' out of bounds')
+    text = get_text(args[0])
+    part = get_text(args[1])
+    if text is not None and part is not None:
+        return make_int(text.find(part, start)), None
+    # strings holding empty chars are searched char by char
+    chars = get_chars(args[0])
+    part = get_chars(args[1])
+    if chars is not None and part is not None:
+        return make_int(find_chars(chars, part, start)), None
+    return make_int(bulk.find_element(args[0].value, args[1], start)), None
+
+def split(args):
+    """Returns an array of the parts of a string between every occurrence of a separator"""
+    # takes parameters [string, string or char]
+    if len(args) != 2:
+        return None, SyntaxError('Too many or too little arguments')
+    text = get_joined_text(args[0]) if args[0].type == TT_ARRAY else None
+    separator = get_joined_text(args[1])
+    if text is None or separator is None:
+        return None, IllegalArgumentError('Unsupported argument types')
+    if len(separator) == 0:
+        return None, IllegalArgumentError('Separator cannot be empty')
+    return Token(TT_ARRAY, make_vector([make_text(part) for part in text.split(separator)])), None
+
+def join(args):
+    """Returns a string of every string in an array with a separator between them"""
+    # takes parameters [array of strings, string or char]
+    if len(args) != 2:
+        return None, SyntaxError('Too many or too little arguments')
+    separator = get_joined_text(args[1])
+    if args[0].type != TT_ARRAY or separator is None:
+        return None, IllegalArgumentError('Unsupported argument types')
+    parts = [get_joined_text(element) if element.type == TT_ARRAY else None for element in args[0].value]
+    if None in parts:
+        return None, IllegalArgumentError('Unsupported argument types')
+    return make_text(separator.join(parts)), None
+
+def to_number(args, pattern, convert, number_type):
+    """Returns the number written in a string"""
+    # takes parameter [string]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    text = get_joined_text(args[0]) if args[0].type == TT_ARRAY else None
+    if text is None:
+        return None, IllegalArgumentError('Unsupported argument types')
+    error = IllegalArgumentError('Not a valid ' + type_name(number_type) + ': ' + text.strip())
+    if not pattern.match(text):
+        return None, error
+    try:
+        value = convert(text)
+    except ValueError:
+        # Python limits the number of digits converted into an int
+        return None, error
+    if number_type == TT_INT:
+        return make_int(value), None
+    return Token(number_type, value), None
+
+def to_string(args):
+    """Returns a string of a value as it would be printed"""
+    # takes parameter [any]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    return make_text(str(args[0])), None
+
+def print_string(args):
+    """Writes a string to stdout"""
+    # takes parameter [string]
+    if len(args) != 1:
+        return None, SyntaxError('Too many or too little arguments')
+    text = get_joined_text(args[0]) if args[0].type == TT_ARRAY else None
+    if text is None:
+        return None, IllegalArgumentError('Unsupported argument types')
+    sys.stdout.write(text)
+    return CONSTANTS['UNDEFINED'], None
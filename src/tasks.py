@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import strings
+from basic import *
+from memo import Purity
+
+# Task built-in functions
+# _spawn starts a call of a pure function in another process and returns an INT handle of the task
+# and _await waits for the task and returns the value of the call
+# _parmap calls a pure function with every element of an array and returns the array of its values
+# and _parreduce folds an array with a pure function of two arguments, which must be associative
+# the arrays are split into chunks and every chunk is a task
+# pure functions have no side effects, so running them in any order gives the same output
+
+TASK_FUNCTIONS = [
+    FUNCTION_SPAWN,
+    FUNCTION_AWAIT,
+    FUNCTION_PARMAP,
+    FUNCTION_PARREDUCE
+]
+
+# workers are started instead of forked, since transpiled programs run in a thread
+START_METHOD = 'spawn'
+# arrays shorter than this are mapped and reduced in the process of the program
+# since starting the workers and sending the elements costs more than the calls
+PARALLEL_THRESHOLD = 10000
+# arrays are split into this many chunks for every worker, so that workers finishing early get more
+CHUNKS_PER_WORKER = 4
+
+def call_task(inter, function, args):
+    """Calls a built-in function working on the tasks of the program run by inter"""
+    if inter.tasks is None:
+        inter.tasks = TaskPool(inter)
+    if function == FUNCTION_SPAWN:
+        return inter.tasks.spawn(args)
+    elif function == FUNCTION_AWAIT:
+        return inter.tasks.wait(args)
+    elif function == FUNCTION_PARMAP:
+        return inter.tasks.map(args)
+    return inter.tasks.reduce(args)
+
+def map_values(inter, function, values):
+    """Calls a function with every value and returns the list of its values or the first error"""
+    results = []
+    for value in values:
+        result, error = inter.call_function(function, [value])
+        if error is not None:
+            return None, error
+        results.append(result)
+    return results, None
+
+def reduce_values(inter, function, value, values):
+    """Folds values into value with a function of two arguments, from the first value to the last"""
+    for element in values:
+        value, error = inter.call_function(function, [value, element])
+        if error is not None:
+            return None, error
+    return value, None
+
+class TaskPool:
+    """
+    The processes running the functions spawned by a program.
+    A function is sent to a worker with every function it can call, pickled once,
+    and every worker keeps them so that they are only loaded and compiled once.
+    """
+    def __init__(self, inter):
+        self.inter = inter
+        self.executor = None # made by the first task
+        self.workers = os.cpu_count() or 1
+        self.purity = Purity()
+        self.programs = dict() # function -> pickled functions it can call
+        self.tasks = dict() # handle -> future of a task not awaited yet
+        self.next_handle = 0
+    def find_function(self, token, arg_count):
+        """Returns the pure function named by a string that takes arg_count arguments"""
+        name = strings.get_text(token)
+        if name is None:
+            return None, IllegalArgumentError('Unsupported argument types')
+        context = self.inter.global_context
+        function, error = context.get_function(name)
+        if error is not None:
+            return None, error
+        if len(function.args) != arg_count:
+            return None, SyntaxError('Too many or too little arguments')
+        if function not in self.programs:
+            functions, error = self.purity.find_callees(function, context)
+            if error is not None:
+                return None, error
+            if functions is None:
+                return None, IllegalArgumentError('Function ' + name + ' is not pure')
+            self.programs[function] = pickle.dumps(list(functions), pickle.HIGHEST_PROTOCOL)
+        return function, None
+    def submit(self, worker_function, function, values):
+        """Starts a task calling worker_function in a worker with a pure function and values"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(START_METHOD))
+        program = self.programs[function]
+        return self.executor.submit(worker_function, type(self.inter), self.inter.max_depth, function.name, program, values)
+    def split(self, vector):
+        """Splits a vector into chunks, in order"""
+        size = -(-len(vector) // (self.workers * CHUNKS_PER_WORKER))
+        return [vector.subvector(start, min(start + size, len(vector))) for start in range(0, len(vector), size)]
+    def run_chunks(self, worker_function, function, vector):
+        """Calls worker_function with every chunk of a vector and returns the list of their values or the first error"""
+        futures = [self.submit(worker_function, function, chunk) for chunk in self.split(vector)]
+        results = []
+        for future in futures:
+            # errors of chunks are returned with the tracebacks of the worker
+            result, error = future.result()
+            if error is not None:
+                # chunks that have not started are not run
+                for pending in futures:
+                    pending.cancel()
+                return None, error
+            results.append(result)
+        return results, None
+    def spawn(self, args):
+        """Starts a task calling a function with arguments and returns its handle"""
+        # takes parameters [name, any...]
+        if len(args) == 0:
+            return None, SyntaxError('Too many or too little arguments')
+        function, error = self.find_function(args[0], len(args) - 1)
+        if error is not None:
+            return None, error
+        future = self.submit(run_task, function, args[1 : ])
+        handle = self.next_handle
+        self.next_handle += 1
+        self.tasks[handle] = future
+        return make_int(handle), None
+    def wait(self, args):
+        """Waits for a task and returns the value of its call"""
+        # takes parameter [handle]
+        if len(args) != 1:
+            return None, SyntaxError('Too many or too little arguments')
+        if args[0].type != TT_INT:
+            return None, IllegalArgumentError('Unsupported argument types')
+        # every task is awaited once
+        future = self.tasks.pop(args[0].value, None)
+        if future is None:
+            return None, IllegalArgumentError('No task with handle ' + str(args[0].value))
+        # errors of the call are returned with the tracebacks of the worker
+        return future.result()
+    def map(self, args):
+        """Calls a function with every element of an array and returns the array of its values"""
+        # takes parameters [name, array]
+        if len(args) != 2:
+            return None, SyntaxError('Too many or too little arguments')
+        if args[1].type != TT_ARRAY:
+            return None, IllegalArgumentError('Unsupported argument types')
+        function, error = self.find_function(args[0], 1)
+        if error is not None:
+            return None, error
+        vector = args[1].value
+        # empty arrays have no chunks to split
+        if len(vector) == 0 or len(vector) < self.inter.parallel_threshold:
+            values, error = map_values(self.inter, function, vector)
+        else:
+            chunks, error = self.run_chunks(run_map, function, vector)
+            values = None if error is not None else [value for chunk in chunks for value in chunk]
+        if error is not None:
+            return None, error
+        return Token(TT_ARRAY, make_vector(values)), None
+    def reduce(self, args):
+        """Folds the elements of an array into an initial value with a function of two arguments"""
+        # takes parameters [name, array, any]
+        if len(args) != 3:
+            return None, SyntaxError('Too many or too little arguments')
+        if args[1].type != TT_ARRAY:
+            return None, IllegalArgumentError('Unsupported argument types')
+        function, error = self.find_function(args[0], 2)
+        if error is not None:
+            return None, error
+        vector = args[1].value
+        # empty arrays have no chunks to split
+        if len(vector) == 0 or len(vector) < self.inter.parallel_threshold:
+            return reduce_values(self.inter, function, args[2], vector)
+        # the function is associative, so the values of the chunks are folded in order
+        values, error = self.run_chunks(run_reduce, function, vector)
+        if error is not None:
+            return None, error
+        return reduce_values(self.inter, function, args[2], values)
+    def close(self):
+        """Waits for the tasks that were not awaited and stops the workers"""
+        if self.executor is not None:
+            self.executor.shutdown()
+
+# interpreters of a worker holding the functions a spawned function can call
+# name of the spawned function -> interpreter
+worker_interpreters = dict()
+
+def load_program(engine, max_depth, name, program):
+    """Returns the interpreter of a worker holding the functions a function can call"""
+    inter = worker_interpreters.get(name)
+    if inter is None:
+        inter = engine(name)
+        inter.max_depth = max_depth
+        # pure functions do not use global variables
+        inter.global_names = set()
+        for function in pickle.loads(program):
+            inter.global_context.unsafe_set_function(function)
+        worker_interpreters[name] = inter
+    return inter
+
+def run_task(engine, max_depth, name, program, args):
+    """Calls a spawned function in a worker and returns its (value, error) tuple"""
+    inter = load_program(engine, max_depth, name, program)
+    return inter.call_function(inter.global_context.function_cache[name], args)
+
+def run_map(engine, max_depth, name, program, values):
+    """Calls a function with every value of a chunk in a worker and returns the list of its values"""
+    inter = load_program(engine, max_depth, name, program)
+    return map_values(inter, inter.global_context.function_cache[name], values)
+
+def run_reduce(engine, max_depth, name, program, values):
+    """Folds a chunk from its first value in a worker"""
+    inter = load_program(engine, max_depth, name, program)
+    values = iter(values)
+    return reduce_values(inter, inter.global_context.function_cache[name], next(values), values)
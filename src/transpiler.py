@@ -0,0 +1,625 @@
+import builtins
+import sys
+import threading
+
+from basic import *
+from compiler import *
+from expression_parser import *
+from interpreter import *
+from resolver import *
+
+# raised by transpiled code instead of returning (value, error) tuples
+class RickrollException(Exception):
+    def __init__(self, error, raw=False):
+        super().__init__(error)
+        self.error = error
+        # raw errors are not wrapped in a traceback for the line that raised them
+        self.raw = raw
+
+# returned by a function whose value is the value of the function it calls last
+# so that the function is called after the caller has returned instead of inside it
+class TailCall:
+    __slots__ = ('function', 'args')
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+
+# Python frames used by every call between transpiled functions
+PYTHON_FRAMES_PER_CALL = 2
+# bytes of stack used by every call, with room to spare for built-ins calling functions
+# a call measured about 384 bytes on CPython 3.11, which runs most Python frames off the C stack
+# older versions run every Python frame on the C stack and need many times more
+STACK_PER_CALL = 1 << 10 if sys.version_info >= (3, 11) else 1 << 13
+# stack of the thread running transpiled code
+MIN_STACK_SIZE = 1 << 24
+MAX_STACK_SIZE = 1 << 30
+# deepest calls that fit in the largest stack, deeper calls stop with an error even if max_depth is larger
+MAX_STACK_DEPTH = MAX_STACK_SIZE // STACK_PER_CALL
+
+def operate(operator, *args):
+    """Applies an operator (token type) with the same semantics as the other engines"""
+    if len(args) == 1:
+        res, error = unary_operation(operator, args[0])
+    else:
+        res, error = binary_operation(operator, args[0], args[1])
+    if error is not None:
+        raise RickrollException(error)
+    return res
+
+# operators with a fast path for integers
+# other operand types fall back to the operation tables
+
+def add(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_int(left.value + right.value)
+    return operate(TT_ADD, left, right)
+
+def subtract(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_int(left.value - right.value)
+    return operate(TT_SUBTRACT, left, right)
+
+def multiply(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_int(left.value * right.value)
+    return operate(TT_MULTIPLY, left, right)
+
+def divide(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_int(left.value // right.value)
+    return operate(TT_DIVIDE, left, right)
+
+def modulo(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_int(left.value % right.value)
+    return operate(TT_MODULO, left, right)
+
+def greater(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_bool(left.value > right.value)
+    return operate(TT_GREATER, left, right)
+
+def less(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_bool(left.value < right.value)
+    return operate(TT_LESS, left, right)
+
+def greater_equals(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_bool(left.value >= right.value)
+    return operate(TT_GREATER_EQUALS, left, right)
+
+def less_equals(left, right):
+    if left.type == TT_INT and right.type == TT_INT:
+        return make_bool(left.value <= right.value)
+    return operate(TT_LESS_EQUALS, left, right)
+
+def equals(left, right):
+    if left.type == right.type:
+        return make_bool(left.value == right.value)
+    return operate(TT_EQUALS, left, right)
+
+# operator -> name of the function applying it in transpiled code
+OPERATOR_FUNCTIONS = {
+    TT_ADD: '_add',
+    TT_SUBTRACT: '_subtract',
+    TT_MULTIPLY: '_multiply',
+    TT_DIVIDE: '_divide',
+    TT_MODULO: '_modulo',
+    TT_GREATER: '_greater',
+    TT_LESS: '_less',
+    TT_GREATER_EQUALS: '_greater_equals',
+    TT_LESS_EQUALS: '_less_equals',
+    TT_EQUALS: '_equals'
+}
+
+class Transpiler:
+    """
+    Generates the Python source of a function or block from its instructions.
+    Variables resolved to a slot are stored in Python locals,
+    and every generated line is mapped back to the line of its statement.
+    """
+    def __init__(self, instructions, file, dynamic=False, global_names=None):
+        self.instructions = instructions
+        self.file = file
+        self.source = []
+        self.line_table = [None] # statement line of each generated line, Python lines start at 1
+        self.constants = [] # values referenced by the generated code
+        self.resolver = Resolver(instructions, dynamic, global_names)
+        self.dynamic = self.resolver.dynamic
+    def make_source(self, params=None):
+        """
+        Generates a Python function running the instructions.
+        Blocks take the context they run in and functions take their arguments.
+        Returns the source and the line table.
+        """
+        self.is_function = params is not None
+        if params is None:
+            self.emit(0, 'def block(ctx):', None)
+        else:
+            arg_names = [self.make_local(slot) for slot in self.resolver.add_params(params)]
+            self.emit(0, 'def function(' + ', '.join(arg_names) + '):', None)
+            if self.dynamic:
+                self.emit(1, 'ctx = Context(_G)', None)
+                for (param, arg_name) in zip(params, arg_names):
+                    self.emit(1, 'ctx.unsafe_set_var(' + repr(param) + ', ' + arg_name + ')', None)
+            else:
+                self.emit(1, 'ctx = _G', None)
+        # imported intro blocks run in the context the block started in
+        self.emit(1, 'base = ctx', None)
+        # contexts of nested blocks are made once and reused by every block at the same depth
+        scopes_line = len(self.source)
+        self.emit(1, 'pass', None)
+        self.scope_count = 0
+        self.emit(1, 'try:', None)
+        indent = 2
+        for instruction in self.instructions:
+            indent = self.make_statement(instruction, indent)
+        if self.scope_count > 0:
+            scopes = ' = '.join(['s' + str(depth) for depth in range(self.scope_count)])
+            self.source[scopes_line] = '    ' + scopes + ' = None'
+        self.emit(2, 'return _UNDEFINED', None)
+        self.emit(1, 'except RickrollException as exc:', None)
+        self.emit(2, '_finish(exc, _LINES, _FILE)', None)
+        self.emit(2, 'raise', None)
+        return '\n'.join(self.source) + '\n', self.line_table
+    def emit(self, indent, text, line):
+        """Adds a line to the generated source"""
+        self.source.append('    ' * indent + text)
+        self.line_table.append(line)
+    def make_local(self, slot):
+        """Returns the name of the Python local of a slot"""
+        return 'v' + str(slot)
+    def make_constant(self, value):
+        """Returns the name of a new constant holding value"""
+        self.constants.append(value)
+        return '_k' + str(len(self.constants) - 1)
+    def resolve(self, name):
+        """Returns the Python local of a variable or None if it must be looked up in the context"""
+        slot = self.resolver.resolve(name)
+        if slot is None:
+            return None
+        return self.make_local(slot)
+    def make_statement(self, instruction, indent):
+        """Generates a single instruction and returns the indent of the next one"""
+        opcode = instruction.opcode
+        args = instruction.args
+        line = instruction.line
+        if opcode == OP_IMPORT:
+            self.emit(indent, '_import(base, ' + repr(args[0]) + ', ' + str(line) + ', _FILE)', line)
+        elif opcode == OP_SAY:
+            self.emit(indent, 'print(' + self.make_expression(args[0]) + ')', line)
+        elif opcode == OP_EXIT:
+            self.emit(indent, '_exit()', line)
+        elif opcode == OP_DECLARE:
+            name = args[0]
+            if self.dynamic:
+                self.emit(indent, '_declare(ctx, ' + repr(name) + ')', line)
+            else:
+                slot = self.resolver.declare(name)
+                if slot is None:
+                    error = self.make_constant(RuntimeError('Variable ' + name + ' already exists'))
+                    self.emit(indent, '_fail(' + error + ')', line)
+                elif self.resolver.is_global(name):
+                    self.emit(indent, self.make_local(slot) + ' = _check_declare(ctx, ' + repr(name) + ')', line)
+                else:
+                    self.emit(indent, self.make_local(slot) + ' = _UNDEFINED', line)
+        elif opcode == OP_ASSIGN:
+            name, expr = args
+            self.make_store(indent, name, self.make_expression(expr), line)
+        elif opcode == OP_CHECK_TRUE:
+            loop = self.instructions[instruction.jump].opcode == OP_WHILE_END
+            condition = '_truth(' + self.make_expression(args[0]) + ', ' + str(line) + ', _FILE)'
+            self.emit(indent, ('while ' if loop else 'if ') + condition + ':', line)
+            indent += 1
+            self.emit(indent, 'pass', line)
+            if self.dynamic:
+                scope = 's' + str(indent - 3) # depth of the block
+                self.scope_count = max(self.scope_count, indent - 2)
+                self.emit(indent, 'if ' + scope + ' is None:', line)
+                self.emit(indent + 1, scope + ' = Context(ctx)', line)
+                self.emit(indent, 'ctx = ' + scope, line)
+            else:
+                self.resolver.enter_block()
+        elif opcode == OP_IF_END or opcode == OP_WHILE_END:
+            if self.dynamic:
+                # forget the variables of the block so that its context can be reused
+                self.emit(indent, 'ctx.variable_cache.clear()', line)
+                self.emit(indent, 'ctx = ctx.parent', line)
+            else:
+                self.resolver.exit_block()
+            indent -= 1
+        elif opcode == OP_RETURN:
+            self.emit(indent, 'return ' + self.make_expression(args[0]), line)
+        elif opcode == OP_CALL or opcode == OP_CALL_VALUE:
+            site = args[-1]
+            values = '(' + ''.join([self.make_expression(tree) + ', ' for tree in site.args]) + ')'
+            if site.builtin:
+                res = '_builtin(' + repr(site.name) + ', ' + values + ')'
+            else:
+                self.emit(indent, '_f = _find(ctx, ' + self.make_constant(site) + ', _FILE)', line)
+                # errors in arguments belong to the function being called
+                self.emit(indent, 'try:', line)
+                self.emit(indent + 1, '_a = ' + values, line)
+                self.emit(indent, 'except RickrollException as exc:', line)
+                self.emit(indent + 1, '_argument_error(_f, _FILE, exc)', line)
+                self.emit(indent + 1, 'raise', line)
+                res = '_invoke(_f, _FILE, _a)'
+                if instruction.tail and self.is_function:
+                    # the value can only be returned for the caller if its variable exists
+                    if self.resolve(args[0]) is not None:
+                        self.emit(indent, 'return _TailCall(_f, _a)', line)
+                        return indent
+                    self.emit(indent, 'if ctx.has_var(' + repr(args[0]) + '):', line)
+                    self.emit(indent + 1, 'return _TailCall(_f, _a)', line)
+            if opcode == OP_CALL_VALUE:
+                self.make_store(indent, args[0], res, line)
+            else:
+                self.emit(indent, res, line)
+        elif opcode == OP_CAST:
+            name, to_type = args
+            local = self.resolve(name)
+            if local is not None:
+                self.emit(indent, local + ' = _cast(' + local + ', ' + repr(to_type) + ')', line)
+            else:
+                self.emit(indent, '_cast_var(ctx, ' + repr(name) + ', ' + repr(to_type) + ')', line)
+        elif opcode == OP_ERROR:
+            self.emit(indent, '_fail_raw(' + self.make_constant(args[0]) + ')', line)
+        return indent
+    def make_store(self, indent, name, value, line):
+        """Generates an assignment of value to a variable"""
+        local = self.resolve(name)
+        if local is not None:
+            self.emit(indent, local + ' = ' + value, line)
+        else:
+            self.emit(indent, '_set(ctx, ' + repr(name) + ', ' + value + ')', line)
+    def make_expression(self, node):
+        """Generates a Python expression evaluating an expression tree"""
+        # nodes are generated from a stack of work instead of recursively
+        # so that expressions nested thousands of levels deep fit in the Python stack
+        # work is a node to generate or a (node,) tuple generated from the expressions of its operands
+        work = [node]
+        values = []
+        while work:
+            node = work.pop()
+            if isinstance(node, tuple):
+                values.append(self.make_operation(node[0], values))
+            elif isinstance(node, UnaryNode):
+                work.append((node,))
+                work.append(node.operand)
+            elif isinstance(node, BinaryNode):
+                work.append((node,))
+                work.append(node.right)
+                work.append(node.left)
+            elif isinstance(node, SequenceNode):
+                work.append((node,))
+                for child in reversed(node.nodes):
+                    work.append(child)
+            else:
+                values.append(self.make_value(node))
+        return values[0]
+    def make_operation(self, node, values):
+        """Generates a Python expression for an operator node, popping the expressions of its operands"""
+        if isinstance(node, UnaryNode):
+            operand = values.pop()
+            return '_operate(' + str(node.operator.type) + ', ' + operand + ')'
+        if isinstance(node, BinaryNode):
+            right = values.pop()
+            left = values.pop()
+            if node.operator.type in OPERATOR_FUNCTIONS:
+                return OPERATOR_FUNCTIONS[node.operator.type] + '(' + left + ', ' + right + ')'
+            return '_operate(' + str(node.operator.type) + ', ' + left + ', ' + right + ')'
+        # only the value of the last node of a sequence is kept
+        children = values[len(values) - len(node.nodes) : ]
+        del values[len(values) - len(node.nodes) : ]
+        return '(' + ''.join([child + ', ' for child in children]) + ')[-1]'
+    def make_value(self, node):
+        """Generates a Python expression for a node without operands"""
+        if isinstance(node, ValueNode):
+            return self.make_constant(node.token)
+        if isinstance(node, VariableNode):
+            local = self.resolve(node.name)
+            if local is not None:
+                return local
+            if not self.dynamic and not self.resolver.is_global(node.name):
+                # the variable cannot exist when the expression runs
+                error = self.make_constant(RuntimeError('Variable ' + node.name + ' not found'))
+                return '_fail(' + error + ')'
+            return '_get(ctx, ' + repr(node.name) + ')'
+        if isinstance(node, ErrorNode):
+            return '_fail(' + self.make_constant(node.error) + ')'
+
+class TranspiledInterpreter(Interpreter):
+    """
+    Runs programs by transpiling every function and block into Python source
+    and compiling it into a Python function the first time it runs.
+    Produces the same output and errors as Interpreter.
+    """
+    def __init__(self, file, text=None, path=None):
+        super().__init__(file, text, path)
+        # names available to all transpiled code
+        self.namespace = {
+            'Context': Context,
+            'RickrollException': RickrollException,
+            '_TailCall': TailCall,
+            '_G': self.global_context,
+            '_UNDEFINED': CONSTANTS['UNDEFINED'],
+            '_exit': self.exit,
+            '_operate': operate,
+            '_add': add,
+            '_subtract': subtract,
+            '_multiply': multiply,
+            '_divide': divide,
+            '_modulo': modulo,
+            '_greater': greater,
+            '_less': less,
+            '_greater_equals': greater_equals,
+            '_less_equals': less_equals,
+            '_equals': equals,
+            '_fail': self.fail,
+            '_fail_raw': self.fail_raw,
+            '_finish': self.finish,
+            '_get': self.get,
+            '_set': self.set,
+            '_declare': self.declare,
+            '_check_declare': self.check_declare,
+            '_truth': self.truth,
+            '_cast': self.cast_value,
+            '_cast_var': self.cast_var,
+            '_find': self.find,
+            '_invoke': self.invoke,
+            '_argument_error': self.argument_error,
+            '_builtin': self.builtin,
+            '_import': self.run_import
+        }
+        self.call_depth = 0 # functions called and not returned yet
+        self.depth_limit = min(self.max_depth, MAX_STACK_DEPTH) # max_depth capped to the largest stack
+        self.in_thread = False # true while code runs in the thread made by run_in_thread
+    def run(self):
+        """Runs the stored code"""
+        try:
+            return self.run_in_thread(self.run_blocks)
+        finally:
+            self.close_tasks()
+    def call_function(self, function, args):
+        """Calls a function with a list of values outside of a program and returns its value"""
+        def call():
+            self.get_python(function)
+            try:
+                return self.invoke(function, function.file, tuple(args)), None
+            except RickrollException as exception:
+                return None, exception.error
+        # built-in functions of a running program call functions in its own thread
+        if self.in_thread:
+            return call()
+        return self.run_in_thread(call)
+    def run_in_thread(self, function):
+        """
+        Calls function and returns its value.
+        Transpiled functions call each other with Python calls, so function runs in a thread
+        whose stack and recursion limit are large enough for max_depth calls.
+        """
+        self.depth_limit = min(self.max_depth, MAX_STACK_DEPTH)
+        result = []
+        def target():
+            self.in_thread = True
+            try:
+                result.append((function(), None))
+            except BaseException as exception:
+                result.append((None, exception))
+            finally:
+                self.in_thread = False
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(recursion_limit + self.depth_limit * PYTHON_FRAMES_PER_CALL)
+        try:
+            stack_size = min(max(self.depth_limit * STACK_PER_CALL, MIN_STACK_SIZE), MAX_STACK_SIZE)
+            old_stack_size = threading.stack_size(stack_size)
+            try:
+                thread = threading.Thread(target=target, daemon=True)
+                thread.start()
+            finally:
+                threading.stack_size(old_stack_size)
+            thread.join()
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        value, exception = result[0]
+        if exception is not None:
+            raise exception
+        return value
+    def run_blocks(self):
+        """Runs the intro and chorus blocks and returns the first error"""
+        self.global_names = find_global_names(self.intro_code)
+        if self.intro_code is not None:
+            # variables of the intro block are global
+            error = self.run_block(self.intro_code, self.global_context, self.file, True)
+            if error is not None:
+                return error
+        if self.chorus_code is not None:
+            error = self.run_block(self.chorus_code, Context(self.global_context), self.file, False)
+            if error is not None:
+                return error
+    def run_block(self, code, context, file, dynamic):
+        """Runs a block of instructions in context and returns its error"""
+        try:
+            self.transpile(code, file, None, dynamic)(context)
+        except RickrollException as exception:
+            return exception.error
+    def get_python(self, function):
+        """Gets the Python function of a function, transpiling it on the first call"""
+        # Python functions use the namespace of the interpreter transpiling them
+        # so functions of files imported by several programs are transpiled for each of them
+        if getattr(function, 'python_owner', None) is not self:
+            function.python = self.transpile(function.code, function.file, function.args)
+            function.python_owner = self
+        return function.python
+    def transpile(self, code, file, params=None, dynamic=False):
+        """
+        Transpiles a list of instructions into a Python function.
+        Blocks are transpiled if params is None and functions otherwise.
+        """
+        transpiler = Transpiler(code, file, dynamic, self.global_names)
+        source, line_table = transpiler.make_source(params)
+        namespace = dict(self.namespace)
+        namespace['_FILE'] = file
+        namespace['_LINES'] = line_table
+        for index in range(len(transpiler.constants)):
+            namespace['_k' + str(index)] = transpiler.constants[index]
+        try:
+            exec(compile(source, '<' + str(file) + '>', 'exec'), namespace)
+        except (builtins.SyntaxError, RecursionError, MemoryError):
+            # code nested too deeply for Python is executed by the interpreter
+            return self.make_fallback(code, file, params)
+        return namespace['function' if params is not None else 'block']
+    def make_fallback(self, code, file, params):
+        """Makes a Python function executing instructions with Interpreter.execute"""
+        def fallback(*args):
+            if params is None:
+                context = args[0]
+            else:
+                context = Context(self.global_context)
+                for (value, param) in zip(args, params):
+                    context.unsafe_set_var(param, value)
+            res, error = self.execute(code, context, file)
+            if error is not None:
+                raise RickrollException(error)
+            return res
+        return fallback
+    # helpers called by transpiled code
+    def fail(self, error):
+        """Raises an error"""
+        raise RickrollException(error)
+    def fail_raw(self, error):
+        """Raises an error that already holds its line"""
+        raise RickrollException(error, True)
+    def finish(self, exception, line_table, file):
+        """
+        Wraps the error of an exception leaving a transpiled function in a traceback for its line.
+        The exception is raised again instead of a new one, since raising a new exception
+        while handling one links them and every link is checked when the next one is raised.
+        """
+        if exception.raw:
+            exception.raw = False
+            return
+        # the first entry of the traceback is the frame that caught the exception
+        line = line_table[exception.__traceback__.tb_lineno]
+        exception.error = Traceback(line, exception.error, file)
+    def get(self, context, name):
+        """Looks up the value of a variable in context"""
+        cur_context = context
+        while cur_context is not None:
+            if name in cur_context.variable_cache:
+                return cur_context.variable_cache[name]
+            cur_context = cur_context.parent
+        raise RickrollException(RuntimeError('Variable ' + name + ' not found'))
+    def set(self, context, name, value):
+        """Sets the value of a variable in context"""
+        error = context.set_var(name, value)
+        if error is not None:
+            raise RickrollException(error)
+    def declare(self, context, name):
+        """Adds a variable to context"""
+        error = context.add_var(name, CONSTANTS['UNDEFINED'])
+        if error is not None:
+            raise RickrollException(error)
+    def check_declare(self, context, name):
+        """Checks that a variable stored in a Python local does not exist in context"""
+        if context.has_var(name):
+            raise RickrollException(RuntimeError('Variable ' + name + ' already exists'))
+        return CONSTANTS['UNDEFINED']
+    def truth(self, value, line, file):
+        """Returns whether the condition of a block is true"""
+        if value.type != TT_BOOL:
+            value, error = self.cast(value, TT_BOOL)
+            if error is not None:
+                err_msg = 'Boolean expected, instead found ' + str(value)
+                raise RickrollException(IllegalArgumentError(err_msg, line, file), True)
+        return value.value
+    def cast_value(self, value, to_type):
+        """Casts the value of a variable stored in a Python local"""
+        res, error = self.cast(value, to_type)
+        if error is not None:
+            raise RickrollException(error)
+        return res
+    def cast_var(self, context, name, to_type):
+        """Casts the value of a variable in context"""
+        var, error = context.get_var(name)
+        if error is not None:
+            raise RickrollException(error)
+        context.set_var(name, self.cast_value(var, to_type))
+    def find(self, context, site, file):
+        """Looks up the function called by a call site in file"""
+        function, error = self.find_function(site, context, file)
+        if error is not None:
+            raise RickrollException(error)
+        self.get_python(function)
+        return function
+    def invoke(self, function, file, args):
+        """Calls a function from file, and every function it is replaced by with a tail call"""
+        if self.memo is not None:
+            return self.invoke_memo(function, file, args)
+        if self.call_depth >= self.depth_limit:
+            raise RickrollException(call_depth_error(self.depth_limit))
+        self.call_depth += 1
+        try:
+            res = function.python(*args)
+            while type(res) is TailCall:
+                function = res.function
+                res = function.python(*res.args)
+            return res
+        except RickrollException as exception:
+            exception.error = self.function_error(function, file, exception.error)
+            raise
+        except RecursionError:
+            # the Python stack ran out before depth_limit calls, for example in built-ins calling functions
+            raise RickrollException(call_depth_error(self.call_depth)) from None
+        finally:
+            self.call_depth -= 1
+    def invoke_memo(self, function, file, args):
+        """Calls a function like invoke, reusing and storing the values of calls of pure functions"""
+        if self.call_depth >= self.depth_limit:
+            raise RickrollException(call_depth_error(self.depth_limit))
+        self.call_depth += 1
+        keys = [] # calls whose value is the value returned last
+        try:
+            while True:
+                key = self.memo.make_key(function, args, self.global_context)
+                if key is not None:
+                    res = self.memo.get(key)
+                    if res is not None:
+                        break
+                    keys.append(key)
+                res = function.python(*args)
+                if type(res) is not TailCall:
+                    break
+                function = res.function
+                args = res.args
+            # the first of a chain of tail calls is stored last, so it is forgotten last
+            for key in reversed(keys):
+                self.memo.put(key, res)
+            return res
+        except RickrollException as exception:
+            exception.error = self.function_error(function, file, exception.error)
+            raise
+        except RecursionError:
+            # the Python stack ran out before depth_limit calls, for example in built-ins calling functions
+            raise RickrollException(call_depth_error(self.call_depth)) from None
+        finally:
+            self.call_depth -= 1
+    def argument_error(self, function, file, exception):
+        """Wraps an error raised by an argument of a function called from file"""
+        exception.error = self.function_error(function, file, exception.error)
+    def builtin(self, name, args):
+        """Calls a built-in function"""
+        res, error = self.call_builtin(name, list(args))
+        if error is not None:
+            raise RickrollException(error)
+        return res
+    def run_import(self, context, path, line, file):
+        """Imports a file and runs its intro block in context"""
+        tmp_inter, error = self.load_import(path, context, line, file)
+        if error is not None:
+            raise RickrollException(error, True)
+        if tmp_inter is not None and tmp_inter.intro_code is not None:
+            error = self.run_block(tmp_inter.intro_code, context, tmp_inter.file, True)
+            if error is not None:
+                raise RickrollException(error)
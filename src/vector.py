@@ -0,0 +1,270 @@
+from array import array
+from itertools import islice
+
+# Persistent vector
+# the value of every array
+# updating a vector returns a new vector sharing most of its nodes with the old one
+# so arrays keep their value semantics without copying every element
+
+BITS = 5
+WIDTH = 1 << BITS # children of every node
+MASK = WIDTH - 1
+
+# Storage
+# describes how the elements of a vector are kept in its leaves
+# vectors whose elements all have the same type store their raw values
+# and make tokens from them only when an element is read
+class Storage:
+    def __init__(self, element_type, make_leaf, box, fits, to_string):
+        self.element_type = element_type # type of every element, None if elements are stored as they are
+        self.make_leaf = make_leaf # sequence of raw values -> leaf
+        self.box = box # raw value -> element
+        self.fits = fits # element -> whether its raw value can be stored
+        self.to_string = to_string # raw value -> printed form of the element
+
+def array_leaf(typecode):
+    """Returns a function packing raw values into leaves of an array with typecode"""
+    return lambda values: array(typecode, values)
+
+# elements of any type, stored as they are
+GENERIC = Storage(None, tuple, None, lambda element: True, repr)
+
+# element type -> Storage for vectors of only that type, filled in by basic
+TYPED_STORAGES = dict()
+
+def storage_for(elements):
+    """Returns the most compact storage that can hold every element"""
+    if len(elements) == 0:
+        return GENERIC
+    storage = TYPED_STORAGES.get(elements[0].type)
+    if storage is None or not all([storage.fits(element) for element in elements]):
+        return GENERIC
+    return storage
+
+class Vector:
+    """
+    A bit-partitioned trie of tuples with a separate tail holding the last elements.
+    Leaves are tuples of elements or, for vectors of one type, arrays or strings of raw values.
+    Appending, replacing, indexing and removing the last element take O(log32 n) time.
+    Removing the first element takes O(1) amortized time, removing any other element O(n).
+    """
+    __slots__ = ('count', 'shift', 'root', 'tail', 'storage', 'start')
+    def __init__(self, count, shift, root, tail, storage=GENERIC, start=0):
+        self.count = count # number of elements stored, including the removed ones before start
+        self.shift = shift # bits of the index used below the root
+        self.root = root # tuple of nodes, leaves hold the raw values of elements
+        self.tail = tail # leaf of the last 1 to WIDTH elements, empty if vector is empty
+        self.storage = storage
+        # elements removed from the front are skipped instead of moving every other element
+        self.start = start # index in the trie of the first element
+    # for debugging and printing, matches the output of a list
+    def __repr__(self):
+        return '[' + ', '.join(map(self.storage.to_string, self.values())) + ']'
+    def __reduce__(self):
+        if self.storage is GENERIC:
+            return (make_vector, (list(self),))
+        # raw values are pickled packed in a single leaf instead of as tokens
+        return (load_vector, (self.storage.element_type, self.storage.make_leaf(self.values())))
+    def __len__(self):
+        return self.count - self.start
+    def __eq__(self, other):
+        """Returns true if both vectors hold the same elements"""
+        if not isinstance(other, Vector):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        # raw values are compared directly
+        if self.storage is other.storage and self.storage is not GENERIC:
+            return all([left == right for left, right in zip(self.values(), other.values())])
+        return all([left == right for left, right in zip(self, other)])
+    def __hash__(self):
+        # equal vectors hash the same whatever their storage
+        return hash(tuple(self))
+    def __iter__(self):
+        if self.storage.box is None:
+            return self.values()
+        return map(self.storage.box, self.values())
+    def __getitem__(self, index):
+        """Returns the element at index, which must be in bounds"""
+        index += self.start
+        tail_offset = self.count - len(self.tail)
+        if index >= tail_offset:
+            value = self.tail[index - tail_offset]
+        else:
+            value = self.leaf_for(index)[index & MASK]
+        box = self.storage.box
+        return value if box is None else box(value)
+    def values(self):
+        """Iterates over the raw values of the elements"""
+        for leaf in self.leaves():
+            yield from leaf
+    def leaves(self):
+        """Iterates over the leaves holding the raw values in order"""
+        tail_offset = self.tail_offset()
+        # the first leaf may start with removed elements
+        first = self.start & ~MASK
+        if first < tail_offset:
+            yield self.leaf_for(first)[self.start - first : ]
+            for index in range(first + WIDTH, tail_offset, WIDTH):
+                yield self.leaf_for(index)
+            yield self.tail
+        else:
+            yield self.tail[self.start - tail_offset : ]
+    def tail_offset(self):
+        """Returns the index of the first element in the tail"""
+        return self.count - len(self.tail)
+    def leaf_for(self, index):
+        """Returns the leaf of the trie holding the element at index in the trie"""
+        node = self.root
+        level = self.shift
+        while level > 0:
+            node = node[(index >> level) & MASK]
+            level -= BITS
+        return node
+    def append(self, element):
+        """Returns a new vector with element added to the end"""
+        storage = self.storage
+        if len(self) == 0 or not storage.fits(element):
+            # the storage is chosen again for the new elements
+            return make_vector(list(self) + [element])
+        value = element if storage.box is None else element.value
+        # if there is room in the tail
+        if len(self.tail) < WIDTH:
+            tail = self.tail + storage.make_leaf((value,))
+            return Vector(self.count + 1, self.shift, self.root, tail, storage, self.start)
+        # otherwise move the full tail into the trie
+        shift = self.shift
+        if (self.count >> BITS) > (1 << shift):
+            # root is full, so add a level above it
+            root = (self.root, new_path(shift, self.tail))
+            shift += BITS
+        else:
+            root = self.push_tail(shift, self.root)
+        return Vector(self.count + 1, shift, root, storage.make_leaf((value,)), storage, self.start)
+    def push_tail(self, level, parent):
+        """Returns a copy of parent with the full tail added as its last leaf"""
+        index = ((self.count - 1) >> level) & MASK
+        if level == BITS:
+            node = self.tail
+        elif index < len(parent):
+            node = self.push_tail(level - BITS, parent[index])
+        else:
+            node = new_path(level - BITS, self.tail)
+        return parent[ : index] + (node,) + parent[index + 1 : ]
+    def replace(self, index, element):
+        """Returns a new vector with the element at index replaced by element"""
+        storage = self.storage
+        if not storage.fits(element):
+            elements = list(self)
+            elements[index] = element
+            return make_vector(elements)
+        value = storage.make_leaf((element if storage.box is None else element.value,))
+        index += self.start
+        tail_offset = self.tail_offset()
+        if index >= tail_offset:
+            index -= tail_offset
+            tail = self.tail[ : index] + value + self.tail[index + 1 : ]
+            return Vector(self.count, self.shift, self.root, tail, storage, self.start)
+        root = replace_in(self.shift, self.root, index, value)
+        return Vector(self.count, self.shift, root, self.tail, storage, self.start)
+    def remove(self, index):
+        """Returns a new vector without the element at index"""
+        if len(self) == 1:
+            return EMPTY_VECTOR
+        if index == 0:
+            # once most of the stored elements are removed ones, they are dropped
+            # so a vector emptied from the front only holds its elements
+            if self.start + 1 > len(self) - 1:
+                return build_vector(list(islice(self.values(), 1, None)), self.storage)
+            return Vector(self.count, self.shift, self.root, self.tail, self.storage, self.start + 1)
+        if index != len(self) - 1:
+            # elements after index all move, so the trie is rebuilt
+            values = list(self.values())
+            values.pop(index)
+            return build_vector(values, self.storage)
+        # if the tail still has elements left
+        if len(self.tail) > 1:
+            return Vector(self.count - 1, self.shift, self.root, self.tail[ : -1], self.storage, self.start)
+        # otherwise the last leaf of the trie becomes the tail
+        tail = self.leaf_for(self.count - 2)
+        root = self.pop_tail(self.shift, self.root)
+        shift = self.shift
+        if root is None:
+            root = ()
+        # remove levels with a single child
+        if shift > BITS and len(root) == 1:
+            root = root[0]
+            shift -= BITS
+        return Vector(self.count - 1, shift, root, tail, self.storage, self.start)
+    def pop_tail(self, level, node):
+        """Returns a copy of node without its last leaf, or None if it becomes empty"""
+        index = ((self.count - 2) >> level) & MASK
+        if level > BITS:
+            child = self.pop_tail(level - BITS, node[index])
+            if child is None:
+                return node[ : index] if index > 0 else None
+            return node[ : index] + (child,)
+        return node[ : index] if index > 0 else None
+    def subvector(self, start, end):
+        """Returns a new vector of the elements from start up to but not including end"""
+        if start == 0 and end == len(self):
+            return self
+        values = []
+        # indices in the trie
+        index = start + self.start
+        end += self.start
+        # copy whole leaves at a time
+        while index < end:
+            if index >= self.tail_offset():
+                leaf_start = self.tail_offset()
+                leaf = self.tail
+            else:
+                leaf_start = index & ~MASK
+                leaf = self.leaf_for(index)
+            values.extend(leaf[index - leaf_start : min(end - leaf_start, len(leaf))])
+            index = min(end, leaf_start + len(leaf))
+        return build_vector(values, self.storage)
+
+def new_path(level, node):
+    """Returns a branch of nodes with single children leading from level down to node"""
+    while level > 0:
+        node = (node,)
+        level -= BITS
+    return node
+
+def replace_in(level, node, index, value):
+    """Returns a copy of node with the element at index replaced by the single value leaf"""
+    position = (index >> level) & MASK
+    if level == 0:
+        return node[ : position] + value + node[position + 1 : ]
+    child = replace_in(level - BITS, node[position], index, value)
+    return node[ : position] + (child,) + node[position + 1 : ]
+
+def make_vector(elements):
+    """Returns a vector of the elements of a list, stored as compactly as possible"""
+    storage = storage_for(elements)
+    if storage.box is None:
+        return build_vector(elements, storage)
+    return build_vector([element.value for element in elements], storage)
+
+def load_vector(element_type, values):
+    """Returns a vector of raw values of one element type, used to unpickle vectors"""
+    return build_vector(values, TYPED_STORAGES[element_type])
+
+def build_vector(values, storage):
+    """Returns a vector of a sequence of raw values kept in storage"""
+    count = len(values)
+    if count == 0:
+        return EMPTY_VECTOR
+    make_leaf = storage.make_leaf
+    # the tail holds the last 1 to WIDTH elements
+    tail_offset = ((count - 1) >> BITS) << BITS
+    nodes = [make_leaf(values[index : index + WIDTH]) for index in range(0, tail_offset, WIDTH)]
+    shift = BITS
+    # group nodes under parents until they fit in the root
+    while len(nodes) > WIDTH:
+        nodes = [tuple(nodes[index : index + WIDTH]) for index in range(0, len(nodes), WIDTH)]
+        shift += BITS
+    return Vector(count, shift, tuple(nodes), make_leaf(values[tail_offset : ]), storage)
+
+EMPTY_VECTOR = Vector(0, BITS, (), ())
@@ -0,0 +1,494 @@
+from basic import *
+from compiler import *
+from expression_parser import *
+from interpreter import *
+from resolver import *
+
+# bytecode opcodes
+BC_LOAD_CONST = 0 # push a constant
+BC_LOAD_VAR = 1 # push the value of a variable
+BC_UNARY = 2 # apply a unary operator to the top of the stack
+BC_BINARY = 3 # apply a binary operator to the top two values of the stack
+BC_POP = 4 # discard the top of the stack
+BC_RAISE = 5 # raise the error of an expression that could not be parsed
+BC_FAIL = 6 # raise the error of a statement that could not be decoded
+BC_PRINT = 7
+BC_EXIT = 8
+BC_DECLARE = 9
+BC_STORE = 10 # pop a value into a variable
+BC_BRANCH = 11 # pop a condition, enter a new scope if true and jump otherwise
+BC_EXIT_SCOPE = 12
+BC_JUMP = 13
+BC_RETURN = 14
+BC_BEGIN_CALL = 15 # look up a function before its arguments are evaluated
+BC_CALL = 16
+BC_CAST = 17
+BC_IMPORT = 18
+BC_JUMP_IF_FALSE = 19 # pop a condition and jump if false
+BC_LOAD_FAST = 20 # push the value of a slot
+BC_STORE_FAST = 21 # pop a value into a slot
+BC_DECLARE_FAST = 22 # set a slot to UNDEFINED, checking the context for a variable with the same name
+BC_CAST_FAST = 23
+BC_TAIL_CALL = 24 # call a function whose value the caller returns, replacing the caller
+
+class Bytecode:
+    def __init__(self, file):
+        self.code = [] # flat list of opcode, argument pairs
+        self.lines = [] # source line of each pair
+        self.file = file
+        self.slot_count = 0 # size of the frame holding the variables
+        self.dynamic = False # true if variables are stored in contexts instead of slots
+    # for debugging
+    def __repr__(self):
+        res = ''
+        for pc in range(0, len(self.code), 2):
+            res += str(pc) + ' ' + str(self.code[pc]) + ' ' + str(self.code[pc + 1]) + '\n'
+        return res
+    def emit(self, opcode, arg, line):
+        """Appends an opcode with its argument and returns its position"""
+        self.code.append(opcode)
+        self.code.append(arg)
+        self.lines.append(line)
+        return len(self.code) - 2
+
+class BytecodeCompiler:
+    def __init__(self, instructions, file, params=None, dynamic=False, global_names=None):
+        self.instructions = instructions
+        self.file = file
+        self.params = params
+        self.resolver = Resolver(instructions, dynamic, global_names)
+    def make_bytecode(self):
+        """Compiles the stored instructions into bytecode"""
+        bytecode = Bytecode(self.file)
+        bytecode.dynamic = self.resolver.dynamic
+        if self.params is not None:
+            # arguments are stored in the first slots
+            self.resolver.add_params(self.params)
+        starts = [] # position of the first opcode of each instruction
+        branches = [] # (position, instruction index) of jumps to patch
+        for index in range(len(self.instructions)):
+            instruction = self.instructions[index]
+            starts.append(len(bytecode.code))
+            self.compile_instruction(bytecode, instruction, index, branches)
+        starts.append(len(bytecode.code))
+        # functions without a return statement return UNDEFINED
+        line = self.instructions[-1].line if self.instructions else None
+        bytecode.emit(BC_LOAD_CONST, CONSTANTS['UNDEFINED'], line)
+        bytecode.emit(BC_RETURN, None, line)
+        # jump targets are only known after every instruction is compiled
+        for pos, index in branches:
+            bytecode.code[pos + 1] = starts[index]
+        bytecode.slot_count = self.resolver.slot_count
+        return bytecode
+    def compile_instruction(self, bytecode, instruction, index, branches):
+        """Compiles a single instruction"""
+        opcode = instruction.opcode
+        args = instruction.args
+        line = instruction.line
+        if opcode == OP_SAY:
+            self.compile_tree(bytecode, args[0], line)
+            bytecode.emit(BC_PRINT, None, line)
+        elif opcode == OP_EXIT:
+            bytecode.emit(BC_EXIT, None, line)
+        elif opcode == OP_DECLARE:
+            name = args[0]
+            if self.resolver.dynamic:
+                bytecode.emit(BC_DECLARE, name, line)
+            else:
+                slot = self.resolver.declare(name)
+                if slot is None:
+                    bytecode.emit(BC_RAISE, RuntimeError('Variable ' + name + ' already exists'), line)
+                elif self.resolver.is_global(name):
+                    bytecode.emit(BC_DECLARE_FAST, (slot, name), line)
+                else:
+                    # no variable with the same name can exist in the context
+                    bytecode.emit(BC_DECLARE_FAST, (slot, None), line)
+        elif opcode == OP_ASSIGN:
+            self.compile_tree(bytecode, args[1], line)
+            self.compile_store(bytecode, args[0], line)
+        elif opcode == OP_CHECK_TRUE:
+            self.compile_tree(bytecode, args[0], line)
+            # if false, skip past the end of the block
+            if self.resolver.dynamic:
+                pos = bytecode.emit(BC_BRANCH, None, line)
+            else:
+                pos = bytecode.emit(BC_JUMP_IF_FALSE, None, line)
+                self.resolver.enter_block()
+            branches.append((pos, instruction.jump + 1))
+        elif opcode == OP_IF_END:
+            if self.resolver.dynamic:
+                bytecode.emit(BC_EXIT_SCOPE, None, line)
+            else:
+                self.resolver.exit_block()
+        elif opcode == OP_WHILE_END:
+            if self.resolver.dynamic:
+                bytecode.emit(BC_EXIT_SCOPE, None, line)
+            else:
+                self.resolver.exit_block()
+            # jump back to the condition of the loop
+            pos = bytecode.emit(BC_JUMP, None, line)
+            branches.append((pos, instruction.jump))
+        elif opcode == OP_RETURN:
+            self.compile_tree(bytecode, args[0], line)
+            bytecode.emit(BC_RETURN, None, line)
+        elif opcode == OP_CALL or opcode == OP_CALL_VALUE:
+            site = args[-1]
+            bytecode.emit(BC_BEGIN_CALL, site, line)
+            for arg in site.args:
+                self.compile_tree(bytecode, arg, line)
+            if instruction.tail and self.params is not None:
+                # the value can only be returned for the caller if its variable exists
+                check_name = None if self.resolver.resolve(args[0]) is not None else args[0]
+                bytecode.emit(BC_TAIL_CALL, (len(site.args), check_name), line)
+            else:
+                bytecode.emit(BC_CALL, len(site.args), line)
+            if opcode == OP_CALL_VALUE:
+                self.compile_store(bytecode, args[0], line)
+            else:
+                bytecode.emit(BC_POP, None, line)
+        elif opcode == OP_CAST:
+            slot = self.resolver.resolve(args[0])
+            if slot is not None:
+                bytecode.emit(BC_CAST_FAST, (slot, args[1]), line)
+            else:
+                bytecode.emit(BC_CAST, args, line)
+        elif opcode == OP_IMPORT:
+            bytecode.emit(BC_IMPORT, args[0], line)
+        elif opcode == OP_ERROR:
+            bytecode.emit(BC_FAIL, args[0], line)
+    def compile_store(self, bytecode, name, line):
+        """Compiles popping a value into a variable"""
+        slot = self.resolver.resolve(name)
+        if slot is not None:
+            bytecode.emit(BC_STORE_FAST, slot, line)
+        else:
+            bytecode.emit(BC_STORE, name, line)
+    def compile_tree(self, bytecode, node, line):
+        """Compiles an expression tree into stack operations"""
+        # nodes are compiled from a stack of work instead of recursively
+        # so that expressions with thousands of operators fit in the Python stack
+        # work is a node to compile or an (opcode, argument) pair emitted after the operands before it
+        work = [node]
+        while work:
+            node = work.pop()
+            if isinstance(node, tuple):
+                bytecode.emit(node[0], node[1], line)
+            elif isinstance(node, ValueNode):
+                bytecode.emit(BC_LOAD_CONST, node.token, line)
+            elif isinstance(node, VariableNode):
+                slot = self.resolver.resolve(node.name)
+                if slot is not None:
+                    bytecode.emit(BC_LOAD_FAST, slot, line)
+                elif not self.resolver.dynamic and not self.resolver.is_global(node.name):
+                    # the variable cannot exist when the expression runs
+                    bytecode.emit(BC_RAISE, RuntimeError('Variable ' + node.name + ' not found'), line)
+                else:
+                    bytecode.emit(BC_LOAD_VAR, node.name, line)
+            elif isinstance(node, UnaryNode):
+                work.append((BC_UNARY, node.operator.type))
+                work.append(node.operand)
+            elif isinstance(node, BinaryNode):
+                work.append((BC_BINARY, node.operator.type))
+                work.append(node.right)
+                work.append(node.left)
+            elif isinstance(node, SequenceNode):
+                # only the value of the last node is kept
+                for index in reversed(range(len(node.nodes))):
+                    work.append(node.nodes[index])
+                    if index > 0:
+                        work.append((BC_POP, None))
+            elif isinstance(node, ErrorNode):
+                bytecode.emit(BC_RAISE, node.error, line)
+
+# Frame
+# stores the state of a block of bytecode being executed
+class Frame:
+    def __init__(self, bytecode, context, kind, function=None):
+        self.bytecode = bytecode
+        self.pc = 0
+        self.context = context # base context of the block
+        self.cur_context = context
+        self.kind = kind
+        self.function = function
+        self.line = None # line of the statement that made the next frame
+        self.calls = [] # functions whose arguments are being evaluated
+        self.slots = [None] * bytecode.slot_count # variables resolved at compile time
+        self.scopes = [] # contexts of nested blocks, reused by every block at the same depth
+        self.depth = 0
+        self.memo_keys = None # calls whose value is the value returned by the frame
+
+class VirtualMachine(Interpreter):
+    """
+    Runs programs by compiling them into bytecode and executing the
+    bytecode on a value stack in a single dispatch loop.
+    Produces the same output and errors as Interpreter.
+    """
+    def run(self):
+        """Runs the stored code"""
+        self.global_names = find_global_names(self.intro_code)
+        try:
+            if self.intro_code is not None:
+                # variables of the intro block are global
+                bytecode = BytecodeCompiler(self.intro_code, self.file, None, True).make_bytecode()
+                res, error = self.execute_bytecode(Frame(bytecode, self.global_context, FRAME_BLOCK))
+                if error is not None:
+                    return error
+            if self.chorus_code is not None:
+                bytecode = BytecodeCompiler(self.chorus_code, self.file, None, False, self.global_names).make_bytecode()
+                res, error = self.execute_bytecode(Frame(bytecode, Context(self.global_context), FRAME_BLOCK))
+                if error is not None:
+                    return error
+        finally:
+            self.close_tasks()
+    def call_function(self, function, args):
+        """Calls a function with a list of values outside of a program and returns its value"""
+        bytecode = self.get_bytecode(function)
+        context = self.global_context
+        if bytecode.dynamic:
+            context = Context(self.global_context)
+            for (value, param) in zip(args, function.args):
+                context.unsafe_set_var(param, value)
+        frame = Frame(bytecode, context, FRAME_BLOCK)
+        # arguments are stored in the first slots
+        frame.slots[ : len(args)] = args
+        return self.execute_bytecode(frame)
+    def get_bytecode(self, function):
+        """Gets the bytecode of a function, compiling it on the first call"""
+        # bytecode depends on the global variables of the program
+        # so functions of files imported by several programs are compiled for each of them
+        if getattr(function, 'bytecode_owner', None) is not self:
+            compiler = BytecodeCompiler(function.code, function.file, function.args, False, self.global_names)
+            function.bytecode = compiler.make_bytecode()
+            function.bytecode_owner = self
+        return function.bytecode
+    def execute_bytecode(self, frame):
+        """Executes a frame and every frame it calls until it returns"""
+        frames = [frame]
+        stack = []
+        code = frame.bytecode.code
+        file = frame.bytecode.file
+        slots = frame.slots
+        pc = 0
+        while True:
+            opcode = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+            error = None
+            if opcode == BC_LOAD_FAST:
+                stack.append(slots[arg])
+            elif opcode == BC_LOAD_VAR:
+                # look for the variable in every enclosing context
+                cur_context = frame.cur_context
+                while cur_context is not None:
+                    if arg in cur_context.variable_cache:
+                        stack.append(cur_context.variable_cache[arg])
+                        break
+                    cur_context = cur_context.parent
+                else:
+                    error = self.expression_error(frame, RuntimeError('Variable ' + arg + ' not found'), pc)
+            elif opcode == BC_LOAD_CONST:
+                stack.append(arg)
+            elif opcode == BC_BINARY:
+                right = stack.pop()
+                res, error = binary_operation(arg, stack.pop(), right)
+                if error is not None:
+                    error = self.expression_error(frame, error, pc)
+                else:
+                    stack.append(res)
+            elif opcode == BC_STORE_FAST:
+                slots[arg] = stack.pop()
+            elif opcode == BC_JUMP_IF_FALSE:
+                res = stack.pop()
+                if res.type != TT_BOOL:
+                    res, error = self.cast(res, TT_BOOL)
+                    if error is not None:
+                        err_msg = 'Boolean expected, instead found ' + str(res)
+                        error = IllegalArgumentError(err_msg, frame.bytecode.lines[pc // 2 - 1], file)
+                if error is None and not res.value:
+                    pc = arg
+            elif opcode == BC_STORE:
+                error = frame.cur_context.set_var(arg, stack.pop())
+                if error is not None:
+                    error = Traceback(frame.bytecode.lines[pc // 2 - 1], error, file)
+            elif opcode == BC_BRANCH:
+                res = stack.pop()
+                if res.type != TT_BOOL:
+                    res, error = self.cast(res, TT_BOOL)
+                    if error is not None:
+                        err_msg = 'Boolean expected, instead found ' + str(res)
+                        error = IllegalArgumentError(err_msg, frame.bytecode.lines[pc // 2 - 1], file)
+                if error is None:
+                    # if true, execute the inside
+                    if res.value:
+                        if frame.depth == len(frame.scopes):
+                            frame.scopes.append(Context(frame.cur_context)) # make new context
+                        frame.cur_context = frame.scopes[frame.depth]
+                        frame.depth += 1
+                    else:
+                        pc = arg
+            elif opcode == BC_EXIT_SCOPE:
+                # remove context, forgetting its variables so that it can be reused
+                frame.cur_context.variable_cache.clear()
+                frame.cur_context = frame.cur_context.parent
+                frame.depth -= 1
+            elif opcode == BC_JUMP:
+                pc = arg
+            elif opcode == BC_UNARY:
+                res, error = unary_operation(arg, stack.pop())
+                if error is not None:
+                    error = self.expression_error(frame, error, pc)
+                else:
+                    stack.append(res)
+            elif opcode == BC_BEGIN_CALL:
+                # built-in functions are called once the arguments are evaluated
+                # and are kept by name, other functions as the Function found now
+                if arg.builtin:
+                    frame.calls.append(arg.name)
+                else:
+                    function, error = self.find_function(arg, frame.cur_context, file)
+                    if error is not None:
+                        error = Traceback(frame.bytecode.lines[pc // 2 - 1], error, file)
+                    else:
+                        frame.calls.append(function)
+            elif opcode == BC_CALL or opcode == BC_TAIL_CALL:
+                tail = False
+                if opcode == BC_TAIL_CALL:
+                    arg, check_name = arg
+                    tail = check_name is None or frame.cur_context.has_var(check_name)
+                function = frame.calls.pop()
+                args = stack[len(stack) - arg : ]
+                del stack[len(stack) - arg : ]
+                if type(function) is str:
+                    res, error = self.call_builtin(function, args)
+                    if error is not None:
+                        error = Traceback(frame.bytecode.lines[pc // 2 - 1], error, file)
+                    else:
+                        stack.append(res)
+                else:
+                    key = None
+                    if self.memo is not None:
+                        key = self.memo.make_key(function, args, self.global_context)
+                        if key is not None:
+                            res = self.memo.get(key)
+                            # a call made before returns the same value without running again
+                            if res is not None:
+                                stack.append(res)
+                                continue
+                    bytecode = self.get_bytecode(function)
+                    if bytecode.dynamic:
+                        new_context = Context(self.global_context)
+                        for (value, func_arg) in zip(args, function.args):
+                            new_context.unsafe_set_var(func_arg, value) # allow duplicate variables in global
+                    else:
+                        new_context = self.global_context
+                    if tail:
+                        # the caller returns the value of the function, so the function replaces it
+                        memo_keys = frame.memo_keys
+                        frame = Frame(bytecode, new_context, FRAME_FUNCTION, function)
+                        frame.memo_keys = memo_keys
+                        frames[-1] = frame
+                    elif len(frames) > self.max_depth:
+                        error = Traceback(frame.bytecode.lines[pc // 2 - 1], call_depth_error(self.max_depth), file)
+                        return None, self.unwind(frames, error)
+                    else:
+                        # save the state of the caller and switch to the function
+                        frame.pc = pc
+                        frame.line = frame.bytecode.lines[pc // 2 - 1]
+                        frame = Frame(bytecode, new_context, FRAME_FUNCTION, function)
+                        frames.append(frame)
+                    if key is not None:
+                        if frame.memo_keys is None:
+                            frame.memo_keys = []
+                        frame.memo_keys.append(key)
+                    code = bytecode.code
+                    file = bytecode.file
+                    slots = frame.slots
+                    # arguments are stored in the first slots
+                    slots[ : len(args)] = args
+                    pc = 0
+            elif opcode == BC_RETURN:
+                if frame.memo_keys is not None:
+                    # the first of a chain of tail calls is stored last, so it is forgotten last
+                    for key in reversed(frame.memo_keys):
+                        self.memo.put(key, stack[-1])
+                frames.pop()
+                if not frames:
+                    return stack.pop(), None
+                # return value of imported intro blocks is discarded
+                if frame.kind == FRAME_IMPORT:
+                    stack.pop()
+                frame = frames[-1]
+                code = frame.bytecode.code
+                file = frame.bytecode.file
+                slots = frame.slots
+                pc = frame.pc
+            elif opcode == BC_POP:
+                stack.pop()
+            elif opcode == BC_PRINT:
+                print(stack.pop())
+            elif opcode == BC_DECLARE:
+                # add variable to current context
+                error = frame.cur_context.add_var(arg, CONSTANTS['UNDEFINED'])
+                if error is not None:
+                    error = Traceback(frame.bytecode.lines[pc // 2 - 1], error, file)
+            elif opcode == BC_DECLARE_FAST:
+                slot, name = arg
+                if name is not None and frame.cur_context.has_var(name):
+                    error = RuntimeError('Variable ' + name + ' already exists')
+                    error = Traceback(frame.bytecode.lines[pc // 2 - 1], error, file)
+                else:
+                    slots[slot] = CONSTANTS['UNDEFINED']
+            elif opcode == BC_CAST_FAST:
+                slot, to_type = arg
+                res, error = self.cast(slots[slot], to_type)
+                if error is not None:
+                    error = Traceback(frame.bytecode.lines[pc // 2 - 1], error, file)
+                else:
+                    slots[slot] = res
+            elif opcode == BC_CAST:
+                name, to_type = arg
+                line = frame.bytecode.lines[pc // 2 - 1]
+                var, error = frame.cur_context.get_var(name)
+                if error is None:
+                    res, error = self.cast(var, to_type)
+                    if error is None:
+                        frame.cur_context.set_var(name, res)
+                if error is not None:
+                    error = Traceback(line, error, file)
+            elif opcode == BC_IMPORT:
+                line = frame.bytecode.lines[pc // 2 - 1]
+                tmp_inter, error = self.load_import(arg, frame.context, line, file)
+                if tmp_inter is not None and tmp_inter.intro_code is not None:
+                    # run the intro block of the file in the base context
+                    bytecode = BytecodeCompiler(tmp_inter.intro_code, tmp_inter.file, None, True).make_bytecode()
+                    frame.pc = pc
+                    frame.line = line
+                    frame = Frame(bytecode, frame.context, FRAME_IMPORT)
+                    frames.append(frame)
+                    code = frame.bytecode.code
+                    file = frame.bytecode.file
+                    slots = frame.slots
+                    pc = 0
+            elif opcode == BC_EXIT:
+                self.exit()
+            elif opcode == BC_RAISE:
+                error = self.expression_error(frame, arg, pc)
+            elif opcode == BC_FAIL:
+                error = arg
+            if error is not None:
+                return None, self.unwind(frames, error)
+    def expression_error(self, frame, error, pc):
+        """Wraps an error raised while evaluating an expression"""
+        # expression is an argument of a function call
+        if frame.calls and type(frame.calls[-1]) is not str:
+            error = self.function_error(frame.calls[-1], frame.bytecode.file, error)
+        return Traceback(frame.bytecode.lines[pc // 2 - 1], error, frame.bytecode.file)
+    def unwind(self, frames, error):
+        """Pops every frame and wraps the error in a traceback for each caller"""
+        while len(frames) > 1:
+            frame = frames.pop()
+            caller = frames[-1]
+            if frame.kind == FRAME_FUNCTION:
+                error = self.function_error(frame.function, caller.bytecode.file, error)
+            error = Traceback(caller.line, error, caller.bytecode.file)
+        return error
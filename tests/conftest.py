@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import textwrap
+
+import pytest
+
+# the interpreter modules import each other by name from src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import batch
+import interpreter
+import tasks
+from shell import ENGINES
+
+@pytest.fixture(params=sorted(ENGINES))
+def engine(request):
+    """Name of every engine"""
+    return request.param
+
+@pytest.fixture
+def run(tmp_path):
+    """
+    Returns a function running the source of a program with an engine and returning its output,
+    including the error stopping it, the way the batch runner does.
+    """
+    count = [0]
+    def run_source(source, engine='vm', stdin=None, max_depth=interpreter.MAX_CALL_DEPTH, memo=0,
+                   parallel_threshold=tasks.PARALLEL_THRESHOLD, name=None):
+        # programs are named in the order they run unless a name is given
+        count[0] += 1
+        if name is None:
+            name = 'program' + str(count[0])
+        path = tmp_path / (name + '.txt')
+        path.write_text(textwrap.dedent(source).strip() + '\n')
+        if stdin is not None:
+            path.with_suffix(batch.INPUT_EXTENSION).write_text(stdin)
+        options = argparse.Namespace(engine=engine, max_depth=max_depth, memo=memo, parallel_threshold=parallel_threshold)
+        return batch.execute_program(str(path), options)
+    return run_source
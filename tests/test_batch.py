@@ -0,0 +1,43 @@
+import argparse
+import os
+
+import batch
+import cache
+import interpreter
+import tasks
+
+PROGRAM = '''[Chorus]
+Never gonna let word down
+(Ooh give you word) Never gonna run _input and desert you
+Never gonna say word
+'''
+
+def make_options(engine):
+    return argparse.Namespace(workers=2, engine=engine, max_depth=interpreter.MAX_CALL_DEPTH, memo=0,
+                              parallel_threshold=tasks.PARALLEL_THRESHOLD)
+
+def test_batch(tmp_path, engine):
+    (tmp_path / 'good.txt').write_text(PROGRAM)
+    (tmp_path / 'good.input').write_text('abc\n')
+    (tmp_path / 'good.expected').write_text('[a, b, c]\n')
+    (tmp_path / 'bad.txt').write_text('[Chorus]\nNever gonna say 2 + 2\n')
+    (tmp_path / 'bad.expected').write_text('nothing\n')
+    (tmp_path / 'free.txt').write_text('[Chorus]\nNever gonna say 1 + 1\n')
+    paths = batch.find_programs([str(tmp_path)])
+    assert [os.path.basename(path) for path in paths] == ['bad.txt', 'free.txt', 'good.txt']
+    summary = batch.run_batch(paths, make_options(engine))
+    statuses = {os.path.basename(result['file']): result['status'] for result in summary['programs']}
+    assert statuses == {'bad.txt': batch.STATUS_FAILED, 'free.txt': batch.STATUS_DONE, 'good.txt': batch.STATUS_PASSED}
+    assert summary[batch.STATUS_ERROR] == 0
+
+def test_cache(run, tmp_path):
+    source = '[Chorus]\nNever gonna say 6 * 7\n'
+    assert run(source, name='cached') == '42\n'
+    path = str(tmp_path / 'cached.txt')
+    key = cache.source_key('cached.txt', path)
+    assert cache.load(path, key) is not None
+    # the cached program gives the same output
+    assert run(source, name='cached') == '42\n'
+    # a changed program is compiled again
+    assert run('[Chorus]\nNever gonna say 6 * 6\n', name='cached') == '36\n'
+    assert cache.load(path, key) is None
@@ -0,0 +1,119 @@
+def test_strings(run, engine):
+    source = '''
+    [Chorus]
+    Never gonna let line down
+    Never gonna let parts down
+    Never gonna let n down
+    (Ooh give you line) Never gonna run _input and desert you
+    (Ooh give you parts) Never gonna run _split and desert line, ','
+    Never gonna run _print and desert parts : 1
+    Never gonna run _putchar and desert '\\n'
+    (Ooh give you n) Never gonna run _toint and desert parts : 0
+    Never gonna say n + 1
+    (Ooh give you n) Never gonna run _indexof and desert line, 'c'
+    Never gonna say n
+    (Ooh give you line) Never gonna run _join and desert parts, ';'
+    Never gonna run _print and desert line
+    Never gonna run _putchar and desert '\\n'
+    (Ooh give you n) Never gonna run _tofloat and desert parts : 0
+    Never gonna say n
+    '''
+    assert run(source, engine, stdin='12,abc\n') == 'abc\n13\n5\n12;abc\n12.0\n'
+
+def test_toint_errors(run, engine):
+    source = '''
+    [Chorus]
+    Never gonna let s down
+    (Ooh give you s) Never gonna run _fill and desert 5000, '7'
+    (Ooh give you s) Never gonna run _toint and desert s
+    '''
+    assert run(source, engine).startswith('Illegal Argument: Not a valid INT: 777')
+    source = '''
+    [Chorus]
+    Never gonna let s down
+    (Ooh give you s) Never gonna run _arrayof and desert '1', 'x'
+    (Ooh give you s) Never gonna run _toint and desert s
+    '''
+    assert run(source, engine).startswith('Illegal Argument: Not a valid INT: 1x\n')
+
+def test_sort_and_search(run, engine):
+    source = '''
+    [Chorus]
+    Never gonna let arr down
+    Never gonna let i down
+    (Ooh give you arr) Never gonna run _arrayof and desert 3, 1, 2, 3, 1
+    (Ooh give you arr) Never gonna run _unique and desert arr
+    Never gonna say arr
+    (Ooh give you arr) Never gonna run _sort and desert arr, TRUE
+    Never gonna say arr
+    (Ooh give you arr) Never gonna run _reverse and desert arr
+    Never gonna say arr
+    (Ooh give you i) Never gonna run _bsearch and desert arr, 2
+    Never gonna say i
+    (Ooh give you arr) Never gonna run _arrayof and desert 1, 3, 3, 7
+    (Ooh give you i) Never gonna run _bsearch and desert arr, 3
+    Never gonna say i
+    (Ooh give you i) Never gonna run _bsearch and desert arr, 7.0
+    Never gonna say i
+    (Ooh give you i) Never gonna run _bsearch and desert arr, 4
+    Never gonna say i
+    '''
+    assert run(source, engine) == '[3, 1, 2]\n[3, 2, 1]\n[1, 2, 3]\n1\n1\n3\n-1\n'
+
+def test_maps(run, engine):
+    source = '''
+    [Chorus]
+    Never gonna let ages down
+    Never gonna let name down
+    Never gonna let res down
+    (Ooh give you name) Never gonna run _arrayof and desert 'b', 'o', 'b'
+    (Ooh give you ages) Never gonna run _mapof and desert name, 31
+    (Ooh give you ages) Never gonna run _put and desert ages, 'x', 7
+    Never gonna say ages : name
+    Never gonna say ages : 'x'
+    (Ooh give you res) Never gonna run _get and desert ages, 'y', 0
+    Never gonna say res
+    (Ooh give you res) Never gonna run _haskey and desert ages, 'x'
+    Never gonna say res
+    (Ooh give you ages) Never gonna run _remove and desert ages, 'x'
+    (Ooh give you res) Never gonna run _getlength and desert ages
+    Never gonna say res
+    (Ooh give you res) Never gonna run _get and desert ages, 'x'
+    '''
+    expected = '31\n7\n0\nTRUE\n1\nKey Error: Key x not in map\nTraceback on line 17 (in file program1.txt)\n'
+    assert run(source, engine) == expected
+
+def test_pop_front_and_back(run, engine):
+    source = '''
+    [Chorus]
+    Never gonna let arr down
+    Never gonna let i down
+    (Ooh give you arr) Never gonna run _range and desert 0, 100
+    Never gonna give i 0
+    Inside we both know i < 60
+      (Ooh give you arr) Never gonna run _pop and desert arr, 0
+      Never gonna give i i + 1
+    We know the game and we're gonna play it
+    (Ooh give you arr) Never gonna run _pop and desert arr, 39
+    (Ooh give you arr) Never gonna run _pop and desert arr, 10
+    (Ooh give you arr) Never gonna run _push and desert arr, 5
+    (Ooh give you i) Never gonna run _getlength and desert arr
+    Never gonna say i
+    (Ooh give you i) Never gonna run _sum and desert arr
+    Never gonna say i
+    Never gonna say arr : 0
+    '''
+    # 60 to 98 without 70, and 5
+    assert run(source, engine) == '39\n' + str(sum(range(60, 99)) - 70 + 5) + '\n60\n'
+
+def test_elementwise(run, engine):
+    source = '''
+    [Chorus]
+    Never gonna let arr down
+    (Ooh give you arr) Never gonna run _range and desert 0, 4
+    (Ooh give you arr) Never gonna run _vmul and desert arr, arr
+    Never gonna say arr
+    (Ooh give you arr) Never gonna run _vadd and desert 0.5, arr
+    Never gonna say arr
+    '''
+    assert run(source, engine) == '[0, 1, 4, 9]\n[0.5, 1.5, 4.5, 9.5]\n'
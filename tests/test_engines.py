@@ -0,0 +1,122 @@
+import pytest
+
+# every engine produces the same output and errors as the tree interpreter
+
+FIB = '''
+[Verse fib]
+(Ooh give you i)
+Inside we both know i <= 1
+  (Ooh) Never gonna give, never gonna give (give you i)
+Your heart's been aching but you're too shy to say it
+Never gonna let first down
+Never gonna let second down
+(Ooh give you first) Never gonna run fib and desert i - 1
+(Ooh give you second) Never gonna run fib and desert i - 2
+(Ooh) Never gonna give, never gonna give (give you first + second)
+
+[Chorus]
+Never gonna let i down
+(Ooh give you i) Never gonna run fib and desert 20
+Never gonna say i
+'''
+
+DOWN = '''
+[Verse down]
+(Ooh give you n)
+Never gonna let res down
+Inside we both know n == 0
+  (Ooh) Never gonna give, never gonna give (give you 0)
+Your heart's been aching but you're too shy to say it
+(Ooh give you res) Never gonna run down and desert n - 1
+(Ooh) Never gonna give, never gonna give (give you res + 1)
+
+[Chorus]
+Never gonna let r down
+(Ooh give you r) Never gonna run down and desert 3000
+Never gonna say r
+'''
+
+COUNT = '''
+[Verse count]
+(Ooh give you n total)
+Never gonna let res down
+Inside we both know n == 0
+  (Ooh) Never gonna give, never gonna give (give you total)
+Your heart's been aching but you're too shy to say it
+(Ooh give you res) Never gonna run count and desert n - 1, total + n
+(Ooh) Never gonna give, never gonna give (give you res)
+
+[Chorus]
+Never gonna let r down
+(Ooh give you r) Never gonna run count and desert 50000, 0
+Never gonna say r
+'''
+
+PROGRAMS = [
+    ('''
+    [Chorus]
+    Never gonna say 3 + 4 * (6 % 3) > 1
+    Never gonna say - 2 * 3 + 10 / 3
+    Never gonna say ! TRUE || 1 == 1 && 2 < 2
+    Never gonna say 1.5 * 2
+    Never gonna say (1 2 3)
+    ''', 'TRUE\n-3\nFALSE\n3.0\n3\n'),
+    ('''
+    [Intro]
+    Never gonna let a down
+    Never gonna give a 1
+
+    [Chorus]
+    Never gonna let i down
+    Never gonna give i 0
+    Inside we both know i < 5
+      Never gonna let b down
+      Never gonna give b i * 2
+      Never gonna give a a + b
+      Never gonna give i i + 1
+    We know the game and we're gonna play it
+    Never gonna say a
+    ''', '21\n'),
+    (FIB, '6765\n'),
+    (DOWN, '3000\n'),
+    (COUNT, '1250025000\n'),
+    ('''
+    [Chorus]
+    Never gonna say x + 1
+    ''', 'Runtime Error: Variable x not found\nTraceback on line 2 (in file program1.txt)\n'),
+    ('''
+    [Verse f]
+    (Ooh give you up)
+
+    [Verse f]
+    (Ooh give you up)
+
+    [Chorus]
+    Never gonna say 1
+    ''', 'Runtime Error: Function f already exists\n'),
+    ('''
+    [Chorus]
+    Never gonna let m down
+    (Ooh give you m) Never gonna run _mapof and desert 1, 2
+    Never gonna say m : 1
+    Never gonna say m : 5
+    ''', '2\nKey Error: Key 5 not in map\nTraceback on line 5 (in file program1.txt)\n'),
+]
+
+@pytest.mark.parametrize('source, expected', PROGRAMS)
+def test_output(run, engine, source, expected):
+    assert run(source, engine) == expected
+
+def test_nested_parentheses(run, engine):
+    depth = 3000
+    source = '[Chorus]\nNever gonna say ' + '(' * depth + '1' + ')' * depth + '\n'
+    source += 'Never gonna say ' + '1 + (' * depth + '1' + ')' * depth + '\n'
+    assert run(source, engine) == '1\n' + str(depth + 1) + '\n'
+
+def test_call_depth_error(run, engine):
+    output = run(DOWN, engine, max_depth=50)
+    assert output.startswith('Runtime Error: Maximum call depth of 50 exceeded\n')
+    assert output == run(DOWN, 'tree', max_depth=50, name='program1')
+
+def test_memo(run, engine):
+    assert run(FIB, engine, memo=100) == '6765\n'
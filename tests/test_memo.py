@@ -0,0 +1,55 @@
+from interpreter import Interpreter
+from memo import Memo, Purity
+
+SOURCE = '''
+[Verse outer]
+(Ooh give you n)
+Never gonna let r down
+(Ooh give you r) Never gonna run inner and desert n
+(Ooh) Never gonna give, never gonna give (give you r)
+
+[Verse inner]
+(Ooh give you n)
+(Ooh) Never gonna give, never gonna give (give you n + 1)
+
+[Verse loud]
+(Ooh give you n)
+Never gonna say n
+(Ooh) Never gonna give, never gonna give (give you n)
+
+[Chorus]
+Never gonna say 1
+'''
+
+def parse_functions():
+    inter = Interpreter('memo', SOURCE.split('\n'))
+    assert inter.parse() is None
+    return inter.global_context
+
+def test_purity():
+    context = parse_functions()
+    purity = Purity()
+    assert purity.is_pure(context.function_cache['outer'], context) is True
+    assert purity.is_pure(context.function_cache['loud'], context) is False
+
+def test_undefined_callee_is_not_stored():
+    context = parse_functions()
+    inner = context.function_cache.pop('inner')
+    outer = context.function_cache['outer']
+    purity = Purity()
+    assert purity.is_pure(outer, context) is None
+    functions, error = purity.find_callees(outer, context)
+    assert functions is None and error is not None
+    # once the callee is defined the function is pure
+    context.function_cache['inner'] = inner
+    assert purity.is_pure(outer, context) is True
+
+def test_least_recently_used_value_is_forgotten():
+    memo = Memo(2)
+    memo.put('a', 1)
+    memo.put('b', 2)
+    assert memo.get('a') == 1
+    memo.put('c', 3)
+    assert memo.get('b') is None
+    assert memo.get('a') == 1 and memo.get('c') == 3
+    assert memo.evictions == 1
@@ -0,0 +1,74 @@
+FUNCTIONS = '''
+[Verse square]
+(Ooh give you n)
+(Ooh) Never gonna give, never gonna give (give you n * n)
+
+[Verse add]
+(Ooh give you a b)
+(Ooh) Never gonna give, never gonna give (give you a + b)
+
+[Verse broken]
+(Ooh give you n)
+Never gonna let r down
+(Ooh give you r) Never gonna run missing and desert n
+(Ooh) Never gonna give, never gonna give (give you r)
+
+[Verse loud]
+(Ooh give you n)
+Never gonna say n
+(Ooh) Never gonna give, never gonna give (give you n)
+'''
+
+def test_map_and_reduce(run, engine):
+    source = FUNCTIONS + '''
+[Chorus]
+Never gonna let squares down
+Never gonna let total down
+(Ooh give you squares) Never gonna run _range and desert 0, 50
+(Ooh give you squares) Never gonna run _parmap and desert square, squares
+(Ooh give you total) Never gonna run _parreduce and desert add, squares, 0
+Never gonna say squares : 49
+Never gonna say total
+'''
+    expected = '2401\n' + str(sum([n * n for n in range(50)])) + '\n'
+    # serially and in worker processes
+    assert run(source, engine) == expected
+    assert run(source, engine, parallel_threshold=1) == expected
+
+def test_empty_arrays(run, engine):
+    source = FUNCTIONS + '''
+[Chorus]
+Never gonna let res down
+(Ooh give you res) Never gonna run _parmap and desert square, ARRAY
+Never gonna say res
+(Ooh give you res) Never gonna run _parreduce and desert add, ARRAY, 5
+Never gonna say res
+'''
+    assert run(source, engine, parallel_threshold=0) == '[]\n5\n'
+
+def test_spawn(run, engine):
+    source = FUNCTIONS + '''
+[Chorus]
+Never gonna let first down
+Never gonna let second down
+(Ooh give you first) Never gonna run _spawn and desert square, 30
+(Ooh give you second) Never gonna run _spawn and desert add, 1, 2
+(Ooh give you first) Never gonna run _await and desert first
+(Ooh give you second) Never gonna run _await and desert second
+Never gonna say first + second
+'''
+    assert run(source, engine) == '903\n'
+
+def test_spawn_errors(run, engine):
+    source = FUNCTIONS + '''
+[Chorus]
+Never gonna let task down
+(Ooh give you task) Never gonna run _spawn and desert broken, 1
+'''
+    assert run(source, engine).startswith('Runtime Error: Function missing doesn\'t exist\n')
+    source = FUNCTIONS + '''
+[Chorus]
+Never gonna let task down
+(Ooh give you task) Never gonna run _spawn and desert loud, 1
+'''
+    assert run(source, engine).startswith('Illegal Argument: Function loud is not pure\n')
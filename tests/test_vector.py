@@ -0,0 +1,78 @@
+import pickle
+import random
+
+from basic import *
+from vector import GENERIC, WIDTH, make_vector
+
+def make_elements(values):
+    """Returns the tokens of a list of Python values"""
+    tokens = []
+    for value in values:
+        if isinstance(value, bool):
+            tokens.append(make_bool(value))
+        elif isinstance(value, int):
+            tokens.append(make_int(value))
+        elif isinstance(value, float):
+            tokens.append(make_float(value))
+        else:
+            tokens.append(Token(TT_CHAR, value))
+    return tokens
+
+def values_of(vector):
+    return [element.value for element in vector]
+
+def test_typed_storage():
+    assert make_vector(make_elements([1, 2, 3])).storage is TYPED_STORAGES[TT_INT]
+    assert make_vector(make_elements(['a', 'b'])).storage is TYPED_STORAGES[TT_CHAR]
+    assert make_vector(make_elements([1, True])).storage is GENERIC
+    # an element of another type changes the storage
+    vector = make_vector(make_elements([1, 2])).append(make_float(0.5))
+    assert vector.storage is GENERIC
+    assert values_of(vector) == [1, 2, 0.5]
+
+def test_operations_match_a_list():
+    random.seed(1)
+    for size in (0, 1, WIDTH - 1, WIDTH, WIDTH + 1, WIDTH * WIDTH + 3):
+        expected = list(range(size))
+        vector = make_vector(make_elements(expected))
+        for step in range(200):
+            choice = random.random()
+            if choice < 0.4 and expected:
+                # mostly from the front, as a queue
+                index = 0 if random.random() < 0.7 else random.randrange(len(expected))
+                vector = vector.remove(index)
+                expected.pop(index)
+            elif choice < 0.7:
+                vector = vector.append(make_int(step))
+                expected.append(step)
+            elif expected:
+                index = random.randrange(len(expected))
+                vector = vector.replace(index, make_int(-step))
+                expected[index] = -step
+            assert len(vector) == len(expected)
+            assert values_of(vector) == expected
+            assert [value for leaf in vector.leaves() for value in leaf] == expected
+            if expected:
+                index = random.randrange(len(expected))
+                assert vector[index].value == expected[index]
+                end = random.randint(index, len(expected))
+                assert values_of(vector.subvector(index, end)) == expected[index : end]
+            assert vector == make_vector(make_elements(expected))
+
+def test_updates_keep_the_old_vector():
+    old = make_vector(make_elements(list(range(100))))
+    new = old.remove(0).replace(5, make_int(-1)).append(make_int(100))
+    assert values_of(old) == list(range(100))
+    assert len(new) == 100
+
+def test_pickle():
+    for values in ([], list(range(0, 10 ** 6, 7)), [0.5, 1.5], list('hello' * 20), [1, True, 'a']):
+        vector = make_vector(make_elements(values))
+        if len(vector) > 2:
+            vector = vector.remove(0)
+        loaded = pickle.loads(pickle.dumps(vector, pickle.HIGHEST_PROTOCOL))
+        assert loaded == vector
+        assert loaded.storage is vector.storage
+    # raw values are pickled without their tokens
+    vector = make_vector(make_elements(list(range(100000))))
+    assert len(pickle.dumps(vector, pickle.HIGHEST_PROTOCOL)) < 100000 * 9